@@ -0,0 +1,153 @@
+import os
+import threading
+import time
+
+from metrics import REGISTRY
+from ratelimit import TokenBucket
+
+API_RATE = float(os.getenv('API_RATE', 0))
+API_BURST = float(os.getenv('API_BURST', 10))
+
+LIMITER_REQUESTS = REGISTRY.counter(
+    'homework_api_limiter_requests_total',
+    'Запросы к API практикума через общий лимит: immediate, delayed, '
+    'coalesced', ('result',)
+)
+LIMITER_WAIT = REGISTRY.counter(
+    'homework_api_limiter_wait_seconds_total',
+    'Суммарное ожидание токена лимита запросов к API практикума'
+)
+LIMITER_TOKENS = REGISTRY.gauge(
+    'homework_api_limiter_tokens',
+    'Свободных токенов лимита запросов к API практикума, '
+    'отрицательное - запросов в очереди'
+)
+LIMITER_IN_FLIGHT = REGISTRY.gauge(
+    'homework_api_limiter_in_flight',
+    'Разных запросов к API практикума в полёте'
+)
+
+
+class Flight:
+    """Запрос в полёте: его результат ждут все одинаковые запросы."""
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ApiLimiter:
+    """
+    Общий на процесс лимит запросов к API практикума: не больше
+    burst запросов подряд и rate в секунду в среднем, то есть за любые
+    T секунд - не больше burst + rate * T запросов. Лишние запросы
+    ждут своей очереди в потоке, который их делает.
+    Одинаковые HTTP запросы в полёте (тот же ключ - заголовки
+    и from_date) схлопываются: запрос делает первый, остальные получают
+    тот же ответ или то же исключение и токен не тратят.
+    prepaid - тот же лимит для вызовов, которые взяли токен заранее
+    через acquire_async.
+    """
+
+    def __init__(self, rate: float, burst: float = API_BURST):
+        self.bucket = TokenBucket(rate, max(burst, 1))
+        self.prepaid = Prepaid(self)
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def in_flight(self) -> int:
+        """Разных запросов в полёте."""
+        return len(self._flights)
+
+    def _delay(self) -> float:
+        """Забирает токен и возвращает, сколько его ждать."""
+        delay = self.bucket.reserve()
+        if not delay:
+            LIMITER_REQUESTS.inc('immediate')
+            return 0.0
+        LIMITER_REQUESTS.inc('delayed')
+        LIMITER_WAIT.inc(amount=delay)
+        return delay
+
+    def acquire(self):
+        """Забирает токен, при необходимости ожидая его."""
+        delay = self._delay()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        """Забирает токен, ожидая его без блокировки event loop."""
+        import asyncio
+
+        delay = self._delay()
+        if delay:
+            await asyncio.sleep(delay)
+
+    def call(self, key, function, *args, **kwargs):
+        """
+        Вызывает function под лимитом. Если запрос с тем же key
+        уже в полёте, ждёт и возвращает его результат.
+        """
+        return self._call(key, True, function, args, kwargs)
+
+    def _call(self, key, acquire: bool, function, args, kwargs):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Flight()
+        if not leader:
+            LIMITER_REQUESTS.inc('coalesced')
+            if not acquire:
+                self.bucket.release()
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            if acquire:
+                self.acquire()
+            flight.result = function(*args, **kwargs)
+            return flight.result
+        except Exception as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+
+class Prepaid:
+    """
+    Лимит для вызова, токен которого уже взят: call только схлопывает
+    одинаковые запросы, а схлопнутый возвращает свой токен.
+    """
+
+    __slots__ = ('limiter',)
+
+    def __init__(self, limiter: ApiLimiter):
+        self.limiter = limiter
+
+    def call(self, key, function, *args, **kwargs):
+        """Вызывает function без ожидания токена."""
+        return self.limiter._call(key, False, function, args, kwargs)
+
+
+def create_api_limiter(rate: float = API_RATE, burst: float = API_BURST):
+    """
+    Создаёт лимит запросов к API практикума и показывает его
+    в метриках. При rate <= 0 лимита нет.
+    """
+    if rate <= 0:
+        return None
+    limiter = ApiLimiter(rate, burst)
+    LIMITER_TOKENS.set_function(limiter.bucket.tokens)
+    LIMITER_IN_FLIGHT.set_function(limiter.in_flight)
+    return limiter
+
+
+API_LIMITER = create_api_limiter()
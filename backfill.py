@@ -0,0 +1,241 @@
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import homework
+from changes import homework_key, homework_version
+from checkpoint import Checkpoint
+from config_log import LOGGER_CONFIG
+from engine import SUBSCRIPTIONS_FILE
+from exceptions import HomeWorkIsEmpty
+from history import create_history, parse_date
+from http_session import create_session
+from log_pipeline import setup_logging
+from ratelimit import TokenBucket
+from subscriptions import Subscription, load_subscriptions
+
+_logger = logging.getLogger('bot_logger')
+
+
+BACKFILL_WORKERS = int(os.getenv('BACKFILL_WORKERS', 8))
+BACKFILL_RATE = float(os.getenv('BACKFILL_RATE', 5))
+BACKFILL_WINDOW_DAYS = float(os.getenv('BACKFILL_WINDOW_DAYS', 30))
+DAY = 24 * 3600
+
+
+def split_windows(since: int, until: int, size: float) -> list:
+    """Делит [since, until) на окна [начало, конец) длиной size секунд."""
+    windows = []
+    start = since
+    while start < until:
+        end = min(until, int(start + size))
+        windows.append((start, end))
+        start = end
+    return windows
+
+
+def in_window(homework: dict, start: int, end: int = None) -> bool:
+    """
+    Работа обновлена внутри окна, end=None - окно без конца.
+    Работы без разбираемой даты попадают в каждое окно
+    и сводятся при дедупликации.
+    """
+    updated = parse_date(homework.get('date_updated'))
+    if updated is None:
+        return True
+    return start <= updated and (end is None or updated < end)
+
+
+class Backfill:
+    """
+    Загружает историю домашних работ за прошедший период.
+    Период делится на окна, запросы по окнам всех подписок идут
+    пулом из workers потоков через request_api_answer, как у опроса,
+    но не чаще rate запросов в секунду на весь процесс.
+    API отдаёт все работы, обновлённые после from_date, поэтому ответы
+    соседних окон перекрываются: из каждого берутся только работы
+    своего окна, а повторы одной работы сводятся к последней версии.
+    Итог записывается в checkpoint и историю статусов одной
+    транзакцией, уведомления не отправляются.
+    """
+
+    def __init__(self, subscriptions: list, session=None,
+                 workers: int = BACKFILL_WORKERS,
+                 rate: float = BACKFILL_RATE,
+                 window: float = BACKFILL_WINDOW_DAYS * DAY,
+                 checkpoint=None, history=None, breaker=None):
+        self.subscriptions = subscriptions
+        self.session = session or create_session(pool_size=workers)
+        self.workers = workers
+        self.bucket = TokenBucket(rate, capacity=1)
+        self.window = window
+        self.checkpoint = checkpoint
+        self.history = history
+        self.breaker = breaker
+
+    def fetch(self, subscription, start: int, end: int = None):
+        """Работы подписки, обновлённые в окне, и current_date ответа."""
+        self.bucket.acquire()
+        response = homework.request_api_answer(
+            start, subscription.headers, self.session, breaker=self.breaker
+        )
+        try:
+            homeworks = homework.check_response(response)
+        except HomeWorkIsEmpty:
+            homeworks = []
+        return response['current_date'], [
+            item for item in homeworks if in_window(item, start, end)
+        ]
+
+    def collect(self, futures: dict, until: int = None) -> dict:
+        """
+        Сводит ответы окон: последняя версия каждой работы
+        и current_date подписок, у которых загрузились все окна.
+        Если задан until, курсор подписки не дальше until: работы,
+        обновлённые позже, в период не попали, их заберёт опрос.
+        """
+        latest = {}
+        cursors = {}
+        failed = set()
+        received = 0
+        for (subscription, window), future in futures.items():
+            try:
+                current_date, homeworks = future.result()
+            except Exception as error:
+                failed.add(subscription)
+                _logger.error(
+                    f'[{subscription.id}] Окно {window} не загружено: {error}'
+                )
+                continue
+            if until is not None:
+                current_date = min(current_date, until)
+            cursors[subscription] = max(
+                current_date, cursors.get(subscription, 0)
+            )
+            received += len(homeworks)
+            for item in homeworks:
+                key = (subscription, homework_key(item))
+                known = latest.get(key)
+                if known is None or (item.get('date_updated') or '') > (
+                    known.get('date_updated') or ''
+                ):
+                    latest[key] = item
+        for subscription in failed:
+            cursors.pop(subscription, None)
+        return {
+            'latest': latest, 'cursors': cursors, 'failed': failed,
+            'received': received,
+        }
+
+    def store(self, latest: dict, cursors: dict):
+        """Записывает работы и current_date одной транзакцией."""
+        for (subscription, homework_id), item in latest.items():
+            if self.checkpoint is not None:
+                self.checkpoint.save_homework(
+                    subscription.key, homework_id, homework_version(item)
+                )
+            if self.history is not None:
+                self.history.record(
+                    subscription.key, subscription.chat_id, item
+                )
+        if self.checkpoint is not None:
+            for subscription, current_date in cursors.items():
+                self.checkpoint.save_cursor(subscription.key, current_date)
+            self.checkpoint.flush(force=True)
+        if self.history is not None:
+            self.history.flush()
+
+    def run(self, since: int, until: int = None) -> dict:
+        """
+        Загружает период [since, until) и возвращает отчёт.
+        Без until последнее окно открыто: в него попадают и работы,
+        обновлённые во время загрузки.
+        """
+        windows = split_windows(
+            since, until or int(time.time()), self.window
+        )
+        if until is None and windows:
+            windows[-1] = (windows[-1][0], None)
+        started = time.monotonic()
+        with ThreadPoolExecutor(
+            self.workers, thread_name_prefix='backfill'
+        ) as executor:
+            futures = {
+                (subscription, window): executor.submit(
+                    self.fetch, subscription, *window
+                )
+                for subscription in self.subscriptions
+                for window in windows
+            }
+            result = self.collect(futures, until)
+        self.store(result['latest'], result['cursors'])
+        elapsed = time.monotonic() - started
+        report = {
+            'subscriptions': len(self.subscriptions),
+            'windows': len(windows),
+            'requests': len(futures),
+            'failed_subscriptions': len(result['failed']),
+            'homeworks': len(result['latest']),
+            'duplicates': result['received'] - len(result['latest']),
+            'seconds': round(elapsed, 2),
+            'requests_per_second': round(
+                len(futures) / max(elapsed, 1e-6), 2
+            ),
+        }
+        _logger.info(f'Загрузка истории завершена: {report}')
+        return report
+
+
+def parse_time(value: str) -> int:
+    """Время из unix timestamp или даты ISO 8601."""
+    if value.isdigit():
+        return int(value)
+    timestamp = parse_date(value if 'T' in value else f'{value}T00:00:00Z')
+    if timestamp is None:
+        raise argparse.ArgumentTypeError(f'Неверная дата: {value}')
+    return timestamp
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Загрузка истории домашних работ за прошедший период'
+    )
+    parser.add_argument('since', type=parse_time,
+                        help='начало периода: 2022-01-01 или timestamp')
+    parser.add_argument('--until', type=parse_time, default=None)
+    parser.add_argument('--window-days', type=float,
+                        default=BACKFILL_WINDOW_DAYS)
+    parser.add_argument('--workers', type=int, default=BACKFILL_WORKERS)
+    parser.add_argument('--rate', type=float, default=BACKFILL_RATE,
+                        help='не больше запросов к API в секунду')
+    return parser.parse_args()
+
+
+def load():
+    """Подписки из SUBSCRIPTIONS_FILE или аккаунт из .env."""
+    if os.path.exists(SUBSCRIPTIONS_FILE):
+        return load_subscriptions(SUBSCRIPTIONS_FILE)
+    homework.check_environment()
+    return [Subscription(homework.PRACTICUM_TOKEN, homework.TELEGRAM_CHAT_ID)]
+
+
+def main():
+    """Загружает историю всех подписок за период из аргументов."""
+    args = parse_args()
+    setup_logging(LOGGER_CONFIG)
+    checkpoint = Checkpoint()
+    history = create_history()
+    Backfill(
+        load(), workers=args.workers, rate=args.rate,
+        window=args.window_days * DAY, checkpoint=checkpoint,
+        history=history, breaker=homework.create_api_breaker()
+    ).run(args.since, args.until)
+    checkpoint.close()
+    if history is not None:
+        history.close()
+
+
+if __name__ == '__main__':
+    main()
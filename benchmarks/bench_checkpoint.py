@@ -0,0 +1,55 @@
+"""
+Время загрузки состояния при старте и стоимость записи за цикл опроса.
+
+    python benchmarks/bench_checkpoint.py [подписок] [работ на подписку]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from checkpoint import Checkpoint  # noqa: E402
+
+
+def main():
+    subscriptions = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    homeworks = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'state.db')
+        checkpoint = Checkpoint(path)
+        for key in range(subscriptions):
+            checkpoint.save_cursor(str(key), 1000)
+            for homework_id in range(homeworks):
+                checkpoint.save_homework(
+                    str(key), homework_id, ('approved', '2022-01-01')
+                )
+        checkpoint.close()
+
+        started = time.perf_counter()
+        checkpoint = Checkpoint(path)
+        checkpoint.load()
+        startup = time.perf_counter() - started
+
+        for key in range(subscriptions):
+            checkpoint.save_cursor(str(key), 2000)
+        checkpoint.save_homework('0', 0, ('reviewing', '2022-01-02'))
+        started = time.perf_counter()
+        rows = checkpoint.flush(force=True)
+        cycle = time.perf_counter() - started
+        checkpoint.close()
+
+    print(json.dumps({
+        'subscriptions': subscriptions,
+        'homeworks_per_subscription': homeworks,
+        'startup_ms': round(startup * 1000, 2),
+        'cycle_flush_rows': rows,
+        'cycle_flush_ms': round(cycle * 1000, 2),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Запись истории статусов пачками по циклу опроса и время запросов
+к ней на большом числе строк.
+
+    python benchmarks/bench_history.py [переходов] [переходов за цикл]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history import HistoryStore  # noqa: E402
+
+STATUSES = ('reviewing', 'rejected', 'reviewing', 'approved')
+HOMEWORKS = 10
+DAY = 24 * 3600
+
+
+def iso(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime(
+        '%Y-%m-%dT%H:%M:%SZ'
+    )
+
+
+def transitions(total: int):
+    """Переходы: у каждой работы четыре статуса, работы раз в час."""
+    started = 1_600_000_000
+    per_subscription = HOMEWORKS * len(STATUSES)
+    for index in range(total // per_subscription):
+        for homework_id in range(HOMEWORKS):
+            updated = started + (index * HOMEWORKS + homework_id) * 60
+            for step, status in enumerate(STATUSES):
+                updated += 3600 * (step + 1)
+                yield f'sub{index}', index, {
+                    'id': homework_id,
+                    'homework_name': f'hw{homework_id}.zip',
+                    'lesson_name': f'Спринт {homework_id}',
+                    'status': status,
+                    'reviewer_comment': '',
+                    'date_updated': iso(updated),
+                }
+
+
+def timed(function, *args, repeats: int = 5):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        result = function(*args)
+    return result, round((time.perf_counter() - started) / repeats * 1000, 2)
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    batch = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = HistoryStore(os.path.join(directory, 'history.db'))
+        flushes = []
+        rows = 0
+        for key, chat_id, homework in transitions(total):
+            store.record(key, chat_id, homework)
+            if len(store) >= batch:
+                started = time.perf_counter()
+                rows += store.flush()
+                flushes.append(time.perf_counter() - started)
+        rows += store.flush()
+
+        since = 1_600_000_000 + 30 * DAY
+        durations, durations_ms = timed(
+            store.review_durations, since, since + DAY
+        )
+        _, latency_ms = timed(store.review_latency, since, since + 7 * DAY)
+        _, homework_ms = timed(store.homework, 'sub1000', 3, repeats=100)
+        _, recent_ms = timed(store.recent, 1000, 10, repeats=100)
+        store.close()
+
+    print(json.dumps({
+        'rows': rows,
+        'rows_per_cycle': batch,
+        'cycle_flush_ms': round(
+            sorted(flushes)[len(flushes) // 2] * 1000, 2
+        ) if flushes else None,
+        'rows_per_second': round(rows / sum(flushes)) if flushes else None,
+        'review_durations_day_ms': durations_ms,
+        'review_durations_day_rows': len(durations),
+        'review_latency_week_ms': latency_ms,
+        'homework_ms': homework_ms,
+        'recent_ms': recent_ms,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Время холодного импорта модулей бота по python -X importtime.
+Каждый замер - отдельный процесс интерпретатора, берётся медиана.
+Если медиана больше бюджета, скрипт завершается с кодом 1.
+
+    python benchmarks/bench_import.py [повторов] [--budget homework=150]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BUDGETS_MS = {
+    'homework': 150,
+    'engine': 200,
+    'supervisor': 200,
+}
+HEAVY_MODULES = ('telegram', 'requests', 'asyncio', 'http.server')
+
+
+def import_times(module: str) -> dict:
+    """Время импорта module и всех его зависимостей в микросекундах."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, cumulative, name = line.split(':', 1)[1].split('|')
+        times[name.strip()] = (int(self_time), int(cumulative))
+    return times
+
+
+def measure(module: str, repeats: int) -> dict:
+    runs = [import_times(module) for _ in range(repeats)]
+    cumulative = [times[module][1] for times in runs]
+    slowest = sorted(
+        runs[-1].items(), key=lambda item: item[1][0], reverse=True
+    )[:10]
+    return {
+        'median_ms': round(statistics.median(cumulative) / 1000, 1),
+        'min_ms': round(min(cumulative) / 1000, 1),
+        'heavy_loaded': [name for name in HEAVY_MODULES if name in runs[-1]],
+        'slowest_self_ms': {
+            name: round(self_time / 1000, 1)
+            for name, (self_time, _) in slowest
+        },
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('repeats', type=int, nargs='?', default=10)
+    parser.add_argument('--budget', action='append', default=[],
+                        help='модуль=мс, переопределяет бюджет')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    budgets = dict(BUDGETS_MS)
+    for item in args.budget:
+        module, value = item.split('=')
+        budgets[module] = float(value)
+    report = {}
+    over = []
+    for module, budget in budgets.items():
+        report[module] = measure(module, args.repeats)
+        report[module]['budget_ms'] = budget
+        if report[module]['median_ms'] > budget:
+            over.append(module)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if over:
+        print(f'Превышен бюджет импорта: {", ".join(over)}', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Время цикла опроса с логами уровня DEBUG: обработчики в потоке опроса
+против очереди с QueueListener, текстовый формат против JSON.
+
+Опрос - request_api_answer с ответом из памяти, check_response
+и parse_status для каждой работы. Лог пишется в RotatingFileHandler
+с маленьким maxBytes, чтобы ротация тоже попала в замер, и в поток
+вывода, направленный в /dev/null.
+
+    python benchmarks/bench_logging.py [число опросов] [работ в ответе]
+"""
+import copy
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import homework  # noqa: E402
+from config_log import LOGGER_CONFIG  # noqa: E402
+from log_pipeline import setup_logging  # noqa: E402
+
+
+class MemoryResponse:
+    status_code = 200
+
+    def __init__(self, payload: dict):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+class MemorySession:
+
+    def __init__(self, payload: dict):
+        self.response = MemoryResponse(payload)
+
+    def get(self, *args, **kwargs):
+        return self.response
+
+
+def make_config(directory: str, stream) -> dict:
+    config = copy.deepcopy(LOGGER_CONFIG)
+    config['handlers']['file'].update(
+        filename=os.path.join(directory, 'log.log'),
+        level='DEBUG', maxBytes=1000000, backupCount=2
+    )
+    config['handlers']['std']['stream'] = stream
+    return config
+
+
+def run(polls: int, homeworks: int, queued: bool, log_format: str) -> dict:
+    payload = {
+        'homeworks': [
+            {
+                'id': number,
+                'homework_name': f'hw{number}.zip',
+                'status': 'approved',
+                'reviewer_comment': 'ok',
+            }
+            for number in range(homeworks)
+        ],
+        'current_date': 0,
+    }
+    session = MemorySession(payload)
+    with tempfile.TemporaryDirectory() as directory, \
+            open(os.devnull, 'w') as stream:
+        listener = setup_logging(
+            make_config(directory, stream), queued, log_format
+        )
+        started = time.perf_counter()
+        for _ in range(polls):
+            response = homework.request_api_answer(
+                0, homework.HEADERS, session
+            )
+            for item in homework.check_response(response):
+                homework.parse_status(item)
+        elapsed = time.perf_counter() - started
+        if listener is not None:
+            listener.stop()
+        drained = time.perf_counter() - started
+    return {
+        'poll_us': round(elapsed / polls * 1e6, 2),
+        'drained_s': round(drained, 3),
+    }
+
+
+def main():
+    polls = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    homeworks = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    result = {'polls': polls, 'homeworks': homeworks}
+    for queued in (False, True):
+        for log_format in ('text', 'json'):
+            mode = f'{"queue" if queued else "sync"}_{log_format}'
+            result[mode] = run(polls, homeworks, queued, log_format)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
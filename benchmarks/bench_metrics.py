@@ -0,0 +1,72 @@
+"""
+Стоимость метрик относительно одного опроса.
+
+Опрос - запрос к локальной заглушке практикума через сессию, проверка
+ответа и разбор статусов. Метрики на опрос - наблюдение длительности
+запроса к API, отметка успешного опроса и длительность отправки
+в телеграм на каждую изменившуюся работу (здесь одна).
+
+    python benchmarks/bench_metrics.py [число опросов]
+"""
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import homework  # noqa: E402
+import metrics  # noqa: E402
+from http_session import create_session  # noqa: E402
+from stub_server import PracticumStub  # noqa: E402
+
+
+def poll_time(polls: int) -> float:
+    server = PracticumStub(homeworks=5).start()
+    homework.ENDPOINT = server.url
+    session = create_session()
+    try:
+        started = time.perf_counter()
+        for _ in range(polls):
+            response = homework.request_api_answer(
+                0, homework.HEADERS, session
+            )
+            for item in homework.check_response(response):
+                homework.parse_status(item)
+        return (time.perf_counter() - started) / polls
+    finally:
+        server.stop()
+
+
+def instrumentation_time(polls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(polls):
+        started_request = time.perf_counter()
+        metrics.API_LATENCY.observe(time.perf_counter() - started_request)
+        metrics.mark_success()
+        started_send = time.perf_counter()
+        metrics.TELEGRAM_LATENCY.observe(time.perf_counter() - started_send)
+    return (time.perf_counter() - started) / polls
+
+
+def main():
+    logging.getLogger('bot_logger').setLevel(logging.WARNING)
+    polls = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    poll = poll_time(polls)
+    instrumentation = instrumentation_time(polls * 10)
+    started = time.perf_counter()
+    body = metrics.REGISTRY.render()
+    scrape = time.perf_counter() - started
+    print(json.dumps({
+        'polls': polls,
+        'poll_us': round(poll * 1e6, 1),
+        'metrics_per_poll_us': round(instrumentation * 1e6, 3),
+        'overhead_percent': round(instrumentation / poll * 100, 3),
+        'scrape_ms': round(scrape * 1000, 3),
+        'scrape_bytes': len(body),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
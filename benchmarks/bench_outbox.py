@@ -0,0 +1,70 @@
+"""
+Задержка доставки при всплеске уведомлений через очередь Outbox.
+Фейковый бот отвечает с задержкой, как API телеграм.
+
+    python benchmarks/bench_outbox.py [уведомлений] [чатов] [задержка, мс]
+"""
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from outbox import Outbox  # noqa: E402
+
+
+class FakeBot:
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def send(self, chat_id, text):
+        time.sleep(self.latency)
+        with self.lock:
+            self.calls += 1
+
+
+def main():
+    logging.getLogger('bot_logger').setLevel(logging.WARNING)
+    notifications = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    chats = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    latency = (float(sys.argv[3]) if len(sys.argv) > 3 else 50) / 1000
+
+    bot = FakeBot(latency)
+    outbox = Outbox(bot.send).start()
+    latencies = []
+
+    def on_done(queued_at):
+        def done(delivered):
+            latencies.append(time.monotonic() - queued_at)
+        return done
+
+    started = time.monotonic()
+    for number in range(notifications):
+        outbox.put(
+            number % chats, f'message {number}', on_done(time.monotonic())
+        )
+    enqueue = time.monotonic() - started
+    outbox.stop()
+    total = time.monotonic() - started
+
+    latencies.sort()
+    print(json.dumps({
+        'notifications': notifications,
+        'chats': chats,
+        'telegram_calls': bot.calls,
+        'enqueue_ms': round(enqueue * 1000, 2),
+        'total_s': round(total, 3),
+        'latency_p50_s': round(statistics.median(latencies), 3),
+        'latency_p99_s': round(latencies[int(len(latencies) * 0.99) - 1], 3),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+parse_status на синтетических работах: прежняя реализация
+с f-строками в логах против шаблонов с кэшем.
+
+    python benchmarks/bench_parse_status.py [число работ]
+"""
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import homework  # noqa: E402
+
+_logger = logging.getLogger('bot_logger')
+
+
+def legacy_parse_status(homework_item: dict) -> str:
+    """parse_status до перехода на шаблоны, для сравнения."""
+    if 'homework_name' not in homework_item:
+        raise KeyError('Не удалось спарсить имя домашней работы')
+    homework_name = homework_item['homework_name'].split('.')[0]
+    _logger.debug(f'Название домашней работы - {homework_name}')
+    if 'status' not in homework_item:
+        raise KeyError('Не удалось спарсить статус домашней работы')
+    homework_status = homework_item['status']
+    _logger.debug(f'Статус домашней работы - {homework_status}')
+    if 'reviewer_comment' not in homework_item:
+        raise KeyError('Не удалось спарсить комментарий ревьюера')
+    reviewer_comment = (f" Комментарий от ревьюера: "
+                        f"{homework_item['reviewer_comment']}")
+    _logger.debug(reviewer_comment)
+    if homework_status not in homework.VERDICTS_REVIEWER:
+        raise KeyError(
+            f'Получен неизвестный статус домашней работы - {homework_status}'
+        )
+    verdict = homework.VERDICTS_REVIEWER[homework_status]
+    _logger.debug(f'Вердикт - {verdict}')
+    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
+
+
+def measure(function, homeworks: list) -> float:
+    started = time.perf_counter()
+    for item in homeworks:
+        function(item)
+    return time.perf_counter() - started
+
+
+def main():
+    _logger.setLevel(logging.INFO)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    statuses = list(homework.VERDICTS_REVIEWER)
+    homeworks = [
+        {
+            'id': number,
+            'homework_name': f'hw{number % 20:02d}_sprint.zip',
+            'status': random.choice(statuses),
+            'reviewer_comment': 'Отличная работа',
+        }
+        for number in range(count)
+    ]
+    legacy = measure(legacy_parse_status, homeworks)
+    current = measure(homework.parse_status, homeworks)
+    print(json.dumps({
+        'homeworks': count,
+        'legacy_s': round(legacy, 3),
+        'templates_s': round(current, 3),
+        'speedup': round(legacy / current, 2),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+"""
+Нагрузочный прогон движка опроса против локальных заглушек
+API практикума и Bot API телеграм.
+
+Заглушки работают в отдельных процессах, поэтому CPU и RSS в отчёте
+относятся только к процессу бота. Каждый цикл опрашивает все подписки
+(расписание PollScheduler для замера отключено), после последнего цикла
+бенчмарк ждёт доставки всех сообщений. С --processes N подписки
+раскладываются по N процессам консистентным хэшированием chat_id,
+как у supervisor.py, polls_per_s считается по всем процессам.
+
+    python benchmarks/bench_polling.py --subscriptions 5000 --cycles 3 \\
+        --api-latency 0.05 --error-rate 0.01 --change-rate 0.1 \\
+        --output bench_output.json
+
+Отчёт - JSON: polls_per_s, sends_per_s, cpu_ms_per_poll, max_rss_mb,
+poll_latency_p50_ms, poll_latency_p99_ms и исходные параметры.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.request import urlopen
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import telegram  # noqa: E402
+from telegram.utils.request import Request  # noqa: E402
+
+import homework  # noqa: E402
+from engine import PollingEngine  # noqa: E402
+from http_session import create_session  # noqa: E402
+from outbox import Outbox  # noqa: E402
+from stub_server import PracticumStub, TelegramStub, serve  # noqa: E402
+from subscriptions import Subscription  # noqa: E402
+from supervisor import HashRing, shard  # noqa: E402
+
+
+class TimedEngine(PollingEngine):
+    """Движок, замеряющий длительность каждого опроса."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies = []
+        self.lock = threading.Lock()
+
+    def poll(self, subscription):
+        started = time.perf_counter()
+        super().poll(subscription)
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.latencies.append(elapsed)
+
+
+def start_stub(stub_class, options: dict):
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(
+        target=serve, args=(stub_class, child, options), daemon=True
+    )
+    process.start()
+    return process, parent, parent.recv()
+
+
+def fetch_stats(url: str) -> dict:
+    base = url.split('/', 3)
+    with urlopen(f'{base[0]}//{base[2]}/stats') as response:
+        return json.load(response)
+
+
+def percentile(values: list, fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def cpu_time() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=__doc__.split('\n\n')[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--subscriptions', type=int, default=1000)
+    parser.add_argument('--cycles', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--api-latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--homeworks', type=int, default=1)
+    parser.add_argument('--change-rate', type=float, default=0.1)
+    parser.add_argument('--telegram-latency', type=float, default=0.0)
+    parser.add_argument('--telegram-rate', type=float, default=1000)
+    parser.add_argument('--chat-interval', type=float, default=0.0)
+    parser.add_argument('--processes', type=int, default=1,
+                        help='шардировать подписки по N процессам')
+    parser.add_argument('--etag', action='store_true',
+                        help='заглушка отдаёт ETag и 304')
+    parser.add_argument('--output', help='файл для JSON отчёта')
+    return parser.parse_args()
+
+
+def poll_shard(args, subscriptions: list, practicum_url: str,
+               telegram_url: str) -> dict:
+    """Опрашивает свою часть подписок; в --processes N - в своём процессе."""
+    logging.getLogger('bot_logger').setLevel(logging.CRITICAL)
+    homework.ENDPOINT = practicum_url
+    bot = telegram.Bot(
+        token='123:stub', base_url=telegram_url,
+        request=Request(con_pool_size=8)
+    )
+    outbox = Outbox(
+        partial(homework.send_message_to_chat, bot),
+        chat_interval=args.chat_interval, global_rate=args.telegram_rate,
+        workers=8
+    ).start()
+    engine = TimedEngine(
+        subscriptions, bot, max_workers=args.workers,
+        session=create_session(pool_size=args.workers), outbox=outbox
+    )
+
+    cpu_started = cpu_time()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.workers) as executor:
+        for _ in range(args.cycles):
+            for state in engine.states.values():
+                state.next_poll = 0
+            engine.run_cycle(executor)
+    polling = time.perf_counter() - started
+    outbox.stop()
+    return {
+        'latencies': engine.latencies,
+        'polling': polling,
+        'cpu': cpu_time() - cpu_started,
+        'cache': engine.response_cache.take_stats()
+        if engine.response_cache is not None else None,
+        'max_rss_mb': round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+        ),
+    }
+
+
+def run(args) -> dict:
+    practicum, practicum_pipe, practicum_url = start_stub(PracticumStub, {
+        'latency': args.api_latency,
+        'homeworks': args.homeworks,
+        'error_rate': args.error_rate,
+        'change_rate': args.change_rate,
+        'etag': args.etag,
+    })
+    telegram_stub, telegram_pipe, telegram_url = start_stub(
+        TelegramStub, {'latency': args.telegram_latency}
+    )
+    subscriptions = [
+        Subscription(f'token{number}', str(number))
+        for number in range(args.subscriptions)
+    ]
+
+    started = time.perf_counter()
+    if args.processes > 1:
+        shards = shard(subscriptions, HashRing(range(args.processes)))
+        with multiprocessing.Pool(args.processes) as pool:
+            results = pool.starmap(poll_shard, [
+                (args, shard_subscriptions, practicum_url, telegram_url)
+                for shard_subscriptions in shards.values()
+            ])
+    else:
+        results = [
+            poll_shard(args, subscriptions, practicum_url, telegram_url)
+        ]
+    elapsed = time.perf_counter() - started
+    polling = max(result['polling'] for result in results)
+    cpu = sum(result['cpu'] for result in results)
+    latencies = [
+        latency for result in results for latency in result['latencies']
+    ]
+    caches = [result['cache'] for result in results if result['cache']]
+
+    telegram_stats = fetch_stats(telegram_url)
+    practicum_stats = fetch_stats(practicum_url)
+    for pipe in (practicum_pipe, telegram_pipe):
+        pipe.send('stop')
+    for process in (practicum, telegram_stub):
+        process.join(5)
+
+    polls = len(latencies)
+    sends = telegram_stats.get('sendMessage', 0)
+    return {
+        'subscriptions': args.subscriptions,
+        'cycles': args.cycles,
+        'workers': args.workers,
+        'processes': args.processes,
+        'shard_sizes': [len(result['latencies']) // args.cycles
+                        for result in results],
+        'api_latency_s': args.api_latency,
+        'error_rate': args.error_rate,
+        'homeworks_per_response': args.homeworks,
+        'change_rate': args.change_rate,
+        'polls': polls,
+        'sends': sends,
+        'api_errors': practicum_stats.get('errors', 0),
+        'api_connections': practicum_stats.get('connections', 0),
+        'api_not_modified': practicum_stats.get('not_modified', 0),
+        'api_bytes': practicum_stats.get('bytes', 0),
+        'response_cache': caches[0] if len(caches) == 1 else caches or None,
+        'polling_s': round(polling, 3),
+        'total_s': round(elapsed, 3),
+        'polls_per_s': round(polls / polling, 1),
+        'sends_per_s': round(sends / elapsed, 1),
+        'cpu_ms_per_poll': round(cpu / polls * 1000, 3),
+        'max_rss_mb': max(result['max_rss_mb'] for result in results),
+        'poll_latency_p50_ms': round(
+            percentile(latencies, 0.5) * 1000, 2
+        ),
+        'poll_latency_p99_ms': round(
+            percentile(latencies, 0.99) * 1000, 2
+        ),
+    }
+
+
+def main():
+    args = parse_args()
+    logging.getLogger('bot_logger').setLevel(logging.CRITICAL)
+    report = json.dumps(run(args), indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf8') as file:
+            file.write(report)
+
+
+if __name__ == '__main__':
+    main()
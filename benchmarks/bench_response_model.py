@@ -0,0 +1,103 @@
+"""
+Разбор и проверка ответа API на 1..10000 работ: json.loads
+или decode_response (orjson, если установлен) вместе с check_response,
+которая проверяет только верхний уровень, и с parse_homeworks, которая
+проверяет каждую работу и собирает записи Homework, как опрос.
+
+    python benchmarks/bench_response_model.py [повторов на размер]
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import homework  # noqa: E402
+import models  # noqa: E402
+
+SIZES = (1, 10, 100, 1000, 10000)
+STATUSES = ('reviewing', 'rejected', 'approved')
+
+
+def make_body(count: int) -> bytes:
+    return json.dumps({
+        'homeworks': [
+            {
+                'id': number,
+                'homework_name': f'student_{number}__hw{number % 20}.zip',
+                'status': STATUSES[number % len(STATUSES)],
+                'reviewer_comment': 'Всё хорошо, но можно лучше.',
+                'date_updated': '2022-01-01T00:00:00Z',
+                'lesson_name': 'Итоговый проект',
+            }
+            for number in range(count)
+        ],
+        'current_date': 1640995200,
+    }, ensure_ascii=False).encode()
+
+
+def measure(function, body: bytes, repeats: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeats):
+        function(body)
+    return (time.perf_counter() - started) / repeats
+
+
+class Response:
+    """Ответ requests: тело в байтах и разбор через json."""
+
+    def __init__(self, body: bytes):
+        self.content = body
+
+    def json(self):
+        return json.loads(self.content)
+
+
+def legacy(body: bytes):
+    return homework.check_response(json.loads(body))
+
+
+def fast_check_response(body: bytes):
+    return homework.check_response(models.decode_response(Response(body)))
+
+
+def typed_json(body: bytes):
+    return models.parse_homeworks(
+        homework.check_response(json.loads(body)), homework.VERDICTS_REVIEWER
+    )
+
+
+def typed_fast(body: bytes):
+    return models.parse_homeworks(
+        homework.check_response(models.decode_response(Response(body))),
+        homework.VERDICTS_REVIEWER
+    )
+
+
+def main():
+    budget = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    result = {'orjson': models.orjson is not None, 'sizes': {}}
+    for size in SIZES:
+        body = make_body(size)
+        repeats = max(3, budget // size)
+        result['sizes'][size] = {
+            'bytes': len(body),
+            'json_check_response_us': round(
+                measure(legacy, body, repeats) * 1e6, 1
+            ),
+            'decode_check_response_us': round(
+                measure(fast_check_response, body, repeats) * 1e6, 1
+            ),
+            'json_parse_homeworks_us': round(
+                measure(typed_json, body, repeats) * 1e6, 1
+            ),
+            'decode_parse_homeworks_us': round(
+                measure(typed_fast, body, repeats) * 1e6, 1
+            ),
+        }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
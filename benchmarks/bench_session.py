@@ -0,0 +1,47 @@
+"""
+Сравнение опроса через requests.get и через пул соединений сессии.
+
+    python benchmarks/bench_session.py [число запросов]
+"""
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import homework  # noqa: E402
+from http_session import create_session  # noqa: E402
+from stub_server import PracticumStub  # noqa: E402
+
+
+def run(polls: int, session) -> dict:
+    server = PracticumStub().start()
+    homework.ENDPOINT = server.url
+    try:
+        started = time.perf_counter()
+        for _ in range(polls):
+            homework.request_api_answer(0, homework.HEADERS, session)
+        elapsed = time.perf_counter() - started
+    finally:
+        server.stop()
+    return {
+        'polls': polls,
+        'connections_per_poll': server.connections / polls,
+        'latency_ms': elapsed / polls * 1000,
+    }
+
+
+def main():
+    logging.getLogger('bot_logger').setLevel(logging.WARNING)
+    polls = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    result = {
+        'requests.get': run(polls, None),
+        'session': run(polls, create_session()),
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+Память на одну подписку после нескольких циклов опроса движка:
+подписка, состояние опроса (трекер, расписание, кэш ответов)
+и кэш статусов для команд бота. Считается tracemalloc.
+
+    python benchmarks/bench_state_size.py [подписок] [работ] [--unique-names]
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import sys
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import homework  # noqa: E402
+from commands import StatusCache  # noqa: E402
+from engine import PollingEngine  # noqa: E402
+from response_cache import ResponseCache  # noqa: E402
+from subscriptions import Subscription  # noqa: E402
+
+STATUSES = ('reviewing', 'rejected', 'approved')
+COMMENT = 'Хорошая работа, но есть пара замечаний по стилю кода.'
+CYCLES = 4
+
+
+class Response:
+
+    status_code = 200
+    headers = {}
+
+    def __init__(self, body: bytes):
+        self.content = body
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class Session:
+    """Ответ API для токена token<номер>: в каждом цикле статусы новые."""
+
+    def __init__(self, homeworks: int, unique_names: bool):
+        self.homeworks = homeworks
+        self.unique_names = unique_names
+        self.cycle = 0
+
+    def name(self, account: int, index: int) -> str:
+        prefix = f'student{account}__' if self.unique_names else ''
+        return f'{prefix}hw{index:02d}_project.zip'
+
+    def get(self, url, headers=None, params=None, **kwargs):
+        account = int(headers['Authorization'].split('token')[1])
+        cycle = self.cycle
+        return Response(json.dumps({
+            'homeworks': [
+                {
+                    'id': 1_000_000 + account * self.homeworks + index,
+                    'homework_name': self.name(account, index),
+                    'lesson_name': f'Спринт {index}',
+                    'status': STATUSES[(index + cycle) % len(STATUSES)],
+                    'reviewer_comment': COMMENT if index % 3 else '',
+                    'date_updated': f'2022-01-{1 + index:02d}T'
+                                    f'{cycle % 24:02d}:00:00Z',
+                }
+                for index in range(self.homeworks)
+            ],
+            'current_date': 1_650_000_000 + cycle,
+        }).encode())
+
+
+class Outbox:
+
+    def put(self, destination, message, on_done=None, key=None):
+        pass
+
+    def __len__(self):
+        return 0
+
+
+def traced() -> int:
+    gc.collect()
+    homework.RENDERER.render.cache_clear()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def measure(count: int, homeworks: int, unique_names: bool) -> dict:
+    tracemalloc.start()
+    started = traced()
+    subscriptions = [
+        Subscription(f'token{index}', str(index)) for index in range(count)
+    ]
+    configured = traced()
+    session = Session(homeworks, unique_names)
+    status_cache = StatusCache()
+    engine = PollingEngine(
+        subscriptions, None, max_workers=1, session=session, outbox=Outbox(),
+        status_cache=status_cache, response_cache=ResponseCache()
+    )
+    with ThreadPoolExecutor(1) as executor:
+        for cycle in range(CYCLES):
+            session.cycle = cycle
+            for state in engine.states.values():
+                state.next_poll = 0
+            engine.run_cycle(executor)
+    polled = traced()
+    status_cache._chats.clear()
+    without_commands = traced()
+    tracemalloc.stop()
+    assert all(len(state.tracker) == homeworks
+               for state in engine.states.values())
+    return {
+        'subscription': (configured - started) / count,
+        'state': (without_commands - configured) / count,
+        'commands': (polled - without_commands) / count,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('subscriptions', type=int, nargs='?', default=2000)
+    parser.add_argument('homeworks', type=int, nargs='?', default=10)
+    parser.add_argument('--unique-names', action='store_true',
+                        help='имя работы своё у каждого студента')
+    args = parser.parse_args()
+    logging.getLogger('bot_logger').disabled = True
+
+    sizes = measure(args.subscriptions, args.homeworks, args.unique_names)
+    print(json.dumps({
+        'subscriptions': args.subscriptions,
+        'homeworks_per_subscription': args.homeworks,
+        'unique_homework_names': args.unique_names,
+        'subscription_bytes': round(sizes['subscription']),
+        'state_bytes_per_subscription': round(sizes['state']),
+        'commands_bytes_per_chat': round(sizes['commands']),
+        'total_bytes_per_subscription': round(sum(sizes.values())),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+"""
+Локальные заглушки API практикума и Bot API телеграм для бенчмарков.
+
+Практикум отвечает списком из homeworks работ с задержкой latency,
+с вероятностью error_rate возвращает 500, с вероятностью change_rate
+меняет статус работы аккаунта, с etag отдаёт ETag и отвечает 304
+на If-None-Match. Телеграм принимает sendMessage и
+getUpdates. Обе заглушки считают соединения и запросы, счётчики
+доступны по GET /stats.
+
+    python benchmarks/stub_server.py practicum --latency 0.05
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+
+STATUSES = ('reviewing', 'rejected', 'approved')
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Общая часть обработчиков: keep-alive, JSON ответы, /stats."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def send_json(self, data, status: int = 200):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_stats(self) -> bool:
+        if self.path != '/stats':
+            return False
+        self.send_json(self.server.stats())
+        return True
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PracticumHandler(StubHandler):
+    """Отвечает на GET списком домашних работ аккаунта."""
+
+    def do_GET(self):
+        if self.send_stats():
+            return
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        server.count('requests')
+        if server.error_rate and random.random() < server.error_rate:
+            server.count('errors')
+            self.send_json({'code': 'error'}, 500)
+            return
+        version = server.version(self.headers.get('Authorization', ''))
+        etag = f'"{version}"' if server.etag else None
+        if etag is not None and self.headers.get('If-None-Match') == etag:
+            server.count('not_modified')
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = server.render(version)
+        self.send_response(200)
+        if etag is not None:
+            self.send_header('ETag', etag)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        server.count('bytes', len(body))
+
+
+class TelegramHandler(StubHandler):
+    """Принимает вызовы Bot API: sendMessage, getUpdates, getMe."""
+
+    def do_GET(self):
+        if not self.send_stats():
+            self.handle_method()
+
+    def do_POST(self):
+        self.handle_method()
+
+    def handle_method(self):
+        server = self.server
+        length = int(self.headers.get('Content-Length') or 0)
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        if server.latency:
+            time.sleep(server.latency)
+        method = self.path.rsplit('/', 1)[-1]
+        server.count(method)
+        if method == 'sendMessage':
+            result = {
+                'message_id': next(server.message_ids),
+                'date': int(time.time()),
+                'chat': {'id': int(payload.get('chat_id', 0)),
+                         'type': 'private'},
+                'text': payload.get('text', ''),
+            }
+        elif method == 'getUpdates':
+            result = []
+        else:
+            result = {'id': 1, 'is_bot': True, 'first_name': 'stub',
+                      'username': 'stub_bot'}
+        self.send_json({'ok': True, 'result': result})
+
+
+class StubServer(ThreadingHTTPServer):
+    """HTTP сервер, считающий принятые соединения и запросы."""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, handler, latency: float = 0.0):
+        super().__init__(('127.0.0.1', 0), handler)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.counters = {'connections': 0}
+
+    def count(self, name: str, value: int = 1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def stats(self) -> dict:
+        with self.lock:
+            return dict(self.counters)
+
+    @property
+    def connections(self) -> int:
+        return self.counters['connections']
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address
+        return f'http://{host}:{port}'
+
+    def process_request(self, request, client_address):
+        self.count('connections')
+        super().process_request(request, client_address)
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class PracticumStub(StubServer):
+    """Заглушка API практикума."""
+
+    def __init__(self, latency: float = 0.0, homeworks: int = 1,
+                 error_rate: float = 0.0, change_rate: float = 0.0,
+                 etag: bool = False):
+        super().__init__(PracticumHandler, latency)
+        self.homeworks = homeworks
+        self.error_rate = error_rate
+        self.change_rate = change_rate
+        self.etag = etag
+        self.versions = {}
+
+    @property
+    def url(self) -> str:
+        return f'{self.base_url}/api/user_api/homework_statuses/'
+
+    def version(self, token: str) -> int:
+        """Версия работ аккаунта token, с change_rate растёт."""
+        with self.lock:
+            version = self.versions.get(token, 0)
+            if self.change_rate and random.random() < self.change_rate:
+                version += 1
+                self.versions[token] = version
+        return version
+
+    @lru_cache(maxsize=256)
+    def render(self, version: int) -> bytes:
+        return json.dumps({
+            'homeworks': [
+                {
+                    'id': number,
+                    'homework_name': f'hw{number}.zip',
+                    'status': STATUSES[(version + number) % len(STATUSES)],
+                    'reviewer_comment': 'ok',
+                    'date_updated': f'2022-01-01T00:00:{version % 60:02d}Z',
+                    'lesson_name': 'Итоговый проект',
+                }
+                for number in range(self.homeworks)
+            ],
+            'current_date': int(time.time()),
+        }).encode()
+
+
+class TelegramStub(StubServer):
+    """Заглушка Bot API телеграм."""
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__(TelegramHandler, latency)
+        self.message_ids = count(1)
+
+    @property
+    def url(self) -> str:
+        return f'{self.base_url}/bot'
+
+
+def serve(stub_class, connection, options: dict):
+    """
+    Запуск заглушки в отдельном процессе, чтобы её CPU не попадал
+    в замеры бота. Адрес отправляется в connection, любое сообщение
+    из connection останавливает заглушку.
+    """
+    stub = stub_class(**options).start()
+    connection.send(stub.url)
+    connection.recv()
+    stub.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('service', choices=('practicum', 'telegram'))
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--homeworks', type=int, default=1)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--change-rate', type=float, default=0.0)
+    parser.add_argument('--etag', action='store_true')
+    args = parser.parse_args()
+    if args.service == 'practicum':
+        stub = PracticumStub(
+            args.latency, args.homeworks, args.error_rate, args.change_rate,
+            args.etag
+        )
+    else:
+        stub = TelegramStub(args.latency)
+    print(stub.url, flush=True)
+    stub.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
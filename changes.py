@@ -0,0 +1,303 @@
+import threading
+from array import array
+from bisect import bisect_left
+
+from leader import delivery_key
+
+_delivery_lock = threading.Lock()
+
+INT64 = (-2 ** 63, 2 ** 63 - 1)
+
+
+def homework_key(homework: dict):
+    """Ключ домашней работы: id, а для ответов без id - имя работы."""
+    return homework.get('id', homework.get('homework_name'))
+
+
+def homework_version(homework: dict) -> tuple:
+    """Версия домашней работы: статус и время последнего обновления."""
+    return homework.get('status'), homework.get('date_updated')
+
+
+def version_digest(version: tuple) -> int:
+    """
+    Отпечаток версии работы: одно 8-байтовое число вместо кортежа
+    из двух строк. Живёт только в памяти процесса, в checkpoint
+    сохраняется сама версия.
+    """
+    return hash(version)
+
+
+class VersionTable:
+    """
+    Отпечатки версий работ одной подписки в одной колонке array:
+    сначала id работ по возрастанию, за ними отпечатки в том же порядке,
+    16 байт на работу вместо записи словаря с кортежем (статус, дата).
+    Поиск по id двоичный, колонка пересобирается только при появлении
+    новой работы и не держит запаса под рост.
+    Работы без числового id (ключ - имя работы) лежат в словаре others.
+    Читается как словарь: get, [], keys, items.
+    """
+
+    __slots__ = ('table', 'others')
+
+    def __init__(self, digests: dict = None):
+        self.others = None
+        numeric = []
+        for key, digest in (digests or {}).items():
+            if self._numeric(key):
+                numeric.append((key, digest))
+            else:
+                self[key] = digest
+        numeric.sort()
+        self.table = array('q', [key for key, _ in numeric])
+        self.table.extend(digest for _, digest in numeric)
+
+    @staticmethod
+    def _numeric(key) -> bool:
+        return isinstance(key, int) and INT64[0] <= key <= INT64[1]
+
+    def __len__(self):
+        return len(self.table) // 2 + len(self.others or ())
+
+    def _find(self, key) -> tuple:
+        """Число работ с числовым id и позиция key среди них."""
+        table = self.table
+        count = len(table) // 2
+        return count, bisect_left(table, key, 0, count)
+
+    def get(self, key, default=None):
+        """Отпечаток версии работы key или default."""
+        if isinstance(key, int):
+            count, index = self._find(key)
+            if index < count and self.table[index] == key:
+                return self.table[count + index]
+        if self.others is None:
+            return default
+        return self.others.get(key, default)
+
+    def __getitem__(self, key):
+        digest = self.get(key)
+        if digest is None:
+            raise KeyError(key)
+        return digest
+
+    def __setitem__(self, key, digest: int):
+        if not self._numeric(key):
+            if self.others is None:
+                self.others = {}
+            self.others[key] = digest
+            return
+        table = self.table
+        count, index = self._find(key)
+        if index < count and table[index] == key:
+            table[count + index] = digest
+            return
+        self.table = (
+            table[:index] + array('q', [key]) + table[index:count + index]
+            + array('q', [digest]) + table[count + index:]
+        )
+
+    def pop(self, key, default=None):
+        """Забывает работу key, возвращает её отпечаток или default."""
+        if self._numeric(key):
+            table = self.table
+            count, index = self._find(key)
+            if index < count and table[index] == key:
+                digest = table[count + index]
+                self.table = (
+                    table[:index] + table[index + 1:count + index]
+                    + table[count + index + 1:]
+                )
+                return digest
+        if self.others is None:
+            return default
+        return self.others.pop(key, default)
+
+    def keys(self) -> list:
+        return [*self.table[:len(self.table) // 2], *(self.others or ())]
+
+    def items(self) -> list:
+        count = len(self.table) // 2
+        return [
+            *zip(self.table[:count], self.table[count:]),
+            *(self.others or {}).items(),
+        ]
+
+
+class ChangeTracker:
+    """
+    Запоминает последнюю известную версию каждой домашней работы.
+    Изменением считается новая пара (status, date_updated) для id работы,
+    проверка каждой работы стоит одного поиска в таблице версий.
+    Версии хранятся отпечатками в VersionTable: 16 байт на работу.
+    Если передан checkpoint, доставленные версии и current_date
+    сохраняются в нём под ключом подписки key. current_date сохраняется
+    только когда все поставленные в очередь уведомления доставлены,
+    иначе после перезапуска недоставленное изменение потерялось бы.
+    Если уведомление не доставлено, версия работы забывается, а опрос
+    возвращается к from_date ответа, в котором пришло изменение:
+    advance отдаёт его вместо нового current_date, в checkpoint
+    курсор дальше него не сохраняется.
+    Если передан deliveries (общий журнал доставок реплик), уже
+    отправленное адресату уведомление не ставится в очередь повторно.
+    """
+
+    __slots__ = ('_seen', 'checkpoint', 'key', 'deliveries', 'undelivered',
+                 '_cursor', '_rewind')
+
+    def __init__(self, seen: dict = None, checkpoint=None, key: str = None,
+                 deliveries=None, cursor: int = None):
+        self._seen = VersionTable({
+            homework_id: version_digest(version)
+            for homework_id, version in (seen or {}).items()
+        })
+        self.checkpoint = checkpoint
+        self.key = key
+        self.deliveries = deliveries
+        self.undelivered = 0
+        self._cursor = cursor
+        self._rewind = None
+
+    def __len__(self):
+        return len(self._seen)
+
+    def changes(self, homeworks: list) -> list:
+        """
+        Возвращает работы, версия которых отличается от запомненной,
+        в порядке обновления.
+        """
+        seen = self._seen
+        changed = [
+            homework for homework in homeworks
+            if seen.get(homework_key(homework)) != version_digest(
+                homework_version(homework)
+            )
+        ]
+        if len(changed) > 1:
+            changed.sort(key=lambda homework: homework.get('date_updated', ''))
+        return changed
+
+    def commit(self, homework: dict):
+        """Запоминает версию работы после доставки уведомления."""
+        homework_id = homework_key(homework)
+        version = homework_version(homework)
+        self._seen[homework_id] = version_digest(version)
+        if self.checkpoint is not None:
+            self.checkpoint.save_homework(self.key, homework_id, version)
+
+    def mark(self, homework: dict, copies: int = 1):
+        """
+        Запоминает версию работы, уведомление о которой поставлено
+        в очередь, чтобы не ставить его повторно. Возвращает обратный вызов
+        для очереди: после доставки версия сохраняется в checkpoint.
+        Если уведомление отправляется copies адресатам, вызов ждёт
+        их всех, версия сохраняется, только если доставлены все копии.
+        Если какая-то копия не доставлена, прежняя версия работы
+        восстанавливается и опрос возвращается к from_date этого ответа.
+        При copies=0 отправлять нечего: версия сохраняется сразу.
+        """
+        if not copies:
+            self.commit(homework)
+            return None
+        homework_id = homework_key(homework)
+        version = homework_version(homework)
+        digest = version_digest(version)
+        previous = self._seen.get(homework_id)
+        self._seen[homework_id] = digest
+        pending = [copies, True]
+        with _delivery_lock:
+            self.undelivered += 1
+            since = self._cursor
+
+        def on_done(delivered: bool):
+            with _delivery_lock:
+                pending[0] -= 1
+                pending[1] = pending[1] and delivered
+                if pending[0]:
+                    return
+            if pending[1] and self.checkpoint is not None:
+                self.checkpoint.save_homework(self.key, homework_id, version)
+            with _delivery_lock:
+                if not pending[1]:
+                    self._forget(homework_id, digest, previous, since)
+                self.undelivered -= 1
+                if not self.undelivered:
+                    self._save_cursor()
+
+        return on_done
+
+    def _delivery_key(self, homework: dict, target) -> str:
+        return delivery_key(
+            self.key, homework_key(homework), homework_version(homework),
+            target
+        )
+
+    def message_key(self, homework: dict, target):
+        """Ключ доставки уведомления адресату или None без журнала."""
+        if self.deliveries is None:
+            return None
+        return self._delivery_key(homework, target)
+
+    def pending_targets(self, homework: dict, targets) -> list:
+        """Адресаты, которым уведомление о версии работы не отправлено."""
+        if self.deliveries is None:
+            return list(targets)
+        return [
+            target for target in targets
+            if not self.deliveries.sent(self._delivery_key(homework, target))
+        ]
+
+    def sent_callback(self, homework: dict, target, on_done):
+        """
+        Обратный вызов доставки одному адресату: записывает ключ
+        в журнал доставок и передаёт результат в on_done.
+        """
+        if self.deliveries is None:
+            return on_done
+        key = self._delivery_key(homework, target)
+
+        def on_sent(delivered: bool):
+            if delivered:
+                self.deliveries.record(key)
+            on_done(delivered)
+
+        return on_sent
+
+    def _forget(self, homework_id, digest: int, previous, since):
+        """
+        Откатывает версию недоставленного уведомления, если её не сменила
+        более новая, и запоминает, откуда повторить опрос.
+        """
+        if self._seen.get(homework_id) == digest:
+            if previous is None:
+                self._seen.pop(homework_id, None)
+            else:
+                self._seen[homework_id] = previous
+        if since is not None:
+            self._rewind = min(since, self._rewind or since)
+
+    def advance(self, current_date: int) -> int:
+        """
+        Запоминает новый current_date подписки и возвращает from_date
+        следующего опроса: current_date или, если уведомление
+        не доставлено, from_date ответа с этим изменением.
+        """
+        with _delivery_lock:
+            if self._rewind is not None:
+                current_date, self._rewind = self._rewind, None
+            self._cursor = current_date
+            if not self.undelivered:
+                self._save_cursor()
+            return current_date
+
+    def _save_cursor(self):
+        cursor = self._cursor
+        if self._rewind is not None:
+            cursor = min(self._rewind, cursor or self._rewind)
+        if self.checkpoint is not None and cursor is not None:
+            self.checkpoint.save_cursor(self.key, cursor)
+
+    def items(self):
+        """Пары (id работы, отпечаток версии)."""
+        return self._seen.items()
@@ -0,0 +1,123 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+_logger = logging.getLogger('bot_logger')
+
+
+CHECKPOINT_FILE = os.getenv('CHECKPOINT_FILE', 'state.db')
+CHECKPOINT_FLUSH_INTERVAL = float(os.getenv('CHECKPOINT_FLUSH_INTERVAL', 5))
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cursors (
+    subscription TEXT PRIMARY KEY,
+    from_date INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS homeworks (
+    subscription TEXT NOT NULL,
+    homework_id,
+    status TEXT,
+    date_updated TEXT,
+    PRIMARY KEY (subscription, homework_id)
+);
+'''
+
+
+class Checkpoint:
+    """
+    Сохраняет состояние опроса между перезапусками в SQLite (режим WAL).
+    Для каждой подписки хранится последний current_date и версии всех
+    известных домашних работ. Изменения копятся в памяти и записываются
+    одной транзакцией не чаще раза в flush_interval секунд.
+    """
+
+    def __init__(self, path: str = CHECKPOINT_FILE,
+                 flush_interval: float = CHECKPOINT_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._cursors = {}
+        self._homeworks = {}
+        self._last_flush = time.monotonic()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.executescript(SCHEMA)
+
+    def load(self) -> dict:
+        """
+        Читает сохранённое состояние.
+        Возвращает {подписка: (current_date, {id работы: (статус, дата)})}.
+        """
+        started = time.perf_counter()
+        state = {}
+        with self._write_lock:
+            for key, current_date in self._connection.execute(
+                'SELECT subscription, from_date FROM cursors'
+            ):
+                state[key] = (current_date, {})
+            rows = self._connection.execute(
+                'SELECT subscription, homework_id, status, date_updated '
+                'FROM homeworks'
+            )
+            for key, homework_id, status, date_updated in rows:
+                state.setdefault(key, (None, {}))[1][homework_id] = (
+                    status, date_updated
+                )
+        _logger.debug(
+            f'Состояние {len(state)} подписок загружено за '
+            f'{(time.perf_counter() - started) * 1000:.1f} мс'
+        )
+        return state
+
+    def save_cursor(self, key: str, current_date: int):
+        """Запоминает current_date подписки до следующей записи."""
+        with self._lock:
+            self._cursors[key] = current_date
+
+    def save_homework(self, key: str, homework_id, version: tuple):
+        """Запоминает версию домашней работы до следующей записи."""
+        with self._lock:
+            self._homeworks[(key, homework_id)] = version
+
+    def flush(self, force: bool = False) -> int:
+        """
+        Записывает накопленные изменения одной транзакцией.
+        Без force запись выполняется не чаще раза в flush_interval.
+        Потоки опроса не ждут записи на диск: накопленное забирается
+        под блокировкой, а пишется уже вне её.
+        Возвращает число записанных строк.
+        """
+        if not force and (
+            time.monotonic() - self._last_flush < self.flush_interval
+        ):
+            return 0
+        with self._lock:
+            cursors, self._cursors = self._cursors, {}
+            homeworks, self._homeworks = self._homeworks, {}
+            self._last_flush = time.monotonic()
+        if not cursors and not homeworks:
+            return 0
+        with self._write_lock, self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO cursors VALUES (?, ?)',
+                cursors.items()
+            )
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO homeworks VALUES (?, ?, ?, ?)',
+                (
+                    (key, homework_id, status, date_updated)
+                    for (key, homework_id), (status, date_updated)
+                    in homeworks.items()
+                )
+            )
+        return len(cursors) + len(homeworks)
+
+    def close(self):
+        """Записывает всё накопленное и закрывает базу."""
+        self.flush(force=True)
+        with self._write_lock:
+            self._connection.close()
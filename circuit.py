@@ -0,0 +1,158 @@
+import logging
+import os
+import threading
+import time
+
+from exceptions import CircuitOpenError
+from metrics import REGISTRY
+
+_logger = logging.getLogger('bot_logger')
+
+
+CIRCUIT_BREAKER = os.getenv('CIRCUIT_BREAKER', '1') == '1'
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 5))
+CIRCUIT_RECOVERY_TIMEOUT = float(os.getenv('CIRCUIT_RECOVERY_TIMEOUT', 60))
+CIRCUIT_HALF_OPEN_CALLS = int(os.getenv('CIRCUIT_HALF_OPEN_CALLS', 1))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+HALF_OPEN_RETRY = 1.0
+
+CIRCUIT_OPENED = REGISTRY.counter(
+    'homework_circuit_opened_total',
+    'Сколько раз предохранитель прекращал вызовы', ('circuit',)
+)
+CIRCUIT_REJECTED = REGISTRY.counter(
+    'homework_circuit_rejected_total',
+    'Вызовы, не выполненные из-за разомкнутого предохранителя', ('circuit',)
+)
+
+
+class CircuitBreaker:
+    """
+    Предохранитель вокруг вызовов внешнего сервиса.
+
+    closed - вызовы проходят; после failure_threshold сбоев подряд
+    предохранитель размыкается. open - вызовы сразу получают
+    CircuitOpenError, сервис не нагружается. Через recovery_timeout
+    секунд half_open - пропускается не больше half_open_calls пробных
+    вызовов: успех замыкает предохранитель, сбой снова размыкает.
+
+    is_failure(error) решает, считать ли исключение сбоем сервиса:
+    например, ошибка авторизации одного аккаунта им не является.
+    on_change(breaker, old, new) вызывается при смене состояния.
+    """
+
+    def __init__(self, name: str,
+                 failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 recovery_timeout: float = CIRCUIT_RECOVERY_TIMEOUT,
+                 half_open_calls: int = CIRCUIT_HALF_OPEN_CALLS,
+                 is_failure=None, on_change=None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_calls = half_open_calls
+        self.is_failure = is_failure or (lambda error: True)
+        self.on_change = on_change
+        self.state = CLOSED
+        self.failures = 0
+        self.last_error = None
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def _transition(self, state: str, now: float):
+        """Меняет состояние, вызывается под блокировкой."""
+        old, self.state = self.state, state
+        if state == OPEN:
+            self._opened_at = now
+        if state == HALF_OPEN:
+            self._probes = 0
+        return old, state
+
+    def _changed(self, change):
+        if change is None:
+            return
+        old, new = change
+        if new == OPEN:
+            CIRCUIT_OPENED.inc(self.name)
+            _logger.error(
+                f'Предохранитель {self.name} разомкнут на '
+                f'{self.recovery_timeout:.0f} c: {self.last_error}'
+            )
+        else:
+            _logger.info(f'Предохранитель {self.name}: {old} -> {new}')
+        if self.on_change is not None:
+            self.on_change(self, old, new)
+
+    def retry_after(self) -> float:
+        """Через сколько секунд вызов может пройти."""
+        if self.state == OPEN:
+            return max(
+                HALF_OPEN_RETRY,
+                self._opened_at + self.recovery_timeout - time.monotonic()
+            )
+        return HALF_OPEN_RETRY
+
+    def allow(self) -> bool:
+        """Можно ли выполнить вызов сейчас."""
+        change = None
+        with self._lock:
+            if self.state == OPEN:
+                now = time.monotonic()
+                if now - self._opened_at < self.recovery_timeout:
+                    return False
+                change = self._transition(HALF_OPEN, now)
+            if self.state == HALF_OPEN:
+                allowed = self._probes < self.half_open_calls
+                if allowed:
+                    self._probes += 1
+            else:
+                allowed = True
+        self._changed(change)
+        return allowed
+
+    def record_success(self):
+        """Учитывает вызов, на который сервис ответил."""
+        change = None
+        with self._lock:
+            self.failures = 0
+            if self.state != CLOSED:
+                change = self._transition(CLOSED, time.monotonic())
+        self._changed(change)
+
+    def record_failure(self, error: Exception):
+        """Учитывает сбой сервиса."""
+        change = None
+        with self._lock:
+            self.failures += 1
+            self.last_error = error
+            if self.state == HALF_OPEN or (
+                self.state == CLOSED
+                and self.failures >= self.failure_threshold
+            ):
+                change = self._transition(OPEN, time.monotonic())
+        self._changed(change)
+
+    def call(self, function, *args, **kwargs):
+        """
+        Вызывает function через предохранитель.
+        Если он разомкнут, бросает CircuitOpenError, не вызывая её.
+        """
+        if not self.allow():
+            CIRCUIT_REJECTED.inc(self.name)
+            raise CircuitOpenError(
+                f'{self.name} недоступен, вызовы приостановлены',
+                retry_after=self.retry_after()
+            )
+        try:
+            result = function(*args, **kwargs)
+        except Exception as error:
+            if self.is_failure(error):
+                self.record_failure(error)
+            else:
+                self.record_success()
+            raise
+        self.record_success()
+        return result
@@ -0,0 +1,249 @@
+import logging
+import os
+import threading
+import time
+from array import array
+
+from changes import homework_key, homework_version, version_digest
+from models import (STATUS_NAMES, HomeworkStatus, intern_text,
+                    status_code)
+
+_logger = logging.getLogger('bot_logger')
+
+
+TELEGRAM_COMMANDS = os.getenv('TELEGRAM_COMMANDS', '1') == '1'
+LONG_POLL_TIMEOUT = int(os.getenv('LONG_POLL_TIMEOUT', 30))
+HISTORY_SIZE = 10
+
+NO_DATA = 'Пока нет данных о домашних работах.'
+
+
+class ChatStatuses:
+    """
+    Работы и последние изменения статусов одного чата колонками:
+    вместо словарей из ответа API - ключи работ и отпечатки версий
+    в array, интернированные имена работ кортежем и коды статусов байтами.
+    История - время, имя и код статуса последних изменений.
+    """
+
+    __slots__ = ('table', 'names', 'codes', 'changed_at', 'changed_names',
+                 'changed_codes')
+
+    def __init__(self):
+        self.table = array('q')
+        self.names = ()
+        self.codes = b''
+        self.changed_at = array('d')
+        self.changed_names = ()
+        self.changed_codes = b''
+
+    def update(self, homeworks: list, now: float, history_size: int):
+        """Запоминает работы ответа, возвращает число изменившихся."""
+        count = len(self.names)
+        keys = list(self.table[:count])
+        versions = list(self.table[count:])
+        positions = {key: index for index, key in enumerate(keys)}
+        names, codes = list(self.names), bytearray(self.codes)
+        changed = []
+        for homework in homeworks:
+            key = hash(homework_key(homework))
+            version = version_digest(homework_version(homework))
+            index = positions.get(key)
+            if index is not None and versions[index] == version:
+                continue
+            name = intern_text(homework.get('homework_name'))
+            code = status_code(homework.get('status'))
+            if index is None:
+                positions[key] = len(keys)
+                keys.append(key)
+                versions.append(version)
+                names.append(name)
+                codes.append(code)
+            else:
+                versions[index] = version
+                names[index] = name
+                codes[index] = code
+            changed.append((name, code))
+        if changed:
+            self.table = array('q', keys + versions)
+            self.names, self.codes = tuple(names), bytes(codes)
+            if history_size:
+                self.remember(changed, now, history_size)
+        return len(changed)
+
+    def remember(self, changed: list, now: float, history_size: int):
+        """Добавляет изменения в историю, оставляя history_size последних."""
+        start = max(0, len(self.changed_names) + len(changed) - history_size)
+        self.changed_at = (
+            self.changed_at + array('d', [now]) * len(changed)
+        )[start:]
+        self.changed_names = (
+            self.changed_names + tuple(name for name, _ in changed)
+        )[start:]
+        self.changed_codes = (
+            self.changed_codes + bytes(code for _, code in changed)
+        )[start:]
+
+    def status(self) -> list:
+        """Последние известные работы."""
+        return [
+            HomeworkStatus(name, STATUS_NAMES[code])
+            for name, code in zip(self.names, self.codes)
+        ]
+
+    def history(self) -> list:
+        """Последние изменения: [(время, работа)]."""
+        return [
+            (changed_at, HomeworkStatus(name, STATUS_NAMES[code]))
+            for changed_at, name, code in zip(
+                self.changed_at, self.changed_names, self.changed_codes
+            )
+        ]
+
+
+class StatusCache:
+    """
+    Последние известные работы и история изменений по каждому чату.
+    Заполняется опросом из ответа check_response, команды бота читают
+    только его и не делают запросов к API практикума.
+    Работы чата хранятся колонками ChatStatuses, а не словарями
+    из ответа API. Если передан store, история чата читается из него
+    и в памяти не дублируется.
+    """
+
+    def __init__(self, history_size: int = HISTORY_SIZE, store=None):
+        self.history_size = history_size
+        self.store = store
+        self._lock = threading.Lock()
+        self._chats = {}
+
+    def update(self, chat_id, homeworks: list):
+        """Запоминает работы из ответа API, изменения пишет в историю."""
+        chat_id = str(chat_id)
+        now = time.time()
+        with self._lock:
+            chat = self._chats.get(chat_id)
+            if chat is None:
+                chat = self._chats[chat_id] = ChatStatuses()
+            chat.update(
+                homeworks, now, self.history_size if self.store is None else 0
+            )
+
+    def status(self, chat_id) -> list:
+        """Последние известные работы чата."""
+        with self._lock:
+            chat = self._chats.get(str(chat_id))
+            return [] if chat is None else chat.status()
+
+    def history(self, chat_id) -> list:
+        """Последние изменения статусов в чате: [(время, работа)]."""
+        with self._lock:
+            chat = self._chats.get(str(chat_id))
+            history = [] if chat is None else chat.history()
+        if history or self.store is None:
+            return history
+        return self.store.recent(chat_id, self.history_size)
+
+
+def describe(homework: dict) -> str:
+    """Строка о текущем статусе работы."""
+    from homework import VERDICTS_REVIEWER
+
+    name = homework.get('homework_name', '').split('.')[0]
+    status = homework.get('status')
+    return f'"{name}": {VERDICTS_REVIEWER.get(status, status)}'
+
+
+def answer_status(cache: StatusCache, chat_id) -> str:
+    """Ответ на /status."""
+    homeworks = cache.status(chat_id)
+    if not homeworks:
+        return NO_DATA
+    return '\n'.join(describe(homework) for homework in homeworks)
+
+
+def answer_history(cache: StatusCache, chat_id) -> str:
+    """Ответ на /history."""
+    history = cache.history(chat_id)
+    if not history:
+        return NO_DATA
+    return '\n'.join(
+        f'{time.strftime("%d.%m %H:%M", time.localtime(changed_at))} '
+        f'{describe(homework)}'
+        for changed_at, homework in history
+    )
+
+
+COMMANDS = {
+    '/status': answer_status,
+    '/history': answer_history,
+}
+
+
+class CommandListener:
+    """
+    Отвечает на команды /status и /history, получая обновления
+    через long polling getUpdates в отдельном потоке.
+    Боту нужен свой экземпляр telegram.Bot: long polling держит
+    соединение из пула бота всё время ожидания.
+    Если передана аренда lease, обновления получает только ведущая
+    реплика: два потребителя getUpdates мешают друг другу, а ответы
+    резервной реплики ждали бы аренды в её очереди отправки.
+    """
+
+    def __init__(self, bot, cache: StatusCache, outbox,
+                 timeout: int = LONG_POLL_TIMEOUT, lease=None):
+        self.bot = bot
+        self.cache = cache
+        self.outbox = outbox
+        self.timeout = timeout
+        self.lease = lease
+        self.offset = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Запускает поток получения обновлений."""
+        self._thread = threading.Thread(
+            target=self.run, name='commands', daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Останавливает поток после текущего запроса getUpdates."""
+        self._stopped.set()
+
+    def handle(self, update):
+        """Отвечает на одну команду из обновления телеграм."""
+        message = update.message
+        if message is None or not message.text:
+            return
+        command = message.text.split()[0].split('@')[0]
+        answer = COMMANDS.get(command)
+        if answer is None:
+            return
+        chat_id = message.chat_id
+        self.outbox.put(chat_id, answer(self.cache, chat_id))
+
+    def poll(self):
+        """Один запрос getUpdates и обработка полученных команд."""
+        updates = self.bot.get_updates(
+            offset=self.offset, timeout=self.timeout,
+            allowed_updates=['message']
+        )
+        for update in updates:
+            self.offset = update.update_id + 1
+            self.handle(update)
+
+    def run(self):
+        """Цикл long polling до вызова stop, пока реплика ведущая."""
+        while not self._stopped.is_set():
+            if self.lease is not None and not self.lease.held:
+                self._stopped.wait(self.lease.renew_interval)
+                continue
+            try:
+                self.poll()
+            except Exception as error:
+                _logger.error(f'Ошибка получения команд телеграм: {error}')
+                self._stopped.wait(5)
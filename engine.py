@@ -0,0 +1,485 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import homework
+from api_limiter import API_LIMITER
+from changes import ChangeTracker
+from checkpoint import Checkpoint
+from commands import TELEGRAM_COMMANDS, CommandListener, StatusCache
+from config_log import LOGGER_CONFIG
+from exceptions import (CircuitOpenError, ENVError, HomeWorkIsEmpty,
+                        RequestAPIYandexPracticumError, SubscriptionsError)
+from history import create_history
+from http_session import create_session
+from lifecycle import Lifecycle, shutdown
+from leader import create_delivery_log, create_lease
+from log_pipeline import SUBSCRIPTION, setup_logging
+from metrics import (METRICS_ENABLED, QUEUE_DEPTH, count_error, mark_success,
+                     start_metrics_server)
+from outbox import Outbox
+from response_cache import RESPONSE_CACHE, ResponseCache
+from scheduler import PollScheduler, spread_phase
+from subscriptions import load_subscriptions
+
+_logger = logging.getLogger('bot_logger')
+
+
+SUBSCRIPTIONS_FILE = os.getenv('SUBSCRIPTIONS_FILE', 'subscriptions.json')
+POLL_WORKERS = int(os.getenv('POLL_WORKERS', 32))
+POLL_MODE = os.getenv('POLL_MODE', 'threads')
+POLL_SPREAD = os.getenv('POLL_SPREAD', '1') == '1'
+POLL_TICK = 1.0
+
+
+class SubscriptionState:
+    """Состояние опроса одной подписки между циклами."""
+
+    __slots__ = ('current_timestamp', 'error_cash', 'tracker', 'scheduler',
+                 'next_poll')
+
+    def __init__(self, current_timestamp: int, tracker: ChangeTracker):
+        self.current_timestamp = current_timestamp
+        self.error_cash = ''
+        self.tracker = tracker
+        self.scheduler = PollScheduler(base_interval=homework.RETRY_TIME)
+        self.next_poll = 0.0
+
+
+class PollingEngine:
+    """
+    Опрашивает API практикума для множества подписок в одном процессе.
+    Запросы выполняются пулом потоков, число запросов в полёте ограничено.
+    Все потоки используют одну сессию с пулом keep-alive соединений.
+    Сообщения отправляет очередь Outbox, опрос не ждёт телеграм.
+    Время следующего опроса каждой подписки выбирает её PollScheduler.
+    Если передан checkpoint, состояние подписок восстанавливается из него
+    и сохраняется после каждого цикла.
+    Запросы всех подписок идут через один предохранитель api_breaker:
+    при сбое API практикума опрос приостанавливается целиком, а не
+    повторяется для каждой подписки.
+    Если передан history, переходы статусов пишутся в него одной
+    транзакцией после каждого цикла.
+    Если передана аренда lease, опрашивает и отправляет только ведущая
+    реплика; резервная ждёт аренду и, получив её, читает состояние
+    подписок из общего checkpoint. Журнал deliveries не даёт новой
+    ведущей реплике повторить уже отправленное.
+    Если передан api_limiter, запросы к API идут через этот общий
+    на процесс лимит, одинаковые запросы в полёте выполняются один раз.
+    Чтобы подписки не опрашивались разом в начале каждой минуты, первый
+    опрос каждой подписки после запуска сдвигается на её место внутри
+    окна RETRY_TIME, дальше сдвиг сохраняет расписание. При получении
+    аренды и смене набора подписок первый опрос не откладывается.
+    По сигналу остановки lifecycle новые запросы не начинаются,
+    начатые доделываются, очередь отправки и состояние сохраняются.
+    """
+
+    def __init__(self, subscriptions: list, bot,
+                 max_workers: int = POLL_WORKERS,
+                 session=None, checkpoint=None, outbox=None,
+                 status_cache=None, response_cache=None, api_breaker=None,
+                 history=None, lease=None, deliveries=None,
+                 api_limiter=None):
+        self.bot = bot
+        self.max_workers = max_workers
+        self.session = session or create_session(pool_size=max_workers)
+        if outbox is None:
+            outbox = Outbox(
+                homework.create_sender(
+                    bot, homework.create_telegram_breaker()
+                ),
+                lease=lease, deliveries=deliveries
+            ).start()
+        self.outbox = outbox
+        QUEUE_DEPTH.set_function(outbox.__len__)
+        self.status_cache = status_cache
+        if response_cache is None and RESPONSE_CACHE:
+            response_cache = ResponseCache()
+        self.response_cache = response_cache
+        if api_breaker is None:
+            api_breaker = homework.create_api_breaker(
+                outbox, homework.TELEGRAM_CHAT_ID
+            )
+        self.api_breaker = api_breaker
+        self.api_limiter = api_limiter
+        self.spread = POLL_SPREAD
+        self.checkpoint = checkpoint
+        self.history = history
+        self.lease = lease
+        self.deliveries = deliveries
+        self.standby = False
+        self.lifecycle = Lifecycle()
+        self.states = {}
+        self.assign(subscriptions, self.spread)
+
+    def assign(self, subscriptions: list, spread: bool = False):
+        """
+        Задаёт набор опрашиваемых подписок. Состояние оставшихся
+        сохраняется в памяти, новых - восстанавливается из checkpoint.
+        Перед этим накопленное состояние записывается, чтобы его
+        прочитал процесс, которому отходят убранные подписки.
+        spread сдвигает первые опросы новых подписок по окну RETRY_TIME:
+        только при запуске, иначе он задержал бы переход аренды.
+        """
+        checkpoint = self.checkpoint
+        added = [item for item in subscriptions if item not in self.states]
+        saved = {}
+        if checkpoint is not None:
+            if self.states:
+                checkpoint.flush(force=True)
+            if added:
+                saved = checkpoint.load()
+        current_timestamp = int(time.time())
+        now = time.monotonic()
+        states = {}
+        for subscription in subscriptions:
+            state = self.states.get(subscription)
+            if state is None:
+                current_date, seen = saved.get(subscription.key, (None, {}))
+                current_date = current_date or current_timestamp
+                state = SubscriptionState(
+                    current_date,
+                    ChangeTracker(
+                        seen, checkpoint, subscription.key, self.deliveries,
+                        current_date
+                    )
+                )
+                if spread:
+                    state.next_poll = now + spread_phase(
+                        subscription.id, homework.RETRY_TIME
+                    )
+            states[subscription] = state
+        self.subscriptions = list(subscriptions)
+        self.states = states
+
+    def process_response(self, subscription, response: dict):
+        """
+        Проверяет ответ API и ставит в очередь сообщения
+        по изменившимся работам.
+        """
+        state = self.states[subscription]
+        if not response:
+            raise RequestAPIYandexPracticumError(
+                'Ответ от API практикума пустой'
+            )
+        try:
+            status = homework.handle_response(
+                response, self.outbox, state.tracker, self.status_cache,
+                subscription.chat_id, self.history, subscription.destinations
+            )
+        except HomeWorkIsEmpty as error:
+            count_error(error)
+            status = None
+        state.scheduler.success(status)
+        state.current_timestamp = state.tracker.advance(
+            response['current_date']
+        )
+        state.error_cash = ''
+        mark_success()
+
+    def process_error(self, subscription, error: Exception):
+        """Логирует сбой опроса и сообщает о нём подписке."""
+        state = self.states[subscription]
+        if isinstance(error, (CircuitOpenError,
+                              RequestAPIYandexPracticumError)):
+            state.scheduler.failure(error.retry_after)
+        elif self.response_cache is not None:
+            self.response_cache.invalidate(
+                subscription.headers, subscription.key
+            )
+        state.error_cash = homework.report_error(
+            self.outbox, error, state.error_cash, subscription.chat_id,
+            self.api_breaker
+        )
+
+    def schedule(self, subscription):
+        """Назначает время следующего опроса подписки."""
+        state = self.states[subscription]
+        state.next_poll = time.monotonic() + state.scheduler.next_delay()
+
+    def due(self) -> list:
+        """Подписки, которым пора делать запрос."""
+        now = time.monotonic()
+        return [
+            subscription for subscription in self.subscriptions
+            if self.states[subscription].next_poll <= now
+        ]
+
+    def sleep_time(self) -> float:
+        """Сколько ждать до ближайшего опроса, не меньше POLL_TICK."""
+        next_poll = min(
+            (state.next_poll for state in self.states.values()),
+            default=time.monotonic() + POLL_TICK
+        )
+        return max(POLL_TICK, next_poll - time.monotonic())
+
+    def poll(self, subscription):
+        """Один опрос подписки: запрос, проверка, постановка в очередь."""
+        context = SUBSCRIPTION.set(subscription.id)
+        try:
+            response = homework.request_api_answer(
+                self.states[subscription].current_timestamp,
+                subscription.headers, self.session, self.response_cache,
+                self.api_breaker, self.api_limiter, subscription.key
+            )
+            self.process_response(subscription, response)
+        except Exception as error:
+            self.process_error(subscription, error)
+        finally:
+            SUBSCRIPTION.reset(context)
+        self.schedule(subscription)
+
+    def run_cycle(self, executor):
+        """Опрашивает подписки, которым пора, держа в полёте 2 * workers."""
+        pending = set()
+        for subscription in self.due():
+            if self.lifecycle.stopping:
+                break
+            if len(pending) >= self.max_workers * 2:
+                _, pending = wait(pending, return_when=FIRST_COMPLETED)
+            pending.add(executor.submit(self.poll, subscription))
+        wait(pending)
+
+    def log_cycle(self, elapsed: float):
+        """Логирует длительность цикла опроса."""
+        _logger.debug(
+            f'Цикл опроса {len(self.subscriptions)} подписок '
+            f'занял {elapsed:.2f} c'
+        )
+        if self.response_cache is not None:
+            stats = self.response_cache.take_stats()
+            _logger.debug(
+                'Кэш ответов API за цикл: попаданий %.0f%%, '
+                'не скачано и не разобрано %s байт',
+                stats['hit_rate'] * 100, stats['bytes_saved']
+            )
+
+    def flush(self):
+        """Сохраняет накопленное состояние, если пора, и историю статусов."""
+        if self.checkpoint is not None:
+            self.checkpoint.flush()
+        if self.history is not None:
+            self.history.flush()
+
+    def end_cycle(self, elapsed: float):
+        """Завершает цикл опроса: лог и сохранение состояния."""
+        self.log_cycle(elapsed)
+        self.flush()
+
+    def reload_settings(self):
+        """
+        Перечитывает .env и применяет RETRY_TIME к расписанию подписок;
+        при смене токена бота пересоздаёт его.
+        """
+        changed = homework.reload_config()
+        for state in self.states.values():
+            state.scheduler.base_interval = homework.RETRY_TIME
+        if 'TELEGRAM_TOKEN' in changed:
+            self.bot = create_bot(self.max_workers)
+            self.outbox.send = homework.create_sender(
+                self.bot, getattr(self.outbox.send, 'breaker', None)
+            )
+
+    def reload(self):
+        """Перечитывает настройки и список подписок без перезапуска."""
+        self.reload_settings()
+        try:
+            subscriptions = load_subscriptions(SUBSCRIPTIONS_FILE)
+        except SubscriptionsError as error:
+            _logger.error(f'Список подписок не перечитан: {error}')
+            return
+        self.assign(subscriptions)
+        _logger.info(f'Подписок после перезагрузки: {len(subscriptions)}')
+
+    def wake(self):
+        """Обрабатывает просьбу перечитать настройки, если она была."""
+        if self.lifecycle.take_reload():
+            self.reload()
+
+    def lead(self) -> bool:
+        """
+        Может ли реплика опрашивать. При потере аренды сохраняет
+        состояние, при получении читает его заново из checkpoint:
+        пока реплика была резервной, подписки опрашивала другая.
+        """
+        if self.lease is None or self.lease.held:
+            if self.standby:
+                self.standby = False
+                self.states = {}
+                self.assign(self.subscriptions)
+            return True
+        if not self.standby:
+            self.standby = True
+            if self.checkpoint is not None:
+                self.checkpoint.flush(force=True)
+        return False
+
+    def shutdown(self):
+        """Дожидается отправки очереди и сохраняет состояние."""
+        shutdown(self.outbox, self.checkpoint)
+        if self.history is not None:
+            self.history.flush()
+        if self.lease is not None:
+            self.lease.stop()
+
+    def run(self):
+        """Цикл опроса по расписанию подписок до сигнала остановки."""
+        with ThreadPoolExecutor(
+            self.max_workers, thread_name_prefix='poll'
+        ) as executor:
+            while not self.lifecycle.stopping:
+                if not self.lead():
+                    self.lifecycle.sleep(self.lease.renew_interval)
+                    self.wake()
+                    continue
+                started = time.monotonic()
+                self.run_cycle(executor)
+                self.end_cycle(time.monotonic() - started)
+                self.lifecycle.sleep(self.sleep_time())
+                self.wake()
+        self.shutdown()
+
+
+class AsyncPollingEngine(PollingEngine):
+    """
+    Асинхронный вариант движка опроса.
+    Число одновременных запросов ограничено семафором, каждый запрос
+    к API прерывается по своему таймауту, так что зависший ответ одной
+    подписки не задерживает цикл остальных.
+    """
+
+    def __init__(self, subscriptions: list, bot,
+                 max_workers: int = POLL_WORKERS,
+                 api_timeout: float = homework.API_TIMEOUT,
+                 session=None, checkpoint=None, outbox=None,
+                 status_cache=None, response_cache=None, api_breaker=None,
+                 history=None, lease=None, deliveries=None,
+                 api_limiter=None):
+        super().__init__(
+            subscriptions, bot, max_workers, session, checkpoint, outbox,
+            status_cache, response_cache, api_breaker, history, lease,
+            deliveries, api_limiter
+        )
+        self.api_timeout = api_timeout
+        self.semaphore = None
+
+    async def poll(self, subscription):
+        """Один опрос подписки под семафором."""
+        async with self.semaphore:
+            if self.lifecycle.stopping:
+                return
+            SUBSCRIPTION.set(subscription.id)
+            try:
+                response = await homework.get_api_answer_async(
+                    self.states[subscription].current_timestamp,
+                    subscription.headers, self.api_timeout, self.session,
+                    self.response_cache, self.api_breaker, self.api_limiter,
+                    subscription.key
+                )
+                self.process_response(subscription, response)
+            except Exception as error:
+                self.process_error(subscription, error)
+            self.schedule(subscription)
+
+    async def run_cycle(self):
+        """Опрашивает подписки, которым пора, конкурентно."""
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.max_workers)
+        await asyncio.gather(
+            *(self.poll(subscription) for subscription in self.due())
+        )
+
+    async def run(self):
+        """
+        Цикл опроса до сигнала остановки. Отмена задачи прерывает
+        ожидание запросов и сна между циклами.
+        """
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(
+            self.max_workers, thread_name_prefix='poll'
+        )
+        loop.set_default_executor(executor)
+        try:
+            while not self.lifecycle.stopping:
+                if not self.lead():
+                    await self.lifecycle.sleep_async(
+                        self.lease.renew_interval
+                    )
+                    self.wake()
+                    continue
+                started = loop.time()
+                await self.run_cycle()
+                self.end_cycle(loop.time() - started)
+                await self.lifecycle.sleep_async(self.sleep_time())
+                self.wake()
+        except asyncio.CancelledError:
+            _logger.info('Опрос подписок остановлен')
+            raise
+        finally:
+            executor.shutdown(wait=False)
+        self.shutdown()
+
+
+def create_bot(pool_size: int = POLL_WORKERS):
+    """Создаёт бота с пулом соединений на все потоки опроса."""
+    import telegram
+    from telegram.utils.request import Request
+
+    return telegram.Bot(
+        token=homework.TELEGRAM_TOKEN,
+        request=Request(con_pool_size=pool_size)
+    )
+
+
+def load():
+    """Проверяет окружение и загружает подписки."""
+    if not homework.TELEGRAM_TOKEN:
+        error = 'Переменная TELEGRAM_TOKEN недоступна, проверьте файл .env'
+        _logger.error(error)
+        raise ENVError(error)
+
+    subscriptions = load_subscriptions(SUBSCRIPTIONS_FILE)
+    _logger.info(f'Загружено подписок: {len(subscriptions)}')
+    return subscriptions
+
+
+def create_engine(engine_class):
+    """Собирает движок опроса с сохранением состояния и командами бота."""
+    setup_logging(LOGGER_CONFIG)
+    if METRICS_ENABLED:
+        start_metrics_server()
+    history = create_history()
+    status_cache = StatusCache(store=history)
+    engine = engine_class(
+        load(), create_bot(), checkpoint=Checkpoint(),
+        status_cache=status_cache, history=history,
+        lease=create_lease('engine'), deliveries=create_delivery_log(),
+        api_limiter=API_LIMITER
+    )
+    engine.lifecycle.watch(homework.ENV_FILE, SUBSCRIPTIONS_FILE).install()
+    if TELEGRAM_COMMANDS:
+        CommandListener(
+            create_bot(pool_size=1), status_cache, engine.outbox,
+            lease=engine.lease
+        ).start()
+    return engine
+
+
+async def async_main():
+    """Асинхронный опрос всех подписок из SUBSCRIPTIONS_FILE."""
+    await create_engine(AsyncPollingEngine).run()
+
+
+def main():
+    """Опрос всех подписок из SUBSCRIPTIONS_FILE одним процессом."""
+    if POLL_MODE == 'async':
+        asyncio.run(async_main())
+        return
+
+    create_engine(PollingEngine).run()
+
+
+if __name__ == '__main__':
+    main()
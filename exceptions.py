@@ -1,6 +1,10 @@
 class RequestAPIYandexPracticumError(Exception):
     """Статус ответа при запросе к API Яндекс Практикум отличается от 200"""
-    pass
+
+    def __init__(self, *args, retry_after=None, status_code=None):
+        super().__init__(*args)
+        self.retry_after = retry_after
+        self.status_code = status_code
 
 
 class ENVError(Exception):
@@ -10,9 +14,35 @@ class ENVError(Exception):
 
 class SendMessageError(Exception):
     """Ошибка отправки сообщения в телеграм"""
-    pass
+
+    def __init__(self, *args, retry_after=None):
+        super().__init__(*args)
+        self.retry_after = retry_after
 
 
 class HomeWorkIsEmpty(Exception):
     """Список домашних работ пуст"""
     pass
+
+
+class SubscriptionsError(Exception):
+    """Ошибка загрузки списка подписок"""
+    pass
+
+
+class ResponseValidationError(Exception):
+    """Ответ API практикума не соответствует ожидаемой схеме"""
+
+    def __init__(self, errors: list):
+        super().__init__(
+            'Некорректный ответ API практикума: ' + '; '.join(errors)
+        )
+        self.errors = errors
+
+
+class CircuitOpenError(Exception):
+    """Вызов не выполнен: предохранитель внешнего сервиса разомкнут"""
+
+    def __init__(self, *args, retry_after=None):
+        super().__init__(*args)
+        self.retry_after = retry_after
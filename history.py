@@ -0,0 +1,185 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+_logger = logging.getLogger('bot_logger')
+
+
+HISTORY = os.getenv('HISTORY', '1') == '1'
+HISTORY_FILE = os.getenv('HISTORY_FILE', 'history.db')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS transitions (
+    subscription TEXT NOT NULL,
+    chat_id TEXT,
+    homework_id,
+    homework_name TEXT,
+    lesson_name TEXT,
+    status TEXT NOT NULL,
+    reviewer_comment TEXT,
+    date_updated TEXT,
+    updated_at INTEGER,
+    seen_at INTEGER NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS transitions_homework
+    ON transitions (subscription, homework_id, status, updated_at);
+CREATE INDEX IF NOT EXISTS transitions_status
+    ON transitions (status, updated_at);
+CREATE INDEX IF NOT EXISTS transitions_chat
+    ON transitions (chat_id, updated_at);
+'''
+
+FIELDS = (
+    'id', 'homework_name', 'lesson_name', 'status',
+    'reviewer_comment', 'date_updated',
+)
+
+REVIEW_DURATIONS = '''
+SELECT approved.subscription, approved.homework_id,
+       approved.homework_name, approved.lesson_name,
+       approved.updated_at - (
+           SELECT MAX(reviewing.updated_at) FROM transitions reviewing
+           WHERE reviewing.subscription = approved.subscription
+             AND reviewing.homework_id = approved.homework_id
+             AND reviewing.status = 'reviewing'
+             AND reviewing.updated_at <= approved.updated_at
+       ) AS seconds
+FROM transitions approved
+WHERE approved.status = 'approved'
+  AND approved.updated_at >= ? AND approved.updated_at < ?
+'''
+
+
+def parse_date(value):
+    """Время в секундах из date_updated в ISO 8601 или None."""
+    try:
+        return int(
+            datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+        )
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class HistoryStore:
+    """
+    История статусов домашних работ в SQLite (режим WAL).
+    Каждый переход (работа, статус, комментарий ревьюера, date_updated)
+    записывается одной строкой, повтор того же перехода отбрасывается
+    уникальным индексом. Переходы копятся в памяти, flush записывает
+    их одной транзакцией, его вызывают раз за цикл опроса.
+    Запросы идут по индексам и не просматривают всю таблицу.
+    """
+
+    def __init__(self, path: str = HISTORY_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending = []
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, timeout=30
+        )
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.executescript(SCHEMA)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def record(self, key: str, chat_id, homework: dict, seen_at=None):
+        """Запоминает переход работы до следующей записи."""
+        row = (key, None if chat_id is None else str(chat_id))
+        row += tuple(map(homework.get, FIELDS))
+        row += (
+            parse_date(homework.get('date_updated')),
+            int(seen_at or time.time()),
+        )
+        with self._lock:
+            self._pending.append(row)
+
+    def flush(self) -> int:
+        """
+        Записывает накопленные переходы одной транзакцией.
+        Возвращает число новых строк.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return 0
+        with self._write_lock, self._connection:
+            before = self._connection.total_changes
+            self._connection.executemany(
+                'INSERT OR IGNORE INTO transitions VALUES '
+                '(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                pending
+            )
+            return self._connection.total_changes - before
+
+    def _query(self, sql: str, params=()) -> list:
+        with self._write_lock:
+            return self._connection.execute(sql, params).fetchall()
+
+    def review_durations(self, since: int = 0, until: int = None) -> list:
+        """
+        Время от взятия на проверку до принятия для работ, принятых
+        в [since, until): [(подписка, id, имя работы, урок, секунды)].
+        Отсчёт идёт от последнего перехода в reviewing перед принятием.
+        """
+        until = 2 ** 62 if until is None else until
+        return self._query(REVIEW_DURATIONS, (since, until))
+
+    def review_latency(self, since: int = 0, until: int = None) -> dict:
+        """
+        Задержка проверки по урокам:
+        {урок: (работ, среднее, максимум в секундах)}.
+        """
+        until = 2 ** 62 if until is None else until
+        rows = self._query(
+            f'SELECT lesson_name, COUNT(*), AVG(seconds), MAX(seconds) '
+            f'FROM ({REVIEW_DURATIONS}) WHERE seconds IS NOT NULL '
+            f'GROUP BY lesson_name',
+            (since, until)
+        )
+        return {
+            lesson: (count, average, maximum)
+            for lesson, count, average, maximum in rows
+        }
+
+    def homework(self, key: str, homework_id) -> list:
+        """Все переходы одной работы подписки по времени."""
+        return self._query(
+            'SELECT status, reviewer_comment, date_updated FROM transitions '
+            'WHERE subscription = ? AND homework_id = ? ORDER BY updated_at',
+            (key, homework_id)
+        )
+
+    def recent(self, chat_id, limit: int = 10) -> list:
+        """
+        Последние limit переходов в чате, от старых к новым:
+        [(время, работа)].
+        """
+        rows = self._query(
+            'SELECT COALESCE(updated_at, seen_at), homework_id, '
+            'homework_name, lesson_name, status, reviewer_comment, '
+            'date_updated FROM transitions '
+            'WHERE chat_id = ? ORDER BY updated_at DESC LIMIT ?',
+            (str(chat_id), limit)
+        )
+        return [
+            (row[0], dict(zip(FIELDS, row[1:]))) for row in reversed(rows)
+        ]
+
+    def close(self):
+        """Записывает накопленное и закрывает базу."""
+        self.flush()
+        with self._write_lock:
+            self._connection.close()
+
+
+def create_history():
+    """Хранилище истории из HISTORY_FILE или None, если оно отключено."""
+    if not HISTORY:
+        return None
+    return HistoryStore()
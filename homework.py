@@ -1,29 +1,55 @@
-import logging.config
+import json
+import logging
 import os
 import time
+from functools import partial
 from http import HTTPStatus
 
-import requests
-import telegram
-from dotenv import load_dotenv
+from dotenv import find_dotenv, load_dotenv
 
+from api_limiter import API_LIMITER
+from changes import ChangeTracker, homework_key
+from checkpoint import Checkpoint
+from circuit import CIRCUIT_BREAKER, CLOSED, OPEN, CircuitBreaker
+from commands import TELEGRAM_COMMANDS, CommandListener, StatusCache
 from config_log import LOGGER_CONFIG
-from exceptions import (ENVError, HomeWorkIsEmpty,
-                        RequestAPIYandexPracticumError, SendMessageError)
+from exceptions import (CircuitOpenError, ENVError, HomeWorkIsEmpty,
+                        RequestAPIYandexPracticumError,
+                        ResponseValidationError, SendMessageError)
+from history import create_history
+from http_session import TIMEOUT, create_session
+from leader import create_delivery_log, create_lease
+from lifecycle import Lifecycle, shutdown
+from log_pipeline import setup_logging
+from metrics import (API_LATENCY, METRICS_ENABLED, QUEUE_DEPTH,
+                     TELEGRAM_LATENCY, count_error, mark_success,
+                     start_metrics_server)
+from models import decode_response, parse_homeworks, response_errors
+from outbox import Outbox
+from rendering import Renderer
+from response_cache import RESPONSE_CACHE, ResponseCache, UnchangedResponse
+from scheduler import PollScheduler, parse_retry_after
+from sinks import Router
+from subscriptions import Subscription, parse_destinations
+
+ENV_FILE = find_dotenv() or '.env'
+load_dotenv(ENV_FILE)
 
-load_dotenv()
-
-logging.config.dictConfig(LOGGER_CONFIG)
 _logger = logging.getLogger('bot_logger')
 
 
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+NOTIFY_DESTINATIONS = parse_destinations(os.getenv('NOTIFY_DESTINATIONS'))
 
-RETRY_TIME = 60
+RETRY_TIME = int(os.getenv('RETRY_TIME', 60))
+API_TIMEOUT = float(os.getenv('API_TIMEOUT', 10))
+LOCALE = os.getenv('BOT_LOCALE', 'ru')
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+RELOADABLE = ('PRACTICUM_TOKEN', 'TELEGRAM_TOKEN', 'TELEGRAM_CHAT_ID',
+              'RETRY_TIME')
 
 
 VERDICTS_REVIEWER = {
@@ -32,50 +58,176 @@ VERDICTS_REVIEWER = {
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
 
+RENDERER = Renderer({'ru': VERDICTS_REVIEWER}, LOCALE)
+
 
 def send_message(bot, message):
     """Отправляет сообщение в Telegram чат."""
+    send_message_to_chat(bot, TELEGRAM_CHAT_ID, message)
+
+
+def send_message_to_chat(bot, chat_id, message):
+    """Отправляет сообщение в указанный Telegram чат."""
+    started = time.perf_counter()
     try:
-        bot.send_message(TELEGRAM_CHAT_ID, message)
-        _logger.info(f'Сообщение в телеграм отправлено: {message}')
+        bot.send_message(chat_id, message)
+        _logger.info(
+            'Сообщение в телеграм отправлено: %s', message,
+            extra={'chat_id': chat_id}
+        )
     except Exception as error:
-        raise SendMessageError(f'Ошибка: {error}')
+        raise SendMessageError(
+            f'Ошибка: {error}',
+            retry_after=getattr(error, 'retry_after', None)
+        ) from error
+    finally:
+        TELEGRAM_LATENCY.observe(time.perf_counter() - started)
+
+
+def create_sender(bot, breaker=None):
+    """
+    Создаёт функцию отправки для очереди.
+    Чаты телеграм получают сообщения через bot под предохранителем
+    breaker, вебхуки и почта - через свои каналы доставки.
+    """
+    return Router(partial(send_message_to_chat, bot), breaker=breaker)
 
 
 def get_api_answer(current_timestamp: int) -> dict:
     """Делает запрос к API-сервису."""
+    return request_api_answer(
+        current_timestamp, HEADERS, limiter=API_LIMITER
+    )
+
+
+def get_endpoint(client, headers: dict, params: dict):
+    """
+    HTTP запрос к API практикума с замером длительности.
+    В API_LATENCY попадает только сам запрос, без ожидания токена лимита.
+    """
+    started = time.perf_counter()
+    try:
+        return client.get(
+            ENDPOINT, headers=headers, params=params, timeout=TIMEOUT
+        )
+    finally:
+        API_LATENCY.observe(time.perf_counter() - started)
+
+
+def fetch_api_answer(client, headers: dict, params: dict, limiter=None):
+    """HTTP запрос к API практикума, через limiter, если он передан."""
+    if limiter is None:
+        return get_endpoint(client, headers, params)
+    return limiter.call(
+        (tuple(headers.items()), params['from_date']), get_endpoint,
+        client, headers, params
+    )
+
+
+def request_api_answer(current_timestamp: int, headers: dict,
+                       session=None, cache=None, breaker=None,
+                       limiter=None, cache_key: str = None) -> dict:
+    """
+    Делает запрос к API-сервису с заголовками конкретного аккаунта.
+    Если передана session, запрос идёт через её пул соединений.
+    Если передан cache, неизменившийся ответ возвращается
+    как UnchangedResponse без разбора JSON; cache_key - ключ подписки
+    в кэше, по умолчанию токен.
+    Если передан breaker, запрос идёт через предохранитель.
+    Если передан limiter, запрос ждёт токен общего лимита, а одинаковые
+    HTTP запросы в полёте (заголовки и from_date) выполняются один раз;
+    ответ каждая подписка разбирает со своей записью кэша.
+    """
+    if breaker is not None:
+        return breaker.call(
+            request_api_answer, current_timestamp, headers, session, cache,
+            None, limiter, cache_key
+        )
     timestamp = current_timestamp or int(time.time())
     params = {'from_date': timestamp}
+    client = session
+    if client is None:
+        import requests
+
+        client = requests
+    request_headers = headers if cache is None else cache.request_headers(
+        headers, cache_key
+    )
     try:
-        homework_statuses = requests.get(
-            ENDPOINT, headers=HEADERS, params=params
+        homework_statuses = fetch_api_answer(
+            client, request_headers, params, limiter
         )
-        if homework_statuses.status_code != HTTPStatus.OK:
-            raise Exception
+        status_code = homework_statuses.status_code
     except Exception:
         raise RequestAPIYandexPracticumError(
             'Ошибка запроса к API практикума.'
         )
+    if cache is not None and status_code == HTTPStatus.NOT_MODIFIED:
+        return cache.parse(headers, homework_statuses, timestamp, cache_key)
+    if status_code != HTTPStatus.OK:
+        response_headers = getattr(homework_statuses, 'headers', None) or {}
+        raise RequestAPIYandexPracticumError(
+            'Ошибка запроса к API практикума.',
+            retry_after=parse_retry_after(response_headers.get('Retry-After')),
+            status_code=status_code
+        )
     _logger.debug('Запрос к API практикума выполнен успешно')
-    return homework_statuses.json()
+    if cache is not None:
+        return cache.parse(headers, homework_statuses, timestamp, cache_key)
+    return decode_response(homework_statuses)
+
+
+async def get_api_answer_async(current_timestamp: int, headers=None,
+                               timeout: float = API_TIMEOUT,
+                               session=None, cache=None,
+                               breaker=None, limiter=None,
+                               cache_key: str = None) -> dict:
+    """
+    Асинхронно делает запрос к API-сервису.
+    По истечении timeout ожидание прерывается, ответ отбрасывается,
+    предохранитель breaker учитывает это как сбой API. Токен лимита
+    limiter ожидается до начала отсчёта timeout: очередь к своему
+    лимиту не считается сбоем API.
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    if limiter is not None and (breaker is None or breaker.state != OPEN):
+        await limiter.acquire_async()
+        limiter = limiter.prepaid
+    try:
+        return await asyncio.wait_for(
+            loop.run_in_executor(
+                None, request_api_answer,
+                current_timestamp, headers or HEADERS, session, cache,
+                breaker, limiter, cache_key
+            ),
+            timeout
+        )
+    except asyncio.TimeoutError:
+        error = RequestAPIYandexPracticumError(
+            f'Превышено время ожидания ответа API практикума ({timeout} c)'
+        )
+        if breaker is not None:
+            breaker.record_failure(error)
+        raise error
 
 
 def check_response(response: dict) -> list:
     """
     Проверяет ответ API на корректность.
     В качестве параметра функция получает ответ API.
+    Все ошибки ключей и типов сообщаются одним исключением.
     """
     if not isinstance(response, dict):
         raise TypeError('response должен быть dict')
 
-    if 'homeworks' and 'current_date' not in response:
-        raise KeyError('API практикума вернул неожидаемое значение')
+    errors = response_errors(response)
+    if errors:
+        raise ResponseValidationError(errors)
 
     list_homeworks = response['homeworks']
 
-    if not isinstance(list_homeworks, list):
-        raise TypeError('Тип значения "homeworks" не list')
-
     if not list_homeworks:
         raise HomeWorkIsEmpty('Получен пустой список домашних работ')
 
@@ -87,40 +239,37 @@ def parse_status(homework: dict) -> str:
     Извлекает из информации о конкретной домашней работе статус этой работы.
     И возвращает строку подготовленную строку.
     """
-    if 'homework_name' not in homework:
+    homework_name = homework.get('homework_name')
+    if homework_name is None:
         raise KeyError('Не удалось спарсить имя домашней работы')
 
-    homework_name = homework['homework_name'].split('.')[0]
-    _logger.debug(f'Название домашней работы - {homework_name}')
-
-    if 'status' not in homework:
+    homework_status = homework.get('status')
+    if homework_status is None:
         raise KeyError('Не удалось спарсить статус домашней работы')
 
-    homework_status = homework['status']
-    _logger.debug(f'Статус домашней работы - {homework_status}')
-
     if 'reviewer_comment' not in homework:
         raise KeyError('Не удалось спарсить комментарий ревьюера')
 
-    reviewer_comment = (f" Комментарий от ревьюера: "
-                        f"{homework['reviewer_comment']}")
-    _logger.debug(reviewer_comment)
-
-    if homework_status not in VERDICTS_REVIEWER:
-        raise KeyError(
-            f'Получен неизвестный статус домашней работы - {homework_status}'
-        )
-
-    if homework_status == 'reviewing':
-        reviewer_comment = ''
+    message = RENDERER.render(homework_name, homework_status)
+    _logger.debug(
+        'Работа %s, статус %s, комментарий ревьюера: %s',
+        homework_name, homework_status, homework['reviewer_comment'],
+        extra={'homework_id': homework.get('id')}
+    )
+    return message
 
-    verdict = VERDICTS_REVIEWER[homework_status]
-    _logger.debug(f'Вердикт - {verdict}')
 
-    return (
-        f'Изменился статус проверки работы "{homework_name}". {verdict}'
-        # f'{reviewer_comment}'
+def get_not_empty_answer(current_timestamp: int, session=None,
+                         cache=None, breaker=None) -> dict:
+    """Запрашивает API и проверяет, что ответ не пустой."""
+    response = request_api_answer(
+        current_timestamp, HEADERS, session, cache, breaker
     )
+    if not response:
+        raise RequestAPIYandexPracticumError(
+            'Ответ от API практикума пустой'
+        )
+    return response
 
 
 def check_tokens() -> bool:
@@ -128,53 +277,350 @@ def check_tokens() -> bool:
     return all([PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID])
 
 
-def main():
-    """Основная логика работы бота."""
+def check_environment():
+    """Бросает ENVError, если переменные окружения недоступны."""
     if check_tokens():
         _logger.debug('Переменные окружения доступны')
-    else:
-        error = 'Переменные окружения недоступны, проверьте файл .env'
-        _logger.error(error)
-        raise ENVError(error)
+        return
+    error = 'Переменные окружения недоступны, проверьте файл .env'
+    _logger.error(error)
+    raise ENVError(error)
 
-    message_cash = ''
-    message = ''
 
-    bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    current_timestamp = int(time.time())
+def reload_config() -> set:
+    """
+    Перечитывает файл .env и переменные окружения без перезапуска.
+    Возвращает имена изменившихся настроек из RELOADABLE.
+    """
+    global PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, RETRY_TIME
+    global HEADERS
+    before = {name: globals()[name] for name in RELOADABLE}
+    load_dotenv(ENV_FILE, override=True)
+    PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
+    TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
+    TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+    RETRY_TIME = int(os.getenv('RETRY_TIME', 60))
+    HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+    changed = {
+        name for name in RELOADABLE if globals()[name] != before[name]
+    }
+    _logger.info(
+        'Настройки перечитаны, изменились: %s',
+        ', '.join(sorted(changed)) or 'ничего'
+    )
+    return changed
+
+
+def load_tracker(checkpoint: Checkpoint, deliveries=None):
+    """Трекер изменений и current_date аккаунта из checkpoint."""
+    key = Subscription(PRACTICUM_TOKEN, TELEGRAM_CHAT_ID).key
+    current_date, seen = checkpoint.load().get(key, (None, {}))
+    current_date = current_date or int(time.time())
+    return (
+        ChangeTracker(seen, checkpoint, key, deliveries, current_date),
+        current_date
+    )
 
-    while True:
+
+def apply_reload(outbox, scheduler: PollScheduler, checkpoint: Checkpoint,
+                 tracker: ChangeTracker, current_timestamp: int):
+    """
+    Перечитывает настройки и применяет их к работающему боту.
+    Если сменился аккаунт или чат, состояние прежнего сохраняется,
+    а трекер и current_date загружаются для нового.
+    Возвращает трекер и current_date.
+    """
+    import telegram
+
+    changed = reload_config()
+    scheduler.base_interval = RETRY_TIME
+    if 'TELEGRAM_TOKEN' in changed:
+        outbox.send = create_sender(
+            telegram.Bot(token=TELEGRAM_TOKEN),
+            getattr(outbox.send, 'breaker', None)
+        )
+    if changed & {'PRACTICUM_TOKEN', 'TELEGRAM_CHAT_ID'}:
+        checkpoint.flush(force=True)
+        return load_tracker(checkpoint, tracker.deliveries)
+    return tracker, current_timestamp
+
+
+def wait_for_lease(lease, lifecycle: Lifecycle, checkpoint: Checkpoint,
+                   tracker: ChangeTracker):
+    """
+    Ждёт аренду, пока ведущая реплика опрашивает API.
+    Перед ожиданием сохраняет состояние, после - читает его заново:
+    за это время уведомления отправляла другая реплика.
+    Возвращает трекер и current_date.
+    """
+    checkpoint.flush(force=True)
+    while not lease.held and not lifecycle.stopping:
+        lifecycle.sleep(lease.renew_interval)
+        if lifecycle.take_reload():
+            reload_config()
+    return load_tracker(checkpoint, tracker.deliveries)
+
+
+def send_changes(outbox, tracker: ChangeTracker, homeworks: list,
+                 chat_id=None, history=None, destinations=()):
+    """
+    Ставит в очередь сообщения обо всех изменившихся работах.
+    Сообщение готовится один раз и отправляется в chat_id
+    и всем destinations, кроме уже отправленных по журналу доставок.
+    Если передан history, переходы записываются в историю статусов.
+    Работа, по которой не удалось подготовить сообщение, пропускается
+    с записью в лог, остальные работы ответа обрабатываются.
+    Возвращает статус последней изменившейся работы или None.
+    """
+    chat_id = chat_id or TELEGRAM_CHAT_ID
+    targets = (chat_id, *destinations)
+    status = None
+    for homework in tracker.changes(homeworks):
         try:
-            if message and message != message_cash:
-                send_message(bot, message)
-                message_cash = message
+            message = parse_status(homework)
+        except KeyError as error:
+            count_error(error)
+            _logger.error(
+                'Работа %s пропущена: %s', homework_key(homework), error,
+                extra={'homework_id': homework.get('id')}
+            )
+            tracker.commit(homework)
+            continue
+        pending = tracker.pending_targets(homework, targets)
+        on_done = tracker.mark(homework, len(pending))
+        for target in pending:
+            outbox.put(
+                target, message,
+                tracker.sent_callback(homework, target, on_done),
+                key=tracker.message_key(homework, target)
+            )
+        if history is not None:
+            history.record(tracker.key, chat_id, homework)
+        status = homework['status']
+    return status
+
+
+def handle_response(response: dict, outbox, tracker: ChangeTracker,
+                    status_cache=None, chat_id=None, history=None,
+                    destinations=()):
+    """
+    Проверяет ответ API и ставит в очередь сообщения об изменениях.
+    Ответ, совпавший с предыдущим, не проверяется. Работы проверяются
+    за один проход parse_homeworks, ошибки всех работ пишутся в лог
+    одной записью; работу с ошибкой затем пропускает send_changes.
+    Возвращает статус последней изменившейся работы или None.
+    """
+    if isinstance(response, UnchangedResponse):
+        return None
+    list_homeworks, errors = parse_homeworks(
+        check_response(response), VERDICTS_REVIEWER
+    )
+    if errors:
+        error = ResponseValidationError(errors)
+        count_error(error)
+        _logger.error(error)
+    if status_cache is not None:
+        status_cache.update(chat_id or TELEGRAM_CHAT_ID, list_homeworks)
+    return send_changes(
+        outbox, tracker, list_homeworks, chat_id, history, destinations
+    )
+
+
+def api_unavailable(error: Exception) -> bool:
+    """
+    Проверяет, что сбой касается API практикума целиком.
+    Нет ответа, ответ 5xx или тело не JSON (страница техработ),
+    а не ошибка одного аккаунта.
+    """
+    if isinstance(error, RequestAPIYandexPracticumError):
+        return error.status_code is None or error.status_code >= 500
+    return isinstance(error, json.JSONDecodeError)
+
+
+def telegram_unavailable(error: Exception) -> bool:
+    """
+    Проверяет, что сбой касается телеграм целиком.
+    Сетевая ошибка или таймаут; ошибки конкретного чата
+    и ограничение частоты (RetryAfter) не считаются.
+    """
+    import telegram
+
+    cause = error.__cause__
+    return isinstance(cause, telegram.error.NetworkError) and not isinstance(
+        cause, telegram.error.BadRequest
+    )
+
+
+def announce_outage(outbox, chat_id, breaker: CircuitBreaker, old: str,
+                    new: str):
+    """
+    Сообщает в чат о начале и конце сбоя API практикума.
+    Повторные размыкания во время одного сбоя не сообщаются.
+    """
+    if not chat_id:
+        return
+    if new == OPEN and old == CLOSED:
+        outbox.put(
+            chat_id,
+            f'Сбой в работе программы: API практикума недоступно, '
+            f'запросы приостановлены. {breaker.last_error}'
+        )
+    elif new == CLOSED:
+        outbox.put(chat_id, 'API практикума снова доступно, опрос возобновлён')
+
+
+def create_api_breaker(outbox=None, chat_id=None):
+    """
+    Создаёт предохранитель запросов к API практикума.
+    Он общий для всех аккаунтов процесса. Если передан outbox,
+    о начале и конце сбоя сообщается в chat_id.
+    """
+    if not CIRCUIT_BREAKER:
+        return None
+    return CircuitBreaker(
+        'API практикума', is_failure=api_unavailable,
+        on_change=None if outbox is None else partial(
+            announce_outage, outbox, chat_id
+        )
+    )
+
+
+def create_telegram_breaker():
+    """Предохранитель отправки в телеграм."""
+    if not CIRCUIT_BREAKER:
+        return None
+    return CircuitBreaker('телеграм', is_failure=telegram_unavailable)
+
+
+def report_error(outbox, error: Exception, error_cash: str,
+                 chat_id=None, breaker=None) -> str:
+    """
+    Логирует сбой и ставит сообщение о нём в очередь.
+    Повторный такой же сбой не отправляется. Сбой, который считает
+    предохранитель breaker, только логируется: о недоступности API
+    сообщает сам предохранитель.
+    Возвращает последнее сообщение о сбое.
+    """
+    if isinstance(error, CircuitOpenError):
+        _logger.debug(error, extra={'chat_id': chat_id})
+        return error_cash
+    count_error(error)
+    message = f'Сбой в работе программы: {error}'
+    _logger.error(
+        f'[{chat_id}] {message}' if chat_id else message,
+        extra={'chat_id': chat_id}
+    )
+    if breaker is not None and breaker.is_failure(error):
+        return error_cash
+    if message != error_cash:
+        outbox.put(chat_id or TELEGRAM_CHAT_ID, message)
+    return message
+
+
+def handle_poll_error(outbox, error: Exception, error_cash: str,
+                      scheduler: PollScheduler, cache=None,
+                      breaker=None) -> str:
+    """
+    Учитывает сбой опроса и сообщает о нём.
+    Ошибка API увеличивает паузу, остальные сбрасывают кэш ответа.
+    Возвращает последнее сообщение о сбое.
+    """
+    if isinstance(error, (CircuitOpenError, RequestAPIYandexPracticumError)):
+        scheduler.failure(error.retry_after)
+    elif cache is not None:
+        cache.invalidate(HEADERS)
+    return report_error(outbox, error, error_cash, breaker=breaker)
 
-            response = get_api_answer(current_timestamp)
 
-            if not response:
-                raise RequestAPIYandexPracticumError(
-                    'Ответ от API практикума пустой'
-                )
+def save_state(checkpoint: Checkpoint, history=None):
+    """Сохраняет состояние, если пора, и историю статусов за цикл."""
+    checkpoint.flush()
+    if history is not None:
+        history.flush()
 
-            list_homeworks = check_response(response)
 
-            if list_homeworks:
-                message = parse_status(list_homeworks[0])
+def stop_bot(outbox, checkpoint: Checkpoint, history=None, lease=None):
+    """Останавливает бота: очередь, состояние, история, аренда."""
+    shutdown(outbox, checkpoint)
+    save_state(checkpoint, history)
+    if lease is not None:
+        lease.stop()
 
-            current_timestamp = response['current_date']
 
-        except SendMessageError as error:
-            _logger.error(f'Сообщение в телеграм не отправлено. {error}')
+def main():
+    """Основная логика работы бота."""
+    import telegram
+
+    setup_logging(LOGGER_CONFIG)
+    check_environment()
+    lifecycle = Lifecycle().watch(ENV_FILE).install()
+
+    error_cash = ''
+
+    bot = telegram.Bot(token=TELEGRAM_TOKEN)
+    lease = create_lease()
+    deliveries = create_delivery_log()
+    outbox = Outbox(
+        create_sender(bot, create_telegram_breaker()), lease=lease,
+        deliveries=deliveries
+    ).start()
+    QUEUE_DEPTH.set_function(outbox.__len__)
+    if METRICS_ENABLED:
+        start_metrics_server()
+    history = create_history()
+    status_cache = StatusCache(store=history)
+    if TELEGRAM_COMMANDS:
+        CommandListener(
+            telegram.Bot(token=TELEGRAM_TOKEN), status_cache, outbox,
+            lease=lease
+        ).start()
+    session = create_session(pool_size=1)
+    cache = ResponseCache() if RESPONSE_CACHE else None
+    breaker = create_api_breaker(outbox, TELEGRAM_CHAT_ID)
+    scheduler = PollScheduler(base_interval=RETRY_TIME)
+    checkpoint = Checkpoint()
+    tracker, current_timestamp = load_tracker(checkpoint, deliveries)
+
+    while not lifecycle.stopping:
+        if lease is not None and not lease.held:
+            tracker, current_timestamp = wait_for_lease(
+                lease, lifecycle, checkpoint, tracker
+            )
+            continue
+        try:
+            response = get_not_empty_answer(
+                current_timestamp, session, cache, breaker
+            )
+            status = handle_response(
+                response, outbox, tracker, status_cache, history=history,
+                destinations=NOTIFY_DESTINATIONS
+            )
+            scheduler.success(status)
+            current_timestamp = tracker.advance(response['current_date'])
+            mark_success()
+            error_cash = ''
 
         except HomeWorkIsEmpty as error:
             _logger.error(error)
+            count_error(error)
+            mark_success()
+            scheduler.success()
+            current_timestamp = tracker.advance(current_timestamp)
 
         except Exception as error:
-            message = f'Сбой в работе программы: {error}'
-            _logger.error(message)
+            error_cash = handle_poll_error(
+                outbox, error, error_cash, scheduler, cache, breaker
+            )
 
         finally:
-            time.sleep(RETRY_TIME)
+            save_state(checkpoint, history)
+        lifecycle.sleep(scheduler.next_delay())
+        if lifecycle.take_reload():
+            tracker, current_timestamp = apply_reload(
+                outbox, scheduler, checkpoint, tracker, current_timestamp
+            )
+
+    stop_bot(outbox, checkpoint, history, lease)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,70 @@
+import logging
+import os
+
+_logger = logging.getLogger('bot_logger')
+
+
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 10))
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 3.05))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 10))
+HTTP2 = os.getenv('HTTP2', '') == '1'
+
+TIMEOUT = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+
+class HTTPXSession:
+    """
+    Обёртка над httpx.Client с интерфейсом requests.Session.get.
+    Нужна только для HTTP/2, таймауты (connect, read) переводятся
+    в httpx.Timeout.
+    """
+
+    def __init__(self, pool_size: int):
+        import httpx
+
+        self._httpx = httpx
+        self.client = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size
+            )
+        )
+
+    def get(self, url, headers=None, params=None, timeout=TIMEOUT):
+        """GET запрос через общий пул HTTP/2 соединений."""
+        connect, read = timeout
+        return self.client.get(
+            url, headers=headers, params=params,
+            timeout=self._httpx.Timeout(read, connect=connect)
+        )
+
+    def close(self):
+        """Закрывает соединения пула."""
+        self.client.close()
+
+
+def create_session(pool_size: int = HTTP_POOL_SIZE, http2: bool = HTTP2):
+    """
+    Создаёт сессию с keep-alive пулом соединений на pool_size сокетов.
+    Сессия переиспользует TCP/TLS соединения между опросами.
+    При http2=True и установленном httpx[http2] используется HTTP/2.
+    """
+    if http2:
+        try:
+            return HTTPXSession(pool_size)
+        except ImportError:
+            _logger.warning(
+                'Для HTTP/2 нужен пакет httpx[http2], используется HTTP/1.1'
+            )
+
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1, pool_maxsize=pool_size, pool_block=True
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
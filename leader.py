@@ -0,0 +1,235 @@
+import hashlib
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+_logger = logging.getLogger('bot_logger')
+
+
+LEASE_FILE = os.getenv('LEASE_FILE', '')
+LEASE_TTL = float(os.getenv('LEASE_TTL', 15))
+LEASE_OWNER = os.getenv('LEASE_OWNER', '')
+DELIVERY_KEY_TTL = float(os.getenv('DELIVERY_KEY_TTL', 7 * 24 * 3600))
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    generation INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS deliveries (
+    key TEXT PRIMARY KEY,
+    sent_at REAL NOT NULL
+);
+'''
+
+
+def connect(path: str):
+    """Соединение с общим файлом координации в режиме WAL."""
+    connection = sqlite3.connect(
+        path, check_same_thread=False, timeout=30, isolation_level=None
+    )
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def default_owner() -> str:
+    """Имя реплики: LEASE_OWNER или хост и pid."""
+    return LEASE_OWNER or f'{socket.gethostname()}:{os.getpid()}'
+
+
+class Lease:
+    """
+    Аренда права опрашивать: в общем SQLite файле у аренды name
+    один владелец до expires_at. Ведущая реплика продлевает аренду
+    каждые ttl / 3 секунд из отдельного потока, резервная с той же
+    частотой пробует её забрать. Если ведущая реплика пропала,
+    резервная становится ведущей не позже чем через
+    ttl + renew_interval секунд.
+
+    held считается по локальным часам и истекает раньше записи в файле
+    на половину renew_interval: реплика, не сумевшая продлить аренду,
+    перестаёт отправлять до того, как аренду сможет забрать другая.
+    Часы реплик должны совпадать, то есть реплики работают на одном
+    хосте или с синхронизированным временем.
+    """
+
+    def __init__(self, path: str = LEASE_FILE, name: str = 'main',
+                 owner: str = None, ttl: float = LEASE_TTL):
+        self.path = path
+        self.name = name
+        self.owner = owner or default_owner()
+        self.ttl = ttl
+        self.renew_interval = ttl / 3
+        self.generation = None
+        self._valid_until = 0.0
+        self._leader = False
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._connection = connect(path)
+
+    @property
+    def held(self) -> bool:
+        """Реплика держит аренду и может опрашивать и отправлять."""
+        return time.monotonic() < self._valid_until
+
+    def _take(self, now: float):
+        """Забирает или продлевает аренду, если она свободна или своя."""
+        connection = self._connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT owner, expires_at, generation FROM leases '
+                'WHERE name = ?', (self.name,)
+            ).fetchone()
+            if row is not None and row[0] != self.owner and row[1] > now:
+                connection.execute('COMMIT')
+                return None
+            generation = 1 if row is None else row[2] + (
+                row[0] != self.owner
+            )
+            connection.execute(
+                'INSERT OR REPLACE INTO leases VALUES (?, ?, ?, ?)',
+                (self.name, self.owner, now + self.ttl, generation)
+            )
+            connection.execute('COMMIT')
+            return generation
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def acquire(self) -> bool:
+        """Одна попытка получить или продлить аренду."""
+        started = time.monotonic()
+        with self._lock:
+            try:
+                generation = self._take(time.time())
+            except sqlite3.Error as error:
+                _logger.error(f'Аренда {self.name} не продлена: {error}')
+                return self.held
+            if generation is None:
+                self._valid_until = 0.0
+            else:
+                self.generation = generation
+                self._valid_until = (
+                    started + self.ttl - self.renew_interval / 2
+                )
+        self._report()
+        return self.held
+
+    def _report(self):
+        leader = self.held
+        if leader != self._leader:
+            self._leader = leader
+            if leader:
+                _logger.info(
+                    f'Аренда {self.name} получена, поколение '
+                    f'{self.generation}: реплика {self.owner} ведущая'
+                )
+            else:
+                _logger.warning(
+                    f'Аренда {self.name} потеряна: реплика {self.owner} '
+                    f'резервная'
+                )
+
+    def release(self):
+        """Освобождает аренду, чтобы резервная реплика забрала её сразу."""
+        with self._lock:
+            self._valid_until = 0.0
+            try:
+                self._connection.execute(
+                    'UPDATE leases SET expires_at = 0 '
+                    'WHERE name = ? AND owner = ?', (self.name, self.owner)
+                )
+            except sqlite3.Error as error:
+                _logger.error(f'Аренда {self.name} не освобождена: {error}')
+        self._report()
+
+    def _run(self):
+        while not self._stopped.wait(self.renew_interval):
+            self.acquire()
+
+    def start(self):
+        """Пробует получить аренду и запускает поток продления."""
+        self.acquire()
+        self._thread = threading.Thread(
+            target=self._run, name=f'lease-{self.name}', daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self, release: bool = True):
+        """Останавливает продление и освобождает аренду."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        if release:
+            self.release()
+
+
+def delivery_key(key: str, homework_id, version: tuple, target) -> str:
+    """Ключ доставки версии работы адресату, одинаковый у всех реплик."""
+    status, date_updated = version
+    return hashlib.sha256(
+        f'{key}:{homework_id}:{status}:{date_updated}:{target}'.encode()
+    ).hexdigest()[:32]
+
+
+class DeliveryLog:
+    """
+    Ключи доставленных уведомлений в общем файле координации.
+    Реплика, забравшая аренду, не отправляет то, что уже отправила
+    прежняя ведущая, даже если та не успела сохранить checkpoint.
+    Ключ пишется сразу после отправки; ключи старше ttl удаляются.
+    """
+
+    def __init__(self, path: str = LEASE_FILE,
+                 ttl: float = DELIVERY_KEY_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._connection = connect(path)
+        self.prune()
+
+    def sent(self, key: str) -> bool:
+        """Уведомление с этим ключом уже отправлено."""
+        with self._lock:
+            return self._connection.execute(
+                'SELECT 1 FROM deliveries WHERE key = ?', (key,)
+            ).fetchone() is not None
+
+    def record(self, key: str):
+        """Отмечает уведомление отправленным."""
+        with self._lock:
+            self._connection.execute(
+                'INSERT OR IGNORE INTO deliveries VALUES (?, ?)',
+                (key, time.time())
+            )
+
+    def prune(self) -> int:
+        """Удаляет ключи старше ttl, возвращает их число."""
+        with self._lock:
+            return self._connection.execute(
+                'DELETE FROM deliveries WHERE sent_at < ?',
+                (time.time() - self.ttl,)
+            ).rowcount
+
+
+def create_lease(name: str = 'main'):
+    """Аренда name в LEASE_FILE или None, если координация отключена."""
+    if not LEASE_FILE:
+        return None
+    return Lease(name=name).start()
+
+
+def create_delivery_log():
+    """Журнал доставок в LEASE_FILE или None без координации."""
+    if not LEASE_FILE:
+        return None
+    return DeliveryLog()
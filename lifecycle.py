@@ -0,0 +1,149 @@
+import logging
+import os
+import signal
+import threading
+import time
+
+_logger = logging.getLogger('bot_logger')
+
+
+SHUTDOWN_TIMEOUT = float(os.getenv('SHUTDOWN_TIMEOUT', 25))
+RELOAD_WATCH = os.getenv('RELOAD_WATCH', '1') == '1'
+RELOAD_CHECK_INTERVAL = float(os.getenv('RELOAD_CHECK_INTERVAL', 5))
+
+ASYNC_TICK = 0.5
+
+
+def modified_time(path: str):
+    """Время изменения файла или None, если файла нет."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class Lifecycle:
+    """
+    Сигналы остановки и перезагрузки настроек для цикла опроса.
+
+    SIGTERM и SIGINT просят остановиться: цикл доделывает начатые
+    запросы, дожидается отправки очереди и сохраняет состояние.
+    SIGHUP или изменение одного из отслеживаемых файлов просят
+    перечитать настройки. Обработчики сигналов только выставляют
+    флаги, пауза между опросами прерывается сразу.
+    """
+
+    def __init__(self, check_interval: float = RELOAD_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._files = {}
+        self._wake = threading.Event()
+        self._stopping = False
+        self._reload = False
+
+    @property
+    def stopping(self) -> bool:
+        return self._stopping
+
+    def watch(self, *paths):
+        """Перезагружать настройки при изменении файлов paths."""
+        if RELOAD_WATCH:
+            for path in paths:
+                self._files[path] = modified_time(path)
+        return self
+
+    def install(self):
+        """Ставит обработчики сигналов, только из главного потока."""
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        if hasattr(signal, 'SIGHUP'):
+            signal.signal(signal.SIGHUP, self._on_reload)
+        return self
+
+    def _on_stop(self, signum, frame):
+        _logger.info(f'Получен сигнал {signal.Signals(signum).name}')
+        self.stop()
+
+    def _on_reload(self, signum, frame):
+        self.request_reload()
+
+    def stop(self):
+        """Просит цикл опроса остановиться."""
+        self._stopping = True
+        self._wake.set()
+
+    def request_reload(self):
+        """Просит цикл опроса перечитать настройки."""
+        self._reload = True
+        self._wake.set()
+
+    def take_reload(self) -> bool:
+        """Была ли просьба перечитать настройки; сбрасывает её."""
+        reload, self._reload = self._reload, False
+        return reload
+
+    def files_changed(self) -> bool:
+        """Изменился ли хотя бы один отслеживаемый файл."""
+        changed = False
+        for path, mtime in self._files.items():
+            current = modified_time(path)
+            if current != mtime:
+                self._files[path] = current
+                changed = True
+        return changed
+
+    def _interrupted(self) -> bool:
+        if self._files and self.files_changed():
+            _logger.info('Файлы настроек изменились')
+            self._reload = True
+        return self._stopping or self._reload
+
+    def sleep(self, timeout: float):
+        """
+        Ждёт timeout секунд. Ожидание прерывается остановкой,
+        SIGHUP или изменением отслеживаемых файлов.
+        """
+        deadline = time.monotonic() + timeout
+        while not self._interrupted():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if self._files:
+                remaining = min(remaining, self.check_interval)
+            self._wake.wait(remaining)
+            self._wake.clear()
+
+    async def sleep_async(self, timeout: float):
+        """Как sleep, но не блокирует event loop."""
+        import asyncio
+
+        deadline = time.monotonic() + timeout
+        next_check = 0.0
+        while True:
+            now = time.monotonic()
+            if self._stopping or self._reload:
+                return
+            if now >= next_check:
+                next_check = now + self.check_interval
+                if self._interrupted():
+                    return
+            remaining = deadline - now
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(remaining, ASYNC_TICK))
+
+
+def shutdown(outbox, checkpoint=None, timeout: float = SHUTDOWN_TIMEOUT):
+    """
+    Дожидается отправки очереди не дольше timeout и сохраняет
+    состояние. Неотправленные уведомления не отмечены доставленными,
+    после запуска они будут отправлены снова.
+    """
+    drained = outbox.stop(timeout)
+    if not drained:
+        _logger.error(
+            f'За {timeout:.0f} c не отправлено сообщений: {len(outbox)}'
+        )
+    if checkpoint is not None:
+        checkpoint.flush(force=True)
+    _logger.info('Бот остановлен')
+    return drained
@@ -0,0 +1,155 @@
+import atexit
+import json
+import logging
+import logging.config
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from contextvars import ContextVar
+
+LOG_QUEUE = os.getenv('LOG_QUEUE', '1') == '1'
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_SAMPLE_WINDOW = float(os.getenv('LOG_SAMPLE_WINDOW', 60))
+LOG_SAMPLE_EVERY = int(os.getenv('LOG_SAMPLE_EVERY', 100))
+LOG_SAMPLE_KEYS = int(os.getenv('LOG_SAMPLE_KEYS', 10000))
+
+LOGGER_NAME = 'bot_logger'
+CONTEXT_FIELDS = ('subscription', 'chat_id', 'homework_id', 'suppressed')
+
+SUBSCRIPTION = ContextVar('subscription', default=None)
+
+
+class ContextFilter(logging.Filter):
+    """Добавляет в запись id подписки, которую сейчас опрашивает поток."""
+
+    def filter(self, record):
+        if not hasattr(record, 'subscription'):
+            record.subscription = SUBSCRIPTION.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Прореживает одинаковые предупреждения и ошибки: в течение window
+    секунд после первой записи пропускается только каждая every-я.
+    Одинаковыми считаются записи из одной строки кода с тем же текстом,
+    например повторяющийся HomeWorkIsEmpty. Число записей, пропущенных
+    после предыдущей попавшей в лог, пишется в поле suppressed следующей,
+    в том числе первой записи нового окна.
+    Записи с истёкшим окном забываются, а помнится не больше max_keys
+    разных записей: тексты с id чатов не копятся без предела.
+    """
+
+    def __init__(self, window: float = LOG_SAMPLE_WINDOW,
+                 every: int = LOG_SAMPLE_EVERY,
+                 max_keys: int = LOG_SAMPLE_KEYS):
+        super().__init__()
+        self.window = window
+        self.every = every
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._seen = {}
+
+    def _prune(self, now: float):
+        """
+        Забывает записи с истёкшим окном и самые старые сверх max_keys.
+        Окна в словаре идут по времени начала, проверяется только начало.
+        """
+        seen = self._seen
+        while seen:
+            key = next(iter(seen))
+            if now - seen[key][0] <= self.window and (
+                len(seen) <= self.max_keys
+            ):
+                break
+            del seen[key]
+
+    def filter(self, record):
+        if record.levelno < logging.WARNING or self.every <= 1:
+            return True
+        key = (record.pathname, record.lineno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            started, count, suppressed = self._seen.get(key, (now, 0, 0))
+            if now - started > self.window:
+                del self._seen[key]
+                started, count = now, 0
+            count += 1
+            passed = count == 1 or not count % self.every
+            self._seen[key] = (started, count, 0 if passed else suppressed + 1)
+            if count == 1:
+                self._prune(now)
+        if not passed:
+            return False
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """Запись лога одной строкой JSON."""
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'function': record.funcName,
+            'line': record.lineno,
+            'message': record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                data[field] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exception'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+def stop_listener(listener):
+    """Дописывает оставшиеся в очереди записи и останавливает поток."""
+    if listener._thread is not None:
+        listener.stop()
+
+
+def setup_logging(config: dict, queued: bool = LOG_QUEUE,
+                  log_format: str = LOG_FORMAT):
+    """
+    Настраивает логирование по config. Если queued, обработчики
+    bot_logger переносятся в фоновый поток QueueListener, а поток
+    опроса только кладёт запись в очередь: запись в файл и ротация
+    log.log больше не выполняются в нём. Возвращает запущенный
+    QueueListener или None. Повторный вызов, например в дочернем
+    процессе, где поток QueueListener родителя не работает,
+    настраивает логирование заново.
+    """
+    logging.config.dictConfig(config)
+    logger = logging.getLogger(LOGGER_NAME)
+    for log_filter in list(logger.filters):
+        if isinstance(log_filter, (ContextFilter, SamplingFilter)):
+            logger.removeFilter(log_filter)
+    logger.addFilter(ContextFilter())
+    logger.addFilter(SamplingFilter())
+    handlers = list(logger.handlers)
+    if log_format == 'json':
+        for handler in handlers:
+            handler.setFormatter(JSONFormatter())
+    if not queued:
+        return None
+
+    records = queue.SimpleQueue()
+    for handler in handlers:
+        logger.removeHandler(handler)
+    logger.addHandler(logging.handlers.QueueHandler(records))
+    listener = logging.handlers.QueueListener(
+        records, *handlers, respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(stop_listener, listener)
+    return listener
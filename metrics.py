@@ -0,0 +1,274 @@
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+
+_logger = logging.getLogger('bot_logger')
+
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', 9108))
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def format_labels(names: tuple, values: tuple, extra: str = '') -> str:
+    """Метки в виде {name="value",...} для строки метрики."""
+    labels = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        labels.append(extra)
+    return '{' + ','.join(labels) + '}' if labels else ''
+
+
+class Metric:
+    """Общая часть метрик: имя, описание, метки и блокировка."""
+
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._lock = threading.Lock()
+
+    def header(self) -> list:
+        """Строки HELP и TYPE."""
+        return [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.type}',
+        ]
+
+    def samples(self) -> list:
+        """Строки со значениями метрики."""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """Метрика в текстовом формате Prometheus."""
+        return '\n'.join(self.header() + self.samples())
+
+
+class Counter(Metric):
+    """Счётчик, значения хранятся отдельно для каждого набора меток."""
+
+    type = 'counter'
+
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        super().__init__(name, documentation, labels)
+        self._values = {}
+
+    def inc(self, *label_values, amount: float = 1):
+        """Увеличивает счётчик для значений меток label_values."""
+        with self._lock:
+            self._values[label_values] = (
+                self._values.get(label_values, 0) + amount
+            )
+
+    def value(self, *label_values) -> float:
+        """Текущее значение счётчика."""
+        return self._values.get(label_values, 0)
+
+    def total(self) -> float:
+        """Сумма счётчика по всем наборам меток."""
+        with self._lock:
+            return sum(self._values.values())
+
+    def samples(self) -> list:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f'{self.name}{format_labels(self.labels, labels)} {value}'
+            for labels, value in values
+        ]
+
+
+class Gauge(Metric):
+    """
+    Текущее значение. Вместо set можно задать функцию,
+    она вызывается при каждом чтении /metrics.
+    """
+
+    type = 'gauge'
+
+    def __init__(self, name: str, documentation: str):
+        super().__init__(name, documentation)
+        self.value = 0.0
+        self.function = None
+
+    def set(self, value: float):
+        """Задаёт значение."""
+        self.value = value
+
+    def set_function(self, function):
+        """Задаёт функцию без аргументов, возвращающую значение."""
+        self.function = function
+
+    def get(self) -> float:
+        """Текущее значение."""
+        return self.function() if self.function is not None else self.value
+
+    def samples(self) -> list:
+        return [f'{self.name} {self.get()}']
+
+
+class Histogram(Metric):
+    """
+    Распределение значений по корзинам. observe стоит одного
+    двоичного поиска и одной блокировки, накопленные суммы по корзинам
+    считаются только при чтении /metrics.
+    """
+
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str,
+                 buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+
+    def observe(self, value: float):
+        """Учитывает одно значение."""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    @property
+    def count(self) -> int:
+        """Число учтённых значений."""
+        return sum(self._counts)
+
+    @property
+    def total(self) -> float:
+        """Сумма учтённых значений."""
+        return self._sum
+
+    def samples(self) -> list:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{self.name}_sum {total}')
+        lines.append(f'{self.name}_count {cumulative}')
+        return lines
+
+
+class Registry:
+    """Набор метрик процесса в текстовом формате Prometheus."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric: Metric) -> Metric:
+        """Добавляет метрику в набор."""
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str,
+                labels: tuple = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str) -> Gauge:
+        return self.register(Gauge(name, documentation))
+
+    def histogram(self, name: str, documentation: str,
+                  buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, buckets))
+
+    def render(self) -> str:
+        """Все метрики для ответа /metrics."""
+        return '\n'.join(metric.render() for metric in self._metrics) + '\n'
+
+
+REGISTRY = Registry()
+
+API_LATENCY = REGISTRY.histogram(
+    'homework_api_request_seconds',
+    'Длительность запроса к API практикума'
+)
+TELEGRAM_LATENCY = REGISTRY.histogram(
+    'homework_telegram_send_seconds',
+    'Длительность отправки сообщения в телеграм'
+)
+ERRORS = REGISTRY.counter(
+    'homework_errors_total',
+    'Сбои опроса по классу исключения', ('exception',)
+)
+QUEUE_DEPTH = REGISTRY.gauge(
+    'homework_outbox_queue_depth',
+    'Сообщений в очереди на отправку'
+)
+LAST_SUCCESS = REGISTRY.gauge(
+    'homework_last_success_timestamp_seconds',
+    'Время последнего успешного опроса API'
+)
+LAST_SUCCESS_AGE = REGISTRY.gauge(
+    'homework_last_success_age_seconds',
+    'Секунд с последнего успешного опроса API'
+)
+LAST_SUCCESS_AGE.set_function(
+    lambda: time.time() - LAST_SUCCESS.value if LAST_SUCCESS.value else 0.0
+)
+
+
+def count_error(error: Exception):
+    """Учитывает сбой в homework_errors_total."""
+    ERRORS.inc(type(error).__name__)
+
+
+def mark_success():
+    """Отмечает успешный опрос API."""
+    LAST_SUCCESS.set(time.time())
+
+
+def start_metrics_server(port: int = METRICS_PORT, host: str = METRICS_HOST,
+                         registry: Registry = REGISTRY):
+    """
+    Запускает HTTP сервер /metrics в фоновом потоке.
+    Возвращает сервер или None, если порт занят: без метрик
+    бот продолжает работать.
+    http.server импортируется только здесь: он нужен не каждому
+    процессу, а время запуска бота растёт на его импорт.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        """Отдаёт метрики по GET /metrics."""
+
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = self.server.registry.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    try:
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+    except OSError as error:
+        _logger.error(f'Не удалось запустить сервер метрик: {error}')
+        return None
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(
+        target=server.serve_forever, name='metrics', daemon=True
+    ).start()
+    _logger.info(
+        f'Метрики доступны на http://{host}:{server.server_port}/metrics'
+    )
+    return server
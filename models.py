@@ -0,0 +1,181 @@
+import sys
+import threading
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+_statuses_lock = threading.Lock()
+STATUS_NAMES = []
+STATUS_CODES = {}
+
+
+def intern_text(value):
+    """Одна копия одинаковых строк на весь процесс, не строки как есть."""
+    return sys.intern(value) if type(value) is str else value
+
+
+def status_code(status) -> int:
+    """
+    Код статуса работы - номер в порядке появления, один байт.
+    Таблица общая на процесс: статусов у API единицы.
+    """
+    code = STATUS_CODES.get(status)
+    if code is None:
+        with _statuses_lock:
+            code = STATUS_CODES.get(status)
+            if code is None:
+                if len(STATUS_NAMES) > 255:
+                    raise ValueError(f'Слишком много статусов: {status}')
+                code = STATUS_CODES[status] = len(STATUS_NAMES)
+                STATUS_NAMES.append(intern_text(status))
+    return code
+
+
+class HomeworkStatus:
+    """
+    Статус работы для команд бота: только поля, по которым
+    parse_status и /status собирают текст. Читается как словарь
+    ответа: record['status'], record.get('homework_name').
+    """
+
+    __slots__ = ('homework_name', 'status')
+
+    def __init__(self, homework_name, status):
+        self.homework_name = homework_name
+        self.status = status
+
+    def get(self, field: str, default=None):
+        if field not in self.__slots__:
+            return default
+        return getattr(self, field)
+
+    def __getitem__(self, field: str):
+        if field not in self.__slots__:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __repr__(self):
+        return f'HomeworkStatus({self.homework_name!r}, {self.status!r})'
+
+
+HOMEWORK_FIELDS = (
+    'id', 'homework_name', 'status', 'reviewer_comment', 'date_updated',
+    'lesson_name',
+)
+_HOMEWORK_FIELDS = frozenset(HOMEWORK_FIELDS)
+_MISSING = object()
+
+
+class Homework:
+    """
+    Проверенная работа из ответа API: компактная запись вместо словаря,
+    имя и статус интернированы. Читается как словарь ответа:
+    record['status'], record.get('id'), 'reviewer_comment' in record.
+    Поля, которых не было в ответе, в записи тоже отсутствуют.
+    """
+
+    __slots__ = HOMEWORK_FIELDS
+
+    def __init__(self, item: dict):
+        get = item.get
+        self.id = get('id', _MISSING)
+        self.homework_name = intern_text(item['homework_name'])
+        self.status = intern_text(item['status'])
+        self.reviewer_comment = get('reviewer_comment', _MISSING)
+        self.date_updated = get('date_updated', _MISSING)
+        self.lesson_name = get('lesson_name', _MISSING)
+
+    def get(self, field: str, default=None):
+        if field not in _HOMEWORK_FIELDS:
+            return default
+        value = getattr(self, field)
+        return default if value is _MISSING else value
+
+    def __getitem__(self, field: str):
+        value = self.get(field, _MISSING)
+        if value is _MISSING:
+            raise KeyError(field)
+        return value
+
+    def __contains__(self, field: str):
+        return self.get(field, _MISSING) is not _MISSING
+
+    def __repr__(self):
+        return f'Homework({self.get("id")!r}, {self.homework_name!r})'
+
+
+def homework_errors(index: int, item, statuses) -> list:
+    """Ошибки одной работы из списка homeworks."""
+    if not isinstance(item, dict):
+        return [f'homeworks[{index}] не dict']
+    errors = []
+    for field in ('homework_name', 'status'):
+        value = item.get(field)
+        if value is None:
+            errors.append(f'homeworks[{index}]: нет ключа "{field}"')
+        elif not isinstance(value, str):
+            errors.append(f'homeworks[{index}]: "{field}" не str')
+    if 'reviewer_comment' not in item:
+        errors.append(f'homeworks[{index}]: нет ключа "reviewer_comment"')
+    status = item.get('status')
+    if statuses is not None and isinstance(status, str) and (
+        status not in statuses
+    ):
+        errors.append(f'homeworks[{index}]: неизвестный статус {status}')
+    return errors
+
+
+def parse_homeworks(items: list, statuses=None) -> tuple:
+    """
+    Проверяет работы ответа за один проход и собирает записи Homework.
+    Если statuses задан, статус работы должен быть в нём.
+    Ошибки всех работ собираются, разбор не прерывается: работа
+    с ошибкой остаётся словарём ответа, чтобы parse_status сообщил
+    о ней, а не словарь отбрасывается.
+    Возвращает (работы, список ошибок).
+    """
+    homeworks = []
+    errors = []
+    for index, item in enumerate(items):
+        if isinstance(item, dict):
+            status = item.get('status')
+            if isinstance(item.get('homework_name'), str) and (
+                isinstance(status, str)
+            ) and 'reviewer_comment' in item and (
+                statuses is None or status in statuses
+            ):
+                homeworks.append(Homework(item))
+                continue
+            homeworks.append(item)
+        errors.extend(homework_errors(index, item, statuses))
+    return homeworks, errors
+
+
+def decode_response(response):
+    """
+    JSON из ответа requests. Если установлен orjson, тело в байтах
+    разбирается им, минуя response.json() с определением кодировки.
+    """
+    body = getattr(response, 'content', None)
+    if orjson is not None and isinstance(body, bytes):
+        return orjson.loads(body)
+    return response.json()
+
+
+def response_errors(response: dict) -> list:
+    """Ошибки верхнего уровня ответа: ключи и типы значений."""
+    errors = []
+    if 'homeworks' not in response:
+        errors.append('нет ключа "homeworks"')
+    elif not isinstance(response['homeworks'], list):
+        errors.append('тип значения "homeworks" не list')
+    if 'current_date' not in response:
+        errors.append('нет ключа "current_date"')
+    elif not isinstance(response['current_date'], int) or isinstance(
+        response['current_date'], bool
+    ):
+        errors.append('тип значения "current_date" не int')
+    return errors
@@ -0,0 +1,261 @@
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+
+from exceptions import CircuitOpenError, SendMessageError
+from ratelimit import TokenBucket
+
+_logger = logging.getLogger('bot_logger')
+
+
+TELEGRAM_CHAT_INTERVAL = float(os.getenv('TELEGRAM_CHAT_INTERVAL', 1))
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 30))
+OUTBOX_WORKERS = int(os.getenv('OUTBOX_WORKERS', 4))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 5))
+
+MESSAGE_MAX_LENGTH = 4096
+RETRY_BACKOFF = 1.0
+SEPARATOR = '\n\n'
+
+
+class Outbox:
+    """
+    Очередь исходящих сообщений в телеграм.
+    Опрос только кладёт сообщения в очередь, отправкой занимаются
+    отдельные потоки. Соблюдаются ограничения телеграм: не чаще раза
+    в chat_interval секунд в один чат и не больше global_rate сообщений
+    в секунду всего. Накопившиеся для одного чата сообщения склеиваются
+    в одно. Неудачная отправка повторяется с растущей паузой,
+    RetryAfter от телеграм соблюдается.
+
+    send(chat_id, text) - функция отправки, бросающая SendMessageError.
+    on_done(delivered) - необязательный обратный вызов для сообщения.
+    breaker - необязательный предохранитель: пока он разомкнут,
+    сообщения ждут в очереди, попытки отправки не расходуются.
+    lease - необязательная аренда: пока реплика её не держит,
+    сообщения так же ждут в очереди.
+    deliveries - необязательный общий журнал доставок: сообщение с ключом,
+    который уже записан в журнал другой репликой, не отправляется.
+    """
+
+    def __init__(self, send, chat_interval: float = TELEGRAM_CHAT_INTERVAL,
+                 global_rate: float = TELEGRAM_GLOBAL_RATE,
+                 workers: int = OUTBOX_WORKERS,
+                 max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+                 backoff: float = RETRY_BACKOFF, breaker=None, lease=None,
+                 deliveries=None):
+        self.send = send
+        self.breaker = breaker
+        self.lease = lease
+        self.deliveries = deliveries
+        self.chat_interval = chat_interval
+        self.bucket = TokenBucket(global_rate)
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self._condition = threading.Condition()
+        self._pending = {}
+        self._ready = []
+        self._in_flight = set()
+        self._next_allowed = {}
+        self._failures = {}
+        self._counter = itertools.count()
+        self._size = 0
+        self._running = False
+        self._threads = []
+
+    def __len__(self):
+        return self._size
+
+    def start(self):
+        """Запускает потоки отправки."""
+        self._running = True
+        for number in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f'outbox-{number}', daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def put(self, chat_id, text: str, on_done=None, key=None):
+        """
+        Ставит сообщение в очередь, не дожидаясь отправки.
+        key - ключ доставки в журнале deliveries.
+        """
+        with self._condition:
+            batch = self._pending.get(chat_id)
+            if batch is None:
+                self._pending[chat_id] = [(text, on_done, key)]
+                if chat_id not in self._in_flight:
+                    self._schedule(chat_id, time.monotonic())
+            else:
+                batch.append((text, on_done, key))
+            self._size += 1
+
+    def _schedule(self, chat_id, at: float):
+        at = max(at, self._next_allowed.get(chat_id, 0.0))
+        heapq.heappush(self._ready, (at, next(self._counter), chat_id))
+        self._condition.notify()
+
+    def _take(self):
+        """Ждёт чат, в который уже можно отправлять, и забирает его пачку."""
+        with self._condition:
+            while True:
+                if not self._running and not self._ready:
+                    return None, None
+                if self._ready:
+                    delay = self._ready[0][0] - time.monotonic()
+                    if delay <= 0:
+                        _, _, chat_id = heapq.heappop(self._ready)
+                        self._in_flight.add(chat_id)
+                        return chat_id, self._coalesce(chat_id)
+                else:
+                    delay = None
+                self._condition.wait(delay)
+
+    def _coalesce(self, chat_id) -> list:
+        """Забирает из очереди чата сообщения, влезающие в одно."""
+        batch = self._pending.pop(chat_id)
+        length = len(batch[0][0])
+        taken = 1
+        for text, _, _ in batch[1:]:
+            length += len(SEPARATOR) + len(text)
+            if length > MESSAGE_MAX_LENGTH:
+                break
+            taken += 1
+        if taken < len(batch):
+            self._pending[chat_id] = batch[taken:]
+        return batch[:taken]
+
+    def _finish(self, chat_id, batch: list, error=None):
+        """Возвращает чат в расписание после попытки отправки."""
+        now = time.monotonic()
+        with self._condition:
+            self._in_flight.discard(chat_id)
+            if error is None:
+                self._failures.pop(chat_id, None)
+                self._next_allowed[chat_id] = now + self.chat_interval
+            else:
+                self._pending[chat_id] = batch + self._pending.get(
+                    chat_id, []
+                )
+                self._size += len(batch)
+                delay = error.retry_after or self.backoff * 2 ** (
+                    self._failures[chat_id] - 1
+                )
+                self._next_allowed[chat_id] = now + delay
+            if chat_id in self._pending:
+                self._schedule(chat_id, now)
+            self._condition.notify_all()
+
+    def _deliver(self, chat_id, batch: list):
+        """Отправляет пачку одним сообщением."""
+        with self._condition:
+            self._size -= len(batch)
+        try:
+            if self.lease is not None and not self.lease.held:
+                raise CircuitOpenError(
+                    'Реплика не ведущая, отправка отложена',
+                    retry_after=self.lease.renew_interval
+                )
+            batch = self._unsent(chat_id, batch)
+            if not batch:
+                self._finish(chat_id, [])
+                return
+            self.bucket.acquire()
+            text = SEPARATOR.join(text for text, _, _ in batch)
+            if self.breaker is None:
+                self.send(chat_id, text)
+            else:
+                self.breaker.call(self.send, chat_id, text)
+        except CircuitOpenError as error:
+            self._finish(chat_id, batch, error)
+            return
+        except SendMessageError as error:
+            failures = self._failures.get(chat_id, 0) + 1
+            self._failures[chat_id] = failures
+            if failures < self.max_attempts:
+                _logger.warning(
+                    f'Повтор отправки в чат {chat_id}, попытка {failures}: '
+                    f'{error}'
+                )
+                self._finish(chat_id, batch, error)
+                return
+            _logger.error(
+                f'Сообщение в чат {chat_id} не отправлено после '
+                f'{failures} попыток. {error}'
+            )
+            self._failures.pop(chat_id, None)
+            self._callback(batch, False)
+            self._finish(chat_id, [])
+            return
+        self._callback(batch, True)
+        self._finish(chat_id, batch)
+
+    def _unsent(self, chat_id, batch: list) -> list:
+        """
+        Убирает из пачки сообщения, которые уже доставила другая реплика:
+        пока сообщение ждало в очереди, аренда могла смениться.
+        """
+        if self.deliveries is None:
+            return batch
+        unsent, sent = [], []
+        for item in batch:
+            key = item[2]
+            if key is not None and self.deliveries.sent(key):
+                sent.append(item)
+            else:
+                unsent.append(item)
+        if sent:
+            _logger.info(
+                f'В чат {chat_id} не отправлено {len(sent)} сообщений: '
+                f'их уже доставила другая реплика'
+            )
+            self._callback(sent, True)
+        return unsent
+
+    def _callback(self, batch: list, delivered: bool):
+        for _, on_done, _ in batch:
+            if on_done is not None:
+                on_done(delivered)
+
+    def _work(self):
+        while True:
+            chat_id, batch = self._take()
+            if chat_id is None:
+                return
+            self._deliver(chat_id, batch)
+
+    def join(self, timeout: float = None) -> bool:
+        """Ждёт, пока очередь опустеет. Возвращает True, если опустела."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._size or self._in_flight:
+                remaining = (
+                    None if deadline is None else deadline - time.monotonic()
+                )
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def stop(self, timeout: float = None) -> bool:
+        """
+        Отправляет оставшиеся сообщения и останавливает потоки.
+        timeout ограничивает всю остановку, а не каждый её шаг.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        drained = self.join(timeout)
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(
+                None if deadline is None
+                else max(0.0, deadline - time.monotonic())
+            )
+        return drained
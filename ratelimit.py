@@ -0,0 +1,52 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Потокобезопасный ограничитель частоты: rate токенов в секунду,
+    не больше capacity подряд.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def tokens(self) -> float:
+        """Свободных токенов сейчас, отрицательное - уже обещанных."""
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+    def reserve(self) -> float:
+        """
+        Забирает токен и возвращает, сколько секунд нужно подождать,
+        прежде чем им воспользоваться.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def release(self):
+        """Возвращает неиспользованный токен."""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + 1)
+
+    def acquire(self):
+        """Забирает токен, при необходимости ожидая его."""
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
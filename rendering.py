@@ -0,0 +1,44 @@
+from functools import lru_cache
+
+RENDER_CACHE_SIZE = 65536
+
+HEADINGS = {
+    'ru': 'Изменился статус проверки работы "{}". ',
+}
+
+
+def compile_templates(verdicts: dict) -> dict:
+    """
+    Собирает шаблоны сообщений по паре (статус, язык).
+    verdicts - {язык: {статус: вердикт}}.
+    """
+    return {
+        (status, locale): HEADINGS[locale] + verdict.replace(
+            '{', '{{'
+        ).replace('}', '}}')
+        for locale, locale_verdicts in verdicts.items()
+        for status, verdict in locale_verdicts.items()
+    }
+
+
+class Renderer:
+    """
+    Готовит текст уведомления об изменении статуса работы.
+    Шаблоны собираются один раз, готовый текст кэшируется по паре
+    (имя работы, статус): имена заданий у студентов совпадают,
+    поэтому кэш попадает чаще, чем по id работы.
+    """
+
+    def __init__(self, verdicts: dict, locale: str = 'ru',
+                 cache_size: int = RENDER_CACHE_SIZE):
+        self.templates = compile_templates(verdicts)
+        self.locale = locale
+        self.render = lru_cache(maxsize=cache_size)(self._render)
+
+    def _render(self, homework_name: str, status: str) -> str:
+        template = self.templates.get((status, self.locale))
+        if template is None:
+            raise KeyError(
+                f'Получен неизвестный статус домашней работы - {status}'
+            )
+        return template.format(homework_name.split('.')[0])
@@ -0,0 +1,176 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import REGISTRY
+from models import decode_response
+
+RESPONSE_CACHE = os.getenv('RESPONSE_CACHE', '1') == '1'
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 10000))
+RESPONSE_CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL', 3600))
+
+NOT_MODIFIED = 304
+CURRENT_DATE = re.compile(rb'"current_date"\s*:\s*(\d+)')
+
+CACHE_REQUESTS = REGISTRY.counter(
+    'homework_response_cache_requests_total',
+    'Ответы API по результату кэша: not_modified, unchanged, miss',
+    ('result',)
+)
+CACHE_BYTES_SAVED = REGISTRY.counter(
+    'homework_response_cache_bytes_saved_total',
+    'Байт ответа API, которые не пришлось скачивать или разбирать'
+)
+
+
+class UnchangedResponse(dict):
+    """
+    Ответ API, совпавший с предыдущим для того же аккаунта.
+    Содержит только current_date, работы в нём не проверяются.
+    """
+
+
+class CacheEntry:
+    """Последний ответ API одного аккаунта."""
+
+    __slots__ = ('etag', 'last_modified', 'digest', 'size', 'stored_at')
+
+    def __init__(self, etag, last_modified, digest, size: int):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.digest = digest
+        self.size = size
+        self.stored_at = time.monotonic()
+
+
+def body_digest(body: bytes):
+    """
+    Хэш тела ответа без поля current_date и само current_date.
+    API возвращает в current_date время сервера, поэтому без него
+    тела ответов без новых работ совпадают. Если поля нет,
+    возвращает (None, None).
+    """
+    match = CURRENT_DATE.search(body)
+    if match is None:
+        return None, None
+    digest = hashlib.blake2b(
+        body[:match.start()] + body[match.end():], digest_size=16
+    ).digest()
+    return digest, int(match.group(1))
+
+
+class ResponseCache:
+    """
+    Кэш последних ответов API практикума по подпискам: key - ключ
+    подписки, по умолчанию токен из заголовка Authorization. Подписки
+    одного аккаунта в разных чатах должны передавать свои ключи, иначе
+    ответ, разобранный для одного чата, для другого будет неизменившимся.
+    Если сервер отдаёт ETag или Last-Modified, следующий запрос
+    условный и ответ 304 не скачивается. Иначе сравнивается хэш тела:
+    при совпадении json() и check_response не вызываются.
+    Хранит не больше max_size подписок, записи старше ttl секунд
+    не используются.
+    """
+
+    def __init__(self, max_size: int = RESPONSE_CACHE_SIZE,
+                 ttl: float = RESPONSE_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(
+            ('not_modified', 'unchanged', 'miss', 'bytes_saved'), 0
+        )
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.stored_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _count(self, result: str, saved: int = 0):
+        self._stats[result] += 1
+        self._stats['bytes_saved'] += saved
+        CACHE_REQUESTS.inc(result)
+        if saved:
+            CACHE_BYTES_SAVED.inc(amount=saved)
+
+    def request_headers(self, headers: dict, key: str = None) -> dict:
+        """Заголовки запроса с условиями по сохранённому ответу."""
+        with self._lock:
+            entry = self._get(key or headers['Authorization'])
+        if entry is None or not (entry.etag or entry.last_modified):
+            return headers
+        headers = dict(headers)
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def parse(self, headers: dict, response, current_timestamp: int,
+              key: str = None) -> dict:
+        """
+        Ответ API для подписки key (аккаунта из headers). Неизменившийся
+        ответ возвращается как UnchangedResponse.
+        """
+        key = key or headers['Authorization']
+        if response.status_code == NOT_MODIFIED:
+            with self._lock:
+                entry = self._get(key)
+                self._count('not_modified', entry.size if entry else 0)
+            return UnchangedResponse(current_date=current_timestamp)
+        body = getattr(response, 'content', None)
+        if not isinstance(body, bytes):
+            return decode_response(response)
+        digest, current_date = body_digest(body)
+        response_headers = getattr(response, 'headers', None) or {}
+        with self._lock:
+            entry = self._get(key)
+            if digest is not None and entry is not None and (
+                entry.digest == digest
+            ):
+                self._count('unchanged', len(body))
+                return UnchangedResponse(current_date=current_date)
+            self._count('miss')
+        payload = decode_response(response)
+        with self._lock:
+            self._entries[key] = CacheEntry(
+                response_headers.get('ETag'),
+                response_headers.get('Last-Modified'),
+                digest, len(body)
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return payload
+
+    def invalidate(self, headers: dict, key: str = None):
+        """
+        Забывает ответ подписки: после сбоя обработки следующий
+        такой же ответ должен быть разобран заново.
+        """
+        with self._lock:
+            self._entries.pop(key or headers['Authorization'], None)
+
+    def take_stats(self) -> dict:
+        """Статистика с прошлого вызова: попадания, промахи, байты."""
+        with self._lock:
+            stats = dict(self._stats)
+            for name in self._stats:
+                self._stats[name] = 0
+        requests = stats['not_modified'] + stats['unchanged'] + stats['miss']
+        stats['hit_rate'] = (
+            (requests - stats['miss']) / requests if requests else 0.0
+        )
+        return stats
@@ -0,0 +1,125 @@
+import os
+import random
+import time
+import zlib
+from email.utils import parsedate_to_datetime
+
+POLL_MIN_INTERVAL = float(os.getenv('POLL_MIN_INTERVAL', 30))
+POLL_BASE_INTERVAL = float(os.getenv('POLL_BASE_INTERVAL', 60))
+POLL_MAX_INTERVAL = float(os.getenv('POLL_MAX_INTERVAL', 900))
+POLL_JITTER = float(os.getenv('POLL_JITTER', 0.1))
+
+IDLE_GROWTH = 1.15
+HISTORY_WEIGHT = 0.3
+HISTORY_FRACTION = 0.25
+
+
+def parse_retry_after(value):
+    """
+    Разбирает заголовок Retry-After: число секунд или HTTP дату.
+    Возвращает количество секунд или None.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def spread_phase(key, window: float) -> float:
+    """
+    Сдвиг опросов подписки key внутри окна window секунд. Зависит
+    только от ключа, поэтому подписки ложатся по окну равномерно
+    и сохраняют место после перезапуска.
+    """
+    return zlib.crc32(str(key).encode()) / 2 ** 32 * window
+
+
+class PollScheduler:
+    """
+    Выбирает паузу до следующего опроса одной подписки.
+    Интервал зависит от текущего статуса работы: работа на ревью
+    опрашивается часто, принятая - редко. Пока статус не меняется,
+    интервал плавно растёт, но не превышает четверти среднего времени
+    между изменениями статуса. После ошибок API пауза растёт
+    экспоненциально, Retry-After от сервера соблюдается.
+    """
+
+    __slots__ = ('min_interval', 'base_interval', 'max_interval', 'jitter',
+                 'status', 'idle_polls', 'failures', 'retry_after',
+                 'last_change', 'change_interval')
+
+    def __init__(self, min_interval: float = POLL_MIN_INTERVAL,
+                 base_interval: float = POLL_BASE_INTERVAL,
+                 max_interval: float = POLL_MAX_INTERVAL,
+                 jitter: float = POLL_JITTER):
+        self.min_interval = min_interval
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.status = None
+        self.idle_polls = 0
+        self.failures = 0
+        self.retry_after = None
+        self.last_change = None
+        self.change_interval = None
+
+    def success(self, status=None, now=None):
+        """
+        Учитывает успешный опрос. status передаётся, если API вернул
+        изменение статуса работы, иначе None.
+        """
+        self.failures = 0
+        self.retry_after = None
+        if status is None:
+            self.idle_polls += 1
+            return
+
+        now = time.monotonic() if now is None else now
+        if self.last_change is not None:
+            interval = now - self.last_change
+            if self.change_interval is None:
+                self.change_interval = interval
+            else:
+                self.change_interval += HISTORY_WEIGHT * (
+                    interval - self.change_interval
+                )
+        self.last_change = now
+        self.status = status
+        self.idle_polls = 0
+
+    def failure(self, retry_after=None):
+        """Учитывает ошибку запроса к API."""
+        self.failures += 1
+        self.retry_after = retry_after
+
+    def status_interval(self) -> float:
+        """Базовый интервал для текущего статуса работы."""
+        if self.status == 'reviewing':
+            return self.min_interval
+        if self.status == 'approved':
+            return self.max_interval
+        return self.base_interval
+
+    def next_delay(self) -> float:
+        """Пауза в секундах до следующего опроса."""
+        if self.failures:
+            delay = self.base_interval * 2 ** min(self.failures, 16)
+        else:
+            delay = self.status_interval() * IDLE_GROWTH ** min(
+                self.idle_polls, 64
+            )
+            if self.change_interval is not None:
+                delay = min(delay, self.change_interval * HISTORY_FRACTION)
+
+        delay = min(max(delay, self.min_interval), self.max_interval)
+        if self.jitter:
+            delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        if self.retry_after is not None:
+            delay = max(delay, self.retry_after)
+        return delay
@@ -0,0 +1,100 @@
+import logging
+import os
+import threading
+from email.message import EmailMessage
+
+from exceptions import SendMessageError
+from http_session import TIMEOUT, create_session
+from scheduler import parse_retry_after
+
+_logger = logging.getLogger('bot_logger')
+
+
+SMTP_HOST = os.getenv('SMTP_HOST', 'localhost')
+SMTP_PORT = int(os.getenv('SMTP_PORT', 25))
+SMTP_FROM = os.getenv('SMTP_FROM', 'homework-bot@localhost')
+SMTP_TIMEOUT = float(os.getenv('SMTP_TIMEOUT', 10))
+EMAIL_SUBJECT = 'Статус домашней работы'
+
+WEBHOOK_PREFIXES = ('http://', 'https://')
+EMAIL_PREFIX = 'mailto:'
+
+
+def sink_type(destination) -> str:
+    """Тип адресата: telegram, webhook или email."""
+    destination = str(destination)
+    if destination.startswith(WEBHOOK_PREFIXES):
+        return 'webhook'
+    if destination.startswith(EMAIL_PREFIX):
+        return 'email'
+    return 'telegram'
+
+
+def send_webhook(session, url: str, message: str):
+    """Отправляет сообщение POST запросом с JSON {"text": ...}."""
+    try:
+        response = session.post(url, json={'text': message}, timeout=TIMEOUT)
+    except Exception as error:
+        raise SendMessageError(f'Ошибка вебхука {url}: {error}') from error
+    if response.status_code >= 300:
+        headers = getattr(response, 'headers', None) or {}
+        raise SendMessageError(
+            f'Вебхук {url} ответил {response.status_code}',
+            retry_after=parse_retry_after(headers.get('Retry-After'))
+        )
+    _logger.info('Сообщение отправлено на вебхук %s', url)
+
+
+def send_email(address: str, message: str, host: str = None,
+               port: int = None):
+    """Отправляет сообщение письмом через SMTP сервер."""
+    import smtplib
+
+    email = EmailMessage()
+    email['From'] = SMTP_FROM
+    email['To'] = address
+    email['Subject'] = EMAIL_SUBJECT
+    email.set_content(message)
+    try:
+        with smtplib.SMTP(
+            host or SMTP_HOST, port or SMTP_PORT, timeout=SMTP_TIMEOUT
+        ) as smtp:
+            smtp.send_message(email)
+    except (OSError, smtplib.SMTPException) as error:
+        raise SendMessageError(f'Ошибка отправки письма: {error}') from error
+    _logger.info('Письмо отправлено на %s', address)
+
+
+class Router:
+    """
+    Функция отправки для Outbox: выбирает способ доставки по адресату.
+    Адресат - id чата или канала телеграм, URL вебхука (http://,
+    https://) или адрес почты (mailto:). Сессия для вебхуков
+    создаётся при первой отправке на вебхук.
+    breaker - необязательный предохранитель телеграм: он решает только
+    за отправку в телеграм, вебхуки и почта идут мимо него.
+    """
+
+    def __init__(self, telegram_send, session=None, breaker=None):
+        self.telegram_send = telegram_send
+        self.breaker = breaker
+        self._session = session
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                self._session = create_session(http2=False)
+            return self._session
+
+    def __call__(self, destination, message: str):
+        kind = sink_type(destination)
+        if kind == 'webhook':
+            send_webhook(self.session, destination, message)
+        elif kind == 'email':
+            send_email(destination[len(EMAIL_PREFIX):], message)
+        elif self.breaker is None:
+            self.telegram_send(destination, message)
+        else:
+            self.breaker.call(self.telegram_send, destination, message)
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import sqlite3
+from contextlib import closing
+from dataclasses import dataclass, field
+
+from exceptions import SubscriptionsError
+
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+
+def parse_destinations(value) -> tuple:
+    """
+    Дополнительные адресаты: список или строка через запятую.
+    Адресат - id чата или канала, URL вебхука или mailto: адрес.
+    """
+    if not value:
+        return ()
+    if not isinstance(value, (list, tuple)):
+        value = str(value).split(',')
+    return tuple(str(item).strip() for item in value if str(item).strip())
+
+
+@dataclass(frozen=True)
+class Subscription:
+    """
+    Подписка: токен Практикума, чат, куда отправлять статусы,
+    и дополнительные адресаты тех же уведомлений.
+    """
+
+    token: str
+    chat_id: str
+    destinations: tuple = ()
+    key: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, 'key', hashlib.sha256(
+            f'{self.token}:{self.chat_id}'.encode()
+        ).hexdigest()[:16])
+
+    @property
+    def headers(self) -> dict:
+        """
+        Заголовки запроса к API. Собираются при каждом запросе,
+        чтобы не держать словарь на каждую подписку.
+        """
+        return {'Authorization': f'OAuth {self.token}'}
+
+    @property
+    def id(self) -> str:
+        """Идентификатор подписки для логов, без раскрытия токена."""
+        return f'{self.chat_id}:{self.token[-4:]}'
+
+
+def _load_json(path: str) -> list:
+    with open(path, encoding='utf8') as file:
+        rows = json.load(file)
+    if not isinstance(rows, list):
+        raise SubscriptionsError(
+            'Файл подписок должен содержать список объектов'
+        )
+    return [
+        (row.get('token'), row.get('chat_id'), row.get('destinations'))
+        for row in rows
+    ]
+
+
+def _load_sqlite(path: str) -> list:
+    with closing(sqlite3.connect(path)) as connection:
+        columns = {
+            row[1] for row in connection.execute(
+                'PRAGMA table_info(subscriptions)'
+            )
+        }
+        destinations = (
+            'destinations' if 'destinations' in columns else 'NULL'
+        )
+        return connection.execute(
+            f'SELECT token, chat_id, {destinations} FROM subscriptions'
+        ).fetchall()
+
+
+def load_subscriptions(path: str) -> list:
+    """
+    Загружает подписки из JSON файла или базы SQLite.
+    Необязательное поле destinations - дополнительные адресаты:
+    в JSON список, в SQLite строка через запятую.
+    Повторяющиеся пары (токен, чат) отбрасываются.
+    """
+    if not os.path.exists(path):
+        raise SubscriptionsError(f'Файл подписок не найден: {path}')
+
+    try:
+        if path.endswith(SQLITE_SUFFIXES):
+            rows = _load_sqlite(path)
+        else:
+            rows = _load_json(path)
+    except (ValueError, AttributeError, sqlite3.Error) as error:
+        raise SubscriptionsError(f'Не удалось прочитать подписки: {error}')
+
+    subscriptions = {}
+    for token, chat_id, destinations in rows:
+        if not token or not chat_id:
+            raise SubscriptionsError(
+                'У каждой подписки должны быть token и chat_id'
+            )
+        subscription = Subscription(
+            str(token), str(chat_id), parse_destinations(destinations)
+        )
+        subscriptions.setdefault(
+            (subscription.token, subscription.chat_id), subscription
+        )
+    return list(subscriptions.values())
@@ -0,0 +1,418 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from bisect import bisect, insort
+
+import homework
+from api_limiter import API_BURST, API_RATE, create_api_limiter
+from checkpoint import Checkpoint
+from config_log import LOGGER_CONFIG
+from engine import SUBSCRIPTIONS_FILE, PollingEngine, create_bot, load
+from exceptions import SubscriptionsError
+from history import create_history
+from leader import create_delivery_log, create_lease
+from lifecycle import SHUTDOWN_TIMEOUT, Lifecycle
+from log_pipeline import setup_logging
+from metrics import (ERRORS, LAST_SUCCESS, METRICS_ENABLED, REGISTRY,
+                     start_metrics_server)
+
+_logger = logging.getLogger('bot_logger')
+
+
+SUPERVISOR_WORKERS = int(
+    os.getenv('SUPERVISOR_WORKERS', os.cpu_count() or 1)
+)
+SUPERVISOR_INTERVAL = float(os.getenv('SUPERVISOR_INTERVAL', 1))
+HEARTBEAT_TIMEOUT = float(os.getenv('HEARTBEAT_TIMEOUT', 120))
+HEARTBEAT_INTERVAL = float(os.getenv('HEARTBEAT_INTERVAL', 15))
+RESPAWN_DELAY = float(os.getenv('RESPAWN_DELAY', 5))
+HASH_REPLICAS = 100
+
+
+def ring_hash(value: str) -> int:
+    """Позиция значения на кольце."""
+    return int.from_bytes(
+        hashlib.blake2b(value.encode(), digest_size=8).digest(), 'big'
+    )
+
+
+class HashRing:
+    """
+    Консистентное хэширование: у каждого воркера replicas точек
+    на кольце, ключ достаётся ближайшей точке по часовой стрелке.
+    При удалении воркера переезжают только его ключи.
+    """
+
+    def __init__(self, nodes=(), replicas: int = HASH_REPLICAS):
+        self.replicas = replicas
+        self._points = []
+        self._owners = {}
+        for node in nodes:
+            self.add(node)
+
+    @property
+    def nodes(self) -> set:
+        return set(self._owners.values())
+
+    def add(self, node):
+        """Добавляет воркер на кольцо."""
+        for replica in range(self.replicas):
+            point = ring_hash(f'{node}:{replica}')
+            self._owners[point] = node
+            insort(self._points, point)
+
+    def remove(self, node):
+        """Убирает воркер с кольца."""
+        for replica in range(self.replicas):
+            point = ring_hash(f'{node}:{replica}')
+            if self._owners.pop(point, None) is not None:
+                self._points.remove(point)
+
+    def node_for(self, key):
+        """Воркер, которому принадлежит ключ."""
+        if not self._points:
+            return None
+        point = ring_hash(str(key))
+        index = bisect(self._points, point) % len(self._points)
+        return self._owners[self._points[index]]
+
+
+def shard(subscriptions: list, ring: HashRing) -> dict:
+    """Раскладывает подписки по воркерам кольца по chat_id."""
+    shards = {node: [] for node in ring.nodes}
+    for subscription in subscriptions:
+        shards[ring.node_for(subscription.chat_id)].append(subscription)
+    return shards
+
+
+class WorkerEngine(PollingEngine):
+    """
+    Движок опроса в процессе-воркере. После каждого цикла принимает
+    новый набор подписок от супервизора и отправляет ему отчёт.
+    Кроме того, отчёт отправляется раз в heartbeat_interval секунд
+    из отдельного потока. В отчёте progress - время последнего
+    завершённого опроса или шага цикла: по нему супервизор отличает
+    долгий цикл под лимитом запросов от зависшего.
+    """
+
+    def __init__(self, worker_id: int, inbox, health, *args, **kwargs):
+        self.worker_id = worker_id
+        self.inbox = inbox
+        self.health = health
+        self.heartbeat_interval = HEARTBEAT_INTERVAL
+        self.last_cycle = 0.0
+        self.progress = time.time()
+        super().__init__(*args, **kwargs)
+
+    def schedule(self, subscription):
+        super().schedule(subscription)
+        self.progress = time.time()
+
+    def end_cycle(self, elapsed: float):
+        self.last_cycle = elapsed
+        self.progress = time.time()
+        super().end_cycle(elapsed)
+        self.receive()
+        self.health.put(self.report())
+
+    def heartbeat(self):
+        """Отправляет отчёты супервизору до остановки воркера."""
+        while not self.lifecycle.stopping:
+            self.health.put(self.report())
+            time.sleep(self.heartbeat_interval)
+
+    def run(self):
+        threading.Thread(
+            target=self.heartbeat, name=f'heartbeat-{self.worker_id}',
+            daemon=True
+        ).start()
+        super().run()
+
+    def receive(self):
+        """Применяет последнее назначение подписок из inbox, если было."""
+        subscriptions = None
+        while True:
+            try:
+                subscriptions = self.inbox.get_nowait()
+            except queue.Empty:
+                break
+        if subscriptions is not None:
+            self.assign(subscriptions)
+            _logger.info(
+                f'Воркер {self.worker_id}: подписок {len(subscriptions)}'
+            )
+
+    def reload(self):
+        """Только настройки: подписки воркеру назначает супервизор."""
+        self.reload_settings()
+
+    def wake(self):
+        """Назначения подписок принимаются и в резерве, без циклов."""
+        self.progress = time.time()
+        super().wake()
+        self.receive()
+
+    def report(self) -> dict:
+        """Отчёт о состоянии воркера для супервизора."""
+        return {
+            'worker': self.worker_id,
+            'pid': os.getpid(),
+            'time': time.time(),
+            'progress': self.progress,
+            'subscriptions': len(self.subscriptions),
+            'standby': self.standby,
+            'cycle_seconds': self.last_cycle,
+            'queue': len(self.outbox),
+            'errors': ERRORS.total(),
+            'last_success': LAST_SUCCESS.value,
+        }
+
+
+def run_worker(worker_id: int, subscriptions: list, inbox, health):
+    """
+    Точка входа процесса-воркера. Лимит запросов к API делится
+    поровну между SUPERVISOR_WORKERS воркерами.
+    """
+    setup_logging(LOGGER_CONFIG)
+    engine = WorkerEngine(
+        worker_id, inbox, health, subscriptions, create_bot(),
+        checkpoint=Checkpoint(), history=create_history(),
+        lease=create_lease(f'shard-{worker_id}'),
+        deliveries=create_delivery_log(),
+        api_limiter=create_api_limiter(
+            API_RATE / SUPERVISOR_WORKERS,
+            max(1.0, API_BURST / SUPERVISOR_WORKERS)
+        )
+    )
+    engine.lifecycle.install()
+    engine.run()
+
+
+class Supervisor:
+    """
+    Запускает workers процессов опроса и раскладывает между ними
+    подписки консистентным хэшированием chat_id. Упавший или
+    зависший воркер убирается с кольца, его подписки получают
+    остальные; через respawn_delay он перезапускается и подписки
+    возвращаются к нему. Состояние подписок переходит между
+    процессами через общий checkpoint, поэтому при переезде возможна
+    повторная отправка уже отправленного уведомления, но не потеря.
+
+    SIGTERM останавливает воркеры и ждёт, пока они отправят очереди
+    и сохранят состояние. SIGHUP или изменение .env и списка подписок
+    перераспределяет подписки и передаёт SIGHUP воркерам.
+    """
+
+    def __init__(self, subscriptions: list,
+                 workers: int = SUPERVISOR_WORKERS, target=run_worker,
+                 heartbeat_timeout: float = HEARTBEAT_TIMEOUT,
+                 respawn_delay: float = RESPAWN_DELAY):
+        self.subscriptions = subscriptions
+        self.workers = workers
+        self.target = target
+        self.heartbeat_timeout = heartbeat_timeout
+        self.respawn_delay = respawn_delay
+        self.context = multiprocessing.get_context()
+        self.health_queue = self.context.Queue()
+        self.ring = HashRing(range(workers))
+        self.assignment = shard(subscriptions, self.ring)
+        self.processes = {}
+        self.inboxes = {}
+        self.reports = {}
+        self.started = {}
+        self.dead = {}
+        self.lifecycle = Lifecycle()
+
+    def spawn(self, worker_id: int):
+        """Запускает процесс воркера с его текущими подписками."""
+        inbox = self.context.Queue()
+        process = self.context.Process(
+            target=self.target, name=f'poll-worker-{worker_id}',
+            args=(
+                worker_id, self.assignment.get(worker_id, []), inbox,
+                self.health_queue
+            ),
+            daemon=True
+        )
+        process.start()
+        self.processes[worker_id] = process
+        self.inboxes[worker_id] = inbox
+        self.started[worker_id] = time.monotonic()
+        self.reports.pop(worker_id, None)
+        _logger.info(
+            f'Воркер {worker_id} запущен, pid {process.pid}, '
+            f'подписок {len(self.assignment.get(worker_id, []))}'
+        )
+
+    def start(self):
+        """Запускает все воркеры."""
+        for worker_id in range(self.workers):
+            self.spawn(worker_id)
+        return self
+
+    def rebalance(self):
+        """Пересчитывает шарды и отправляет изменения живым воркерам."""
+        assignment = shard(self.subscriptions, self.ring)
+        for worker_id, subscriptions in assignment.items():
+            if worker_id in self.processes and (
+                subscriptions != self.assignment.get(worker_id)
+            ):
+                self.inboxes[worker_id].put(subscriptions)
+        self.assignment = assignment
+
+    def collect(self):
+        """Забирает отчёты воркеров."""
+        while True:
+            try:
+                report = self.health_queue.get_nowait()
+            except queue.Empty:
+                return
+            self.reports[report['worker']] = report
+
+    def stalled(self, worker_id: int, now: float) -> bool:
+        """
+        Цикл воркера не продвигался дольше heartbeat_timeout: нет
+        отчётов или в них не меняется время последнего опроса.
+        """
+        report = self.reports.get(worker_id)
+        last = self.started[worker_id] if report is None else max(
+            self.started[worker_id],
+            now - (time.time() - report['progress'])
+        )
+        return now - last > self.heartbeat_timeout
+
+    def bury(self, worker_id: int, process, now: float):
+        """
+        Убирает завершившийся воркер. Подписки ведущего переходят
+        к остальным. Резервный воркер (аренду шарда держит другая
+        реплика) свои подписки не опрашивал, они остаются за ним
+        до перезапуска: иначе их опрашивали бы обе реплики.
+        """
+        report = self.reports.pop(worker_id, None)
+        del self.processes[worker_id]
+        self.dead[worker_id] = now
+        if report is not None and report.get('standby'):
+            _logger.error(
+                f'Резервный воркер {worker_id} завершился с кодом '
+                f'{process.exitcode}, подписки ждут перезапуска'
+            )
+            return
+        _logger.error(
+            f'Воркер {worker_id} завершился с кодом '
+            f'{process.exitcode}, подписки переданы остальным'
+        )
+        self.ring.remove(worker_id)
+        self.rebalance()
+
+    def check(self):
+        """
+        Один шаг надзора: отчёты, поиск упавших и зависших воркеров,
+        перезапуск.
+        """
+        self.collect()
+        now = time.monotonic()
+        for worker_id, process in list(self.processes.items()):
+            if process.is_alive() and self.stalled(worker_id, now):
+                _logger.error(f'Воркер {worker_id} завис, перезапуск')
+                process.kill()
+                process.join(5)
+            if not process.is_alive():
+                self.bury(worker_id, process, now)
+        for worker_id, died_at in list(self.dead.items()):
+            if now - died_at >= self.respawn_delay:
+                del self.dead[worker_id]
+                if worker_id not in self.ring.nodes:
+                    self.ring.add(worker_id)
+                    self.rebalance()
+                self.spawn(worker_id)
+
+    def health(self) -> dict:
+        """Сводное состояние всех воркеров."""
+        now = time.time()
+        reports = list(self.reports.values())
+        last_success = max(
+            (report['last_success'] for report in reports), default=0
+        )
+        return {
+            'workers_alive': len(self.processes),
+            'workers_total': self.workers,
+            'subscriptions': sum(
+                report['subscriptions'] for report in reports
+            ),
+            'queue': sum(report['queue'] for report in reports),
+            'errors': sum(report['errors'] for report in reports),
+            'last_success_age': now - last_success if last_success else None,
+            'workers': sorted(reports, key=lambda report: report['worker']),
+        }
+
+    def reload(self):
+        """Перечитывает настройки и подписки, раздаёт их воркерам."""
+        homework.reload_config()
+        try:
+            self.subscriptions = load()
+        except SubscriptionsError as error:
+            _logger.error(f'Список подписок не перечитан: {error}')
+        self.rebalance()
+        for process in self.processes.values():
+            os.kill(process.pid, signal.SIGHUP)
+
+    def stop(self, timeout: float = SHUTDOWN_TIMEOUT):
+        """
+        Просит воркеры остановиться и ждёт их не дольше timeout,
+        оставшиеся завершаются принудительно.
+        """
+        for process in self.processes.values():
+            process.terminate()
+        deadline = time.monotonic() + timeout
+        for worker_id, process in self.processes.items():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                _logger.error(f'Воркер {worker_id} не остановился вовремя')
+                process.kill()
+                process.join(5)
+        self.processes.clear()
+
+    def run(self, interval: float = SUPERVISOR_INTERVAL):
+        """Запускает воркеры и следит за ними до сигнала остановки."""
+        self.start()
+        try:
+            while not self.lifecycle.stopping:
+                self.lifecycle.sleep(interval)
+                if self.lifecycle.take_reload():
+                    self.reload()
+                self.check()
+        finally:
+            self.stop()
+
+
+def register_metrics(supervisor: Supervisor):
+    """Сводные метрики воркеров для /metrics супервизора."""
+    for name, documentation in (
+        ('workers_alive', 'Живых процессов-воркеров'),
+        ('subscriptions', 'Подписок в опросе у всех воркеров'),
+        ('queue', 'Сообщений в очередях отправки всех воркеров'),
+        ('errors', 'Сбоев опроса у всех воркеров'),
+    ):
+        REGISTRY.gauge(
+            f'homework_supervisor_{name}', documentation
+        ).set_function(lambda name=name: supervisor.health()[name])
+
+
+def main():
+    """Опрос подписок из SUBSCRIPTIONS_FILE несколькими процессами."""
+    setup_logging(LOGGER_CONFIG)
+    supervisor = Supervisor(load())
+    supervisor.lifecycle.watch(homework.ENV_FILE, SUBSCRIPTIONS_FILE).install()
+    if METRICS_ENABLED:
+        register_metrics(supervisor)
+        start_metrics_server()
+    supervisor.run()
+
+
+if __name__ == '__main__':
+    main()
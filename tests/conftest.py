@@ -1,6 +1,11 @@
+import os
 import sys
 from os.path import abspath, dirname
 
+# Тесты движка опрашивают подписки в первом же цикле. Сдвиг первых
+# опросов проверяется отдельно, с настройкой по умолчанию.
+os.environ.setdefault('POLL_SPREAD', '0')
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 
@@ -0,0 +1,237 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tests.utils import (BodyResponse, MockBot, MockResponse, MockSession,
+                         homework_payload)
+
+
+class TestApiLimiter:
+
+    def test_limit_is_off_by_default(self):
+        from api_limiter import API_LIMITER, create_api_limiter
+
+        assert API_LIMITER is None, 'Лимит не ограничивает число подписок'
+        assert create_api_limiter() is None
+
+    def test_ceiling_is_never_exceeded_under_load(self):
+        from api_limiter import ApiLimiter
+
+        rate, burst = 100, 5
+        limiter = ApiLimiter(rate, burst)
+        started = []
+        lock = threading.Lock()
+
+        def request(number):
+            with lock:
+                started.append(time.monotonic())
+            return number
+
+        def worker(thread):
+            for number in range(25):
+                limiter.call((thread, number), request, number)
+
+        with ThreadPoolExecutor(8) as executor:
+            list(executor.map(worker, range(8)))
+
+        started.sort()
+        assert len(started) == 200
+        for first in range(len(started)):
+            for last in range(first, len(started)):
+                window = started[last] - started[first]
+                assert last - first + 1 <= burst + rate * (window + 0.005), (
+                    f'{last - first + 1} запросов за {window:.3f} c: '
+                    f'превышен лимит {burst} + {rate} в секунду'
+                )
+        assert started[-1] - started[0] >= (200 - burst) / rate - 0.05
+
+    def test_duplicate_requests_are_coalesced(self):
+        from api_limiter import ApiLimiter
+
+        limiter = ApiLimiter(1, 1)
+        calls = []
+        barrier = threading.Barrier(10)
+
+        def request():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'homeworks': []}
+
+        def worker(_):
+            barrier.wait()
+            return limiter.call(('OAuth token', 1000), request)
+
+        with ThreadPoolExecutor(10) as executor:
+            results = list(executor.map(worker, range(10)))
+
+        assert len(calls) == 1, 'Одинаковые запросы в полёте делаются один раз'
+        assert all(result is results[0] for result in results)
+        assert limiter.in_flight() == 0
+        assert limiter.bucket.tokens() < 1, 'Повторы токен не тратят'
+
+    def test_error_reaches_every_waiter(self):
+        from api_limiter import ApiLimiter
+        from exceptions import RequestAPIYandexPracticumError
+
+        limiter = ApiLimiter(100, 100)
+        barrier = threading.Barrier(4)
+
+        def request():
+            time.sleep(0.1)
+            raise RequestAPIYandexPracticumError('Ошибка запроса')
+
+        def worker(_):
+            barrier.wait()
+            try:
+                limiter.call('key', request)
+            except RequestAPIYandexPracticumError as error:
+                return error
+            return None
+
+        with ThreadPoolExecutor(4) as executor:
+            errors = list(executor.map(worker, range(4)))
+        assert all(isinstance(error, RequestAPIYandexPracticumError)
+                   for error in errors)
+
+    def test_latency_does_not_include_limiter_wait(self):
+        import metrics
+        from api_limiter import ApiLimiter
+        from homework import request_api_answer
+
+        limiter = ApiLimiter(5, 1)
+        limiter.acquire()
+        session = MockSession(
+            lambda *args, **kwargs: MockResponse({'homeworks': []})
+        )
+        count, total = metrics.API_LATENCY.count, metrics.API_LATENCY.total
+
+        started = time.monotonic()
+        request_api_answer(1000, {}, session, limiter=limiter)
+
+        assert time.monotonic() - started >= 0.15, 'Запрос ждал токен'
+        assert metrics.API_LATENCY.count == count + 1
+        assert metrics.API_LATENCY.total - total < 0.1, (
+            'Ожидание токена не считается задержкой API'
+        )
+
+    def test_coalesced_response_is_parsed_per_subscription(self):
+        from api_limiter import ApiLimiter
+        from homework import request_api_answer
+        from response_cache import ResponseCache, UnchangedResponse
+
+        payload = homework_payload('hw')
+        calls = []
+
+        class Session:
+            def get(self, url, headers=None, params=None, timeout=None):
+                calls.append(params)
+                time.sleep(0.2)
+                return BodyResponse(payload)
+
+        cache = ResponseCache()
+        headers = {'Authorization': 'OAuth token'}
+        cache.parse(headers, BodyResponse(payload), 100, 'chat1')
+        limiter = ApiLimiter(100, 100)
+        barrier = threading.Barrier(2)
+
+        def poll(key):
+            barrier.wait()
+            return request_api_answer(
+                100, headers, Session(), cache, None, limiter, key
+            )
+
+        with ThreadPoolExecutor(2) as executor:
+            seen, new = executor.map(poll, ['chat1', 'chat2'])
+
+        assert len(calls) == 1
+        assert isinstance(seen, UnchangedResponse)
+        assert not isinstance(new, UnchangedResponse), (
+            'Новая подписка получает ответ целиком, а не запись другого чата'
+        )
+        assert new['homeworks'] == payload['homeworks']
+
+
+class TestEngineLimiter:
+
+    def test_chats_of_one_account_share_a_request(self):
+        from api_limiter import ApiLimiter
+        from engine import PollingEngine
+        from subscriptions import Subscription
+
+        requests = []
+
+        def mock_get(url, headers=None, params=None, **kwargs):
+            requests.append(params['from_date'])
+            time.sleep(0.2)
+            return MockResponse(homework_payload('token'))
+
+        engine = PollingEngine(
+            [Subscription('token', str(chat)) for chat in range(8)],
+            MockBot(), max_workers=8, session=MockSession(mock_get),
+            api_limiter=ApiLimiter(100, 100)
+        )
+        with ThreadPoolExecutor(8) as executor:
+            engine.run_cycle(executor)
+        assert engine.outbox.join(5)
+
+        assert len(requests) < 8, (
+            'Чаты одного аккаунта ждут один запрос с тем же from_date'
+        )
+        assert sorted(chat for chat, _ in engine.bot.sent) == [
+            str(chat) for chat in range(8)
+        ]
+
+    def test_polls_are_spread_over_retry_time(self, monkeypatch):
+        import engine as engine_module
+        import homework
+        from engine import PollingEngine
+        from subscriptions import Subscription
+
+        monkeypatch.setattr(engine_module, 'POLL_SPREAD', True)
+        started = time.monotonic()
+        engine = PollingEngine(
+            [Subscription(f'token{i}', str(i)) for i in range(200)],
+            MockBot(), max_workers=8,
+            session=MockSession(lambda *args, **kwargs: None)
+        )
+        engine.outbox.stop()
+
+        offsets = sorted(
+            state.next_poll - started for state in engine.states.values()
+        )
+        window = homework.RETRY_TIME
+        assert 0 <= offsets[0] and offsets[-1] < window + 1
+        buckets = [0] * 10
+        for offset in offsets:
+            buckets[min(9, int(offset / window * 10))] += 1
+        assert max(buckets) < 40, (
+            f'Первые опросы должны ложиться по окну RETRY_TIME равномерно: '
+            f'{buckets}'
+        )
+        assert engine.due() == [], 'Подписки не опрашиваются разом'
+
+    def test_limiter_queue_is_not_an_api_timeout(self):
+        import asyncio
+
+        from api_limiter import ApiLimiter
+        from circuit import CLOSED
+        from engine import AsyncPollingEngine
+        from subscriptions import Subscription
+
+        engine = AsyncPollingEngine(
+            [Subscription(f'token{i}', str(i)) for i in range(20)],
+            MockBot(), max_workers=20, api_timeout=0.5,
+            session=MockSession(
+                lambda url, headers=None, params=None, **kwargs:
+                MockResponse(homework_payload('token'))
+            ),
+            api_limiter=ApiLimiter(10, 1)
+        )
+        asyncio.run(engine.run_cycle())
+        assert engine.outbox.join(5)
+
+        assert engine.api_breaker.state == CLOSED
+        assert engine.api_breaker.failures == 0, (
+            'Ожидание токена своего лимита не считается таймаутом API'
+        )
+        assert len(engine.bot.sent) == 20
@@ -0,0 +1,100 @@
+import calendar
+import threading
+import time
+
+from tests.utils import MockResponse
+
+DAY = 24 * 3600
+SINCE = 1_640_995_200
+
+
+class HistoryApi:
+    """API с работами, обновлёнными раз в день, отдаёт всё после from_date."""
+
+    def __init__(self, homeworks=10):
+        self.homeworks = [
+            {
+                'id': index,
+                'homework_name': f'hw{index}.zip',
+                'status': 'approved',
+                'reviewer_comment': '',
+                'date_updated': time.strftime(
+                    '%Y-%m-%dT%H:%M:%SZ', time.gmtime(SINCE + index * DAY)
+                ),
+            }
+            for index in range(homeworks)
+        ]
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def get(self, url, headers=None, params=None, **kwargs):
+        with self._lock:
+            self.requests.append(time.monotonic())
+        from_date = params['from_date']
+        return MockResponse({
+            'homeworks': [
+                item for item in self.homeworks
+                if item['date_updated'] is None or calendar.timegm(
+                    time.strptime(item['date_updated'], '%Y-%m-%dT%H:%M:%SZ')
+                ) >= from_date
+            ],
+            'current_date': SINCE + 100 * DAY,
+        })
+
+
+class TestBackfill:
+
+    def test_windows_cover_range(self):
+        from backfill import split_windows
+
+        assert split_windows(0, 25, 10) == [(0, 10), (10, 20), (20, 25)]
+
+    def test_overlapping_windows_are_deduplicated(self, tmp_path):
+        from backfill import Backfill
+        from checkpoint import Checkpoint
+        from history import HistoryStore
+        from subscriptions import Subscription
+
+        api = HistoryApi()
+        api.homeworks.append({
+            'id': 'undated', 'homework_name': 'undated.zip',
+            'status': 'reviewing', 'reviewer_comment': '',
+            'date_updated': None,
+        })
+        path = str(tmp_path / 'state.db')
+        checkpoint = Checkpoint(path, flush_interval=3600)
+        history = HistoryStore(str(tmp_path / 'history.db'))
+        subscription = Subscription('token', '1')
+        report = Backfill(
+            [subscription], session=api, workers=4, rate=1000,
+            window=3 * DAY, checkpoint=checkpoint, history=history
+        ).run(SINCE, SINCE + 10 * DAY)
+
+        assert report['requests'] == 4
+        assert report['homeworks'] == 11
+        assert report['duplicates'] == 3, (
+            'Из ответа окна берутся только работы этого окна, '
+            'работа без даты приходит в каждом окне и сводится к одной'
+        )
+        current_date, seen = Checkpoint(path).load()[subscription.key]
+        assert current_date == SINCE + 10 * DAY, (
+            'Курсор не уходит дальше until: работы после него заберёт опрос'
+        )
+        assert len(seen) == 11
+        assert len(history.recent(1, 100)) == 11
+
+    def test_request_rate_ceiling(self):
+        from backfill import Backfill
+        from subscriptions import Subscription
+
+        api = HistoryApi(homeworks=1)
+        Backfill(
+            [Subscription(str(token), str(token)) for token in range(10)],
+            session=api, workers=8, rate=20, window=DAY
+        ).run(SINCE, SINCE + DAY)
+
+        assert len(api.requests) == 10
+        elapsed = max(api.requests) - min(api.requests)
+        assert elapsed >= 9 / 20 * 0.9, (
+            'Запросы не должны превышать заданную частоту'
+        )
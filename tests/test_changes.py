@@ -0,0 +1,228 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from tests.utils import MockBot, MockResponse, MockSession
+
+
+class CountingDict(dict):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lookups = 0
+
+    def get(self, key, default=None):
+        self.lookups += 1
+        return super().get(key, default)
+
+
+def make_homeworks(count, status='reviewing'):
+    return [
+        {
+            'id': i,
+            'homework_name': f'hw{i}.zip',
+            'status': status,
+            'reviewer_comment': '',
+            'date_updated': f'2022-01-01T00:00:{i % 60:02d}Z',
+        }
+        for i in range(count)
+    ]
+
+
+class TestChangeTracker:
+
+    def test_only_true_transitions(self):
+        from changes import ChangeTracker
+
+        tracker = ChangeTracker()
+        homeworks = make_homeworks(3)
+        assert tracker.changes(homeworks) == homeworks
+        for item in homeworks:
+            tracker.commit(item)
+        assert tracker.changes(homeworks) == []
+
+        updated = dict(homeworks[1], status='approved')
+        assert tracker.changes([homeworks[0], updated]) == [updated], (
+            'Изменением считается новый статус работы с тем же id'
+        )
+
+    def test_batch_costs_one_lookup_per_homework(self):
+        from changes import ChangeTracker
+
+        homeworks = make_homeworks(5000)
+        tracker = ChangeTracker()
+        for item in homeworks:
+            tracker.commit(item)
+        tracker._seen = CountingDict(tracker._seen)
+
+        assert tracker.changes(homeworks) == []
+        assert tracker._seen.lookups == len(homeworks), (
+            'Проверка пакета из N работ должна стоить N обращений к словарю'
+        )
+
+    def test_version_table_matches_dict(self):
+        import random
+
+        from changes import VersionTable
+
+        random.seed(3)
+        table, expected = VersionTable(), {}
+        for _ in range(500):
+            key = random.choice([
+                random.randrange(-50, 50), f'hw{random.randrange(5)}.zip',
+                2 ** 70
+            ])
+            expected[key] = table[key] = random.getrandbits(63)
+        assert len(table) == len(expected)
+        assert dict(table.items()) == expected
+        assert all(table[key] == expected[key] for key in expected)
+        assert table.get(51) is None
+        assert len(table.table) == 2 * sum(
+            1 for key in expected if isinstance(key, int) and key < 2 ** 63
+        ), 'Колонка версий не держит запаса под рост'
+
+    def test_without_id_uses_name(self):
+        from changes import homework_key
+
+        assert homework_key({'homework_name': 'hw.zip'}) == 'hw.zip'
+
+
+class MockOutbox:
+
+    def __init__(self):
+        self.queued = []
+
+    def put(self, chat_id, text, on_done=None, key=None):
+        self.queued.append((chat_id, text, on_done))
+
+
+class MockCheckpoint:
+
+    def __init__(self):
+        self.cursors = {}
+        self.homeworks = {}
+
+    def save_cursor(self, key, current_date):
+        self.cursors[key] = current_date
+
+    def save_homework(self, key, homework_id, version):
+        self.homeworks[(key, homework_id)] = version
+
+
+class TestSendChanges:
+
+    def test_every_changed_homework_is_queued_once(self):
+        import homework
+        from changes import ChangeTracker
+
+        outbox = MockOutbox()
+        tracker = ChangeTracker()
+        homeworks = make_homeworks(10)
+
+        status = homework.send_changes(outbox, tracker, homeworks, 1)
+        assert status == 'reviewing'
+        assert len(outbox.queued) == 10
+
+        assert homework.send_changes(outbox, tracker, homeworks, 1) is None
+        assert len(outbox.queued) == 10, (
+            'Без изменений статусов сообщения не ставятся в очередь'
+        )
+
+    def test_broken_homework_does_not_stop_the_batch(self):
+        import homework
+        from changes import ChangeTracker
+
+        outbox = MockOutbox()
+        tracker = ChangeTracker()
+        broken, valid = make_homeworks(2)
+        broken = dict(broken, status='weird')
+        valid = dict(valid, status='approved')
+
+        for _ in range(3):
+            homework.send_changes(outbox, tracker, [broken, valid], 1)
+        assert len(outbox.queued) == 1, (
+            'Работа с неизвестным статусом не мешает остальным'
+        )
+        assert tracker.changes([broken, valid]) == [], (
+            'Сломанная работа не разбирается в каждом цикле заново'
+        )
+
+    def test_state_is_saved_after_delivery(self):
+        import homework
+        from changes import ChangeTracker
+
+        outbox = MockOutbox()
+        checkpoint = MockCheckpoint()
+        tracker = ChangeTracker(checkpoint=checkpoint, key='sub')
+
+        homework.send_changes(outbox, tracker, make_homeworks(2), 1)
+        tracker.advance(1000)
+        assert checkpoint.cursors == {} and checkpoint.homeworks == {}, (
+            'До доставки уведомлений состояние не сохраняется'
+        )
+
+        outbox.queued[0][2](True)
+        assert len(checkpoint.homeworks) == 1
+        assert checkpoint.cursors == {}
+        outbox.queued[1][2](True)
+        assert checkpoint.cursors == {'sub': 1000}, (
+            'current_date сохраняется после доставки всех уведомлений'
+        )
+
+    def test_failed_delivery_is_repeated(self):
+        import homework
+        from changes import ChangeTracker
+
+        outbox = MockOutbox()
+        checkpoint = MockCheckpoint()
+        tracker = ChangeTracker(checkpoint=checkpoint, key='sub', cursor=1000)
+        delivered, lost = make_homeworks(2)
+
+        homework.send_changes(outbox, tracker, [delivered, lost], 1)
+        assert tracker.advance(2000) == 2000
+        outbox.queued[0][2](True)
+        outbox.queued[1][2](False)
+
+        assert checkpoint.cursors == {'sub': 1000}, (
+            'Курсор не сохраняется дальше недоставленного изменения'
+        )
+        assert list(checkpoint.homeworks) == [('sub', delivered['id'])]
+        assert tracker.changes([delivered, lost]) == [lost], (
+            'Недоставленное изменение находится снова'
+        )
+        assert tracker.advance(3000) == 1000, (
+            'Опрос повторяется с from_date ответа с недоставленным изменением'
+        )
+        assert tracker.advance(3000) == 3000
+
+
+class TestEngineChanges:
+
+    def test_unchanged_batch_sends_nothing(self):
+        from engine import PollingEngine
+        from subscriptions import Subscription
+
+        payload = {'homeworks': make_homeworks(100), 'current_date': 1000}
+
+        subscription = Subscription('token', '1')
+        engine = PollingEngine(
+            [subscription], MockBot(),
+            session=MockSession(
+                lambda *args, **kwargs: MockResponse(payload)
+            )
+        )
+
+        with ThreadPoolExecutor(1) as executor:
+            engine.run_cycle(executor)
+            assert engine.outbox.join(5)
+            engine.states[subscription].next_poll = 0
+            engine.run_cycle(executor)
+            assert engine.outbox.join(5)
+
+        notifications = sum(
+            text.count('Изменился статус') for _, text in engine.bot.sent
+        )
+        assert notifications == 100, (
+            'Повторный опрос без изменений не должен отправлять сообщения'
+        )
+        assert len(engine.bot.sent) < 100, (
+            'Сообщения в один чат должны склеиваться'
+        )
@@ -0,0 +1,69 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from tests.utils import MockBot, RecordingSession
+
+
+class TestCheckpoint:
+
+    def test_roundtrip(self, tmp_path):
+        from checkpoint import Checkpoint
+
+        path = str(tmp_path / 'state.db')
+        checkpoint = Checkpoint(path)
+        checkpoint.save_cursor('sub', 1000)
+        checkpoint.save_homework('sub', 7, ('approved', '2022'))
+        checkpoint.save_homework('sub', 'hw.zip', ('reviewing', None))
+        checkpoint.close()
+
+        state = Checkpoint(path).load()
+        assert state == {
+            'sub': (1000, {7: ('approved', '2022'),
+                           'hw.zip': ('reviewing', None)})
+        }, 'Тип id работы должен сохраняться'
+
+    def test_flush_is_batched(self, tmp_path):
+        from checkpoint import Checkpoint
+
+        checkpoint = Checkpoint(str(tmp_path / 'state.db'), flush_interval=60)
+        checkpoint.save_cursor('sub', 1000)
+        assert checkpoint.flush() == 0, (
+            'До истечения flush_interval запись не выполняется'
+        )
+        assert checkpoint.flush(force=True) == 1
+
+
+class TestEngineRestart:
+
+    def test_restart_resumes_without_resend(self, tmp_path):
+        from checkpoint import Checkpoint
+        from engine import PollingEngine
+        from subscriptions import Subscription
+
+        path = str(tmp_path / 'state.db')
+        subscription = Subscription('token', '1')
+
+        engine = PollingEngine(
+            [subscription], MockBot(), session=RecordingSession(),
+            checkpoint=Checkpoint(path)
+        )
+        with ThreadPoolExecutor(1) as executor:
+            engine.run_cycle(executor)
+        assert engine.outbox.join(5)
+        engine.checkpoint.close()
+        assert len(engine.bot.sent) == 1
+
+        session = RecordingSession()
+        engine = PollingEngine(
+            [subscription], MockBot(), session=session,
+            checkpoint=Checkpoint(path)
+        )
+        with ThreadPoolExecutor(1) as executor:
+            engine.run_cycle(executor)
+        assert engine.outbox.join(5)
+
+        assert session.from_dates == [1000], (
+            'После перезапуска опрос продолжается с сохранённого current_date'
+        )
+        assert engine.bot.sent == [], (
+            'После перезапуска уже отправленные статусы не повторяются'
+        )
@@ -0,0 +1,172 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import pytest
+
+from tests.utils import MockBot, MockResponse, MockSession
+
+
+def payload():
+    return {'homeworks': [], 'current_date': 1000}
+
+
+class TestCircuitBreaker:
+
+    def test_opens_after_threshold_and_recovers(self):
+        from circuit import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+        from exceptions import CircuitOpenError
+
+        changes = []
+        breaker = CircuitBreaker(
+            'api', failure_threshold=3, recovery_timeout=0.05,
+            on_change=lambda breaker, old, new: changes.append((old, new))
+        )
+        calls = []
+
+        def fail():
+            calls.append(1)
+            raise ConnectionError('down')
+
+        for _ in range(3):
+            with pytest.raises(ConnectionError):
+                breaker.call(fail)
+        assert breaker.state == OPEN
+
+        with pytest.raises(CircuitOpenError) as error:
+            breaker.call(fail)
+        assert len(calls) == 3, 'Разомкнутый предохранитель не делает вызов'
+        assert 0 < error.value.retry_after <= 1
+
+        time.sleep(0.06)
+        assert breaker.call(lambda: 'ok') == 'ok'
+        assert breaker.state == CLOSED
+        assert changes == [(CLOSED, OPEN), (OPEN, HALF_OPEN),
+                           (HALF_OPEN, CLOSED)]
+
+    def test_half_open_allows_limited_probes(self):
+        from circuit import OPEN, CircuitBreaker
+
+        breaker = CircuitBreaker(
+            'api', failure_threshold=1, recovery_timeout=0.01,
+            half_open_calls=1
+        )
+        breaker.record_failure(ConnectionError())
+        time.sleep(0.02)
+        assert breaker.allow()
+        assert not breaker.allow(), 'В half_open проходит один пробный вызов'
+        breaker.record_failure(ConnectionError())
+        assert breaker.state == OPEN
+
+    def test_errors_of_one_account_do_not_open(self):
+        from circuit import CLOSED, CircuitBreaker
+        from exceptions import RequestAPIYandexPracticumError
+        from homework import api_unavailable
+
+        breaker = CircuitBreaker(
+            'api', failure_threshold=2, is_failure=api_unavailable
+        )
+
+        def unauthorized():
+            raise RequestAPIYandexPracticumError('401', status_code=401)
+
+        for _ in range(5):
+            with pytest.raises(RequestAPIYandexPracticumError):
+                breaker.call(unauthorized)
+        assert breaker.state == CLOSED
+
+
+class TestOutage:
+
+    def test_outage_is_one_notification_pair(self):
+        import homework
+        from circuit import CircuitBreaker
+        from engine import PollingEngine
+        from outbox import Outbox
+        from subscriptions import Subscription
+
+        calls = []
+        state = {'down': True}
+
+        def mock_get(url, headers=None, params=None, **kwargs):
+            calls.append(1)
+            if state['down']:
+                return MockResponse({}, 503)
+            return MockResponse(payload())
+
+        bot = MockBot()
+        outbox = Outbox(
+            partial(homework.send_message_to_chat, bot),
+            chat_interval=0, global_rate=1000
+        ).start()
+        breaker = CircuitBreaker(
+            'API практикума', failure_threshold=5, recovery_timeout=0.1,
+            is_failure=homework.api_unavailable,
+            on_change=partial(homework.announce_outage, outbox, 'admin')
+        )
+        subscriptions = [
+            Subscription(f'token{number}', str(number))
+            for number in range(500)
+        ]
+        engine = PollingEngine(
+            subscriptions, bot, max_workers=4, session=MockSession(mock_get),
+            outbox=outbox, api_breaker=breaker
+        )
+
+        with ThreadPoolExecutor(4) as executor:
+            engine.run_cycle(executor)
+            assert len(calls) <= 5 + 4, (
+                'При сбое API запросы остальных подписок не выполняются'
+            )
+            assert outbox.join(5)
+            assert [chat for chat, _ in bot.sent] == ['admin']
+            assert bot.sent[0][1].startswith('Сбой в работе программы')
+
+            state['down'] = False
+            time.sleep(0.12)
+            for subscription_state in engine.states.values():
+                subscription_state.next_poll = 0
+            engine.run_cycle(executor)
+        assert outbox.stop(5)
+
+        assert [chat for chat, _ in bot.sent] == ['admin', 'admin']
+        assert bot.sent[1][1] == (
+            'API практикума снова доступно, опрос возобновлён'
+        )
+
+    def test_outbox_waits_for_telegram_recovery(self):
+        import telegram
+
+        import homework
+        from circuit import CircuitBreaker
+        from outbox import Outbox
+
+        class FlakyBot(MockBot):
+
+            def __init__(self):
+                super().__init__()
+                self.attempts = []
+
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                self.attempts.append(time.monotonic())
+                if len(self.attempts) == 1:
+                    raise telegram.error.NetworkError('down')
+                super().send_message(chat_id, text)
+
+        bot = FlakyBot()
+        outbox = Outbox(
+            partial(homework.send_message_to_chat, bot), chat_interval=0,
+            global_rate=1000, workers=1, max_attempts=2, backoff=0.01,
+            breaker=CircuitBreaker(
+                'телеграм', failure_threshold=1, recovery_timeout=0.2,
+                is_failure=homework.telegram_unavailable
+            )
+        ).start()
+        outbox.put(1, 'hello')
+        assert outbox.stop(5)
+
+        assert bot.sent == [(1, 'hello')], (
+            'Пока телеграм недоступен, сообщение ждёт, а не теряется'
+        )
+        assert len(bot.attempts) == 2
+        assert bot.attempts[1] - bot.attempts[0] >= 0.19
@@ -0,0 +1,121 @@
+from types import SimpleNamespace
+
+from tests.utils import MockBot
+
+
+class MockOutbox:
+
+    def __init__(self):
+        self.queued = []
+
+    def put(self, chat_id, text, on_done=None, key=None):
+        self.queued.append((chat_id, text))
+
+
+def make_update(update_id, chat_id, text):
+    return SimpleNamespace(
+        update_id=update_id,
+        message=SimpleNamespace(chat_id=chat_id, text=text)
+    )
+
+
+def make_homework(status, date_updated):
+    return {
+        'id': 1,
+        'homework_name': 'hw1.zip',
+        'status': status,
+        'reviewer_comment': '',
+        'date_updated': date_updated,
+    }
+
+
+class TestStatusCache:
+
+    def test_history_keeps_only_transitions(self):
+        from commands import StatusCache
+
+        cache = StatusCache(history_size=2)
+        cache.update(1, [make_homework('reviewing', '1')])
+        cache.update(1, [make_homework('reviewing', '1')])
+        cache.update('1', [make_homework('rejected', '2')])
+        cache.update(1, [make_homework('approved', '3')])
+
+        assert [hw['status'] for hw in cache.status(1)] == ['approved']
+        assert [hw['status'] for _, hw in cache.history(1)] == [
+            'rejected', 'approved'
+        ]
+
+    def test_chat_is_stored_in_columns(self):
+        from commands import StatusCache
+
+        cache = StatusCache()
+        for chat_id in (1, 2):
+            cache.update(chat_id, [
+                dict(make_homework('reviewing', '1'), id=1,
+                     homework_name=''.join(['hw', '1.zip'])),
+                dict(make_homework('rejected', '1'), id=2,
+                     homework_name=''.join(['hw', '2.zip'])),
+            ])
+        first, second = cache._chats['1'], cache._chats['2']
+        assert first.names[0] is second.names[0], (
+            'Имена работ интернированы и не дублируются между чатами'
+        )
+        assert len(first.codes) == 2 and len(first.table) == 4
+        assert [hw.get('status') for hw in cache.status(2)] == [
+            'reviewing', 'rejected'
+        ]
+        assert cache.status(2)[0].get('reviewer_comment') is None
+
+
+class TestCommandListener:
+
+    def test_commands_are_answered_from_cache(self):
+        from commands import CommandListener, StatusCache
+
+        cache = StatusCache()
+        cache.update(1, [make_homework('approved', '1')])
+        bot = MockBot([
+            make_update(10, 1, '/status'),
+            make_update(11, 1, '/history@homework_bot'),
+            make_update(12, 2, '/status'),
+            make_update(13, 1, 'привет'),
+        ])
+        outbox = MockOutbox()
+        listener = CommandListener(bot, cache, outbox)
+
+        listener.poll()
+        listener.poll()
+
+        assert bot.offsets == [None, 14], (
+            'Следующий getUpdates должен подтверждать полученные обновления'
+        )
+        assert len(outbox.queued) == 3
+        assert outbox.queued[0] == (
+            1, '"hw1": Работа проверена: ревьюеру всё понравилось. Ура!'
+        )
+        assert outbox.queued[1][1].endswith('ревьюеру всё понравилось. Ура!')
+        assert outbox.queued[2] == (2, 'Пока нет данных о домашних работах.')
+
+    def test_standby_replica_does_not_get_updates(self):
+        import time
+
+        from commands import CommandListener, StatusCache
+
+        lease = SimpleNamespace(held=False, renew_interval=0.01)
+        bot = MockBot([make_update(10, 1, '/status')])
+        outbox = MockOutbox()
+        listener = CommandListener(
+            bot, StatusCache(), outbox, timeout=0, lease=lease
+        ).start()
+        try:
+            time.sleep(0.1)
+            assert bot.offsets == [], (
+                'Резервная реплика не забирает обновления у ведущей'
+            )
+            lease.held = True
+            deadline = time.monotonic() + 2
+            while not outbox.queued and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            listener.stop()
+        assert outbox.queued == [(1, 'Пока нет данных о домашних работах.')]
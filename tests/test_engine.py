@@ -0,0 +1,153 @@
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import (MockBot, MockResponse, MockSession,
+                         homework_payload)
+
+
+class TestSubscriptions:
+
+    def test_load_json(self, tmp_path):
+        from subscriptions import load_subscriptions
+
+        path = tmp_path / 'subscriptions.json'
+        path.write_text(json.dumps([
+            {'token': 'a', 'chat_id': 1},
+            {'token': 'b', 'chat_id': 2},
+            {'token': 'a', 'chat_id': 1},
+        ]))
+        subscriptions = load_subscriptions(str(path))
+        assert [s.chat_id for s in subscriptions] == ['1', '2'], (
+            'Повторяющиеся подписки должны отбрасываться'
+        )
+        assert subscriptions[0].headers == {'Authorization': 'OAuth a'}
+
+    def test_load_sqlite(self, tmp_path, monkeypatch):
+        import subscriptions
+        from subscriptions import load_subscriptions
+
+        path = str(tmp_path / 'subscriptions.db')
+        with sqlite3.connect(path) as connection:
+            connection.execute(
+                'CREATE TABLE subscriptions (token TEXT, chat_id TEXT)'
+            )
+            connection.execute("INSERT INTO subscriptions VALUES ('a', '1')")
+        opened = []
+        original = sqlite3.connect
+
+        def connect(*args, **kwargs):
+            opened.append(original(*args, **kwargs))
+            return opened[-1]
+
+        monkeypatch.setattr(subscriptions.sqlite3, 'connect', connect)
+        assert len(load_subscriptions(path)) == 1
+        with pytest.raises(sqlite3.ProgrammingError):
+            opened[0].execute('SELECT 1')
+
+    def test_load_invalid(self, tmp_path):
+        from exceptions import SubscriptionsError
+        from subscriptions import load_subscriptions
+
+        path = tmp_path / 'subscriptions.json'
+        path.write_text(json.dumps([{'token': 'a'}]))
+        with pytest.raises(SubscriptionsError):
+            load_subscriptions(str(path))
+
+
+class TestPollingEngine:
+
+    def make_engine(self, count, get):
+        from engine import PollingEngine
+        from subscriptions import Subscription
+
+        subscriptions = [
+            Subscription(f'token{i}', str(i)) for i in range(count)
+        ]
+        return PollingEngine(
+            subscriptions, MockBot(), max_workers=4,
+            session=MockSession(get)
+        )
+
+    def test_cycle_polls_every_subscription(self):
+        def mock_get(url, headers=None, params=None, **kwargs):
+            token = headers['Authorization'].split()[1]
+            return MockResponse(homework_payload(token))
+
+        engine = self.make_engine(50, mock_get)
+
+        with ThreadPoolExecutor(4) as executor:
+            engine.run_cycle(executor)
+            engine.run_cycle(executor)
+        assert engine.outbox.join(5)
+
+        sent = sorted(engine.bot.sent)
+        assert len(sent) == 50, (
+            'Каждая подписка получает одно сообщение, повтор не отправляется'
+        )
+        assert sent[0] == ('0', 'Изменился статус проверки работы "token0". '
+                                'Работа проверена: ревьюеру всё понравилось. '
+                                'Ура!')
+        assert all(
+            state.current_timestamp == 1000
+            for state in engine.states.values()
+        )
+
+    def test_error_does_not_stop_other_subscriptions(self):
+        def mock_get(url, headers=None, params=None, **kwargs):
+            if headers['Authorization'] == 'OAuth token0':
+                return MockResponse({}, HTTPStatus.UNAUTHORIZED)
+            return MockResponse({'homeworks': [], 'current_date': 1000})
+
+        engine = self.make_engine(3, mock_get)
+
+        with ThreadPoolExecutor(2) as executor:
+            engine.run_cycle(executor)
+        assert engine.outbox.join(5)
+
+        assert len(engine.bot.sent) == 1
+        assert engine.bot.sent[0][0] == '0'
+        assert engine.bot.sent[0][1].startswith('Сбой в работе программы')
+
+
+class TestAsyncPollingEngine:
+
+    def test_hanging_request_does_not_stall_cycle(self):
+        import asyncio
+        import time
+
+        from engine import AsyncPollingEngine
+        from subscriptions import Subscription
+
+        def mock_get(url, headers=None, params=None, **kwargs):
+            token = headers['Authorization'].split()[1]
+            if token == 'token0':
+                time.sleep(1)
+            return MockResponse(homework_payload(token))
+
+        subscriptions = [Subscription(f'token{i}', str(i)) for i in range(20)]
+        engine = AsyncPollingEngine(
+            subscriptions, MockBot(), max_workers=8, api_timeout=0.2,
+            session=MockSession(mock_get)
+        )
+
+        async def timed_cycle():
+            started = time.monotonic()
+            await engine.run_cycle()
+            return time.monotonic() - started
+
+        elapsed = asyncio.run(timed_cycle())
+        assert engine.outbox.join(5)
+
+        assert elapsed < 0.9, (
+            'Зависший запрос должен прерываться по таймауту'
+        )
+        sent = dict(engine.bot.sent)
+        assert len(sent) == 19
+        assert '0' not in sent, (
+            'Таймаут API учитывает предохранитель, в чат он не отправляется'
+        )
+        assert sent['1'].startswith('Изменился статус проверки работы')
@@ -0,0 +1,98 @@
+def make_homework(homework_id, status, date_updated, lesson='Спринт 1'):
+    return {
+        'id': homework_id,
+        'homework_name': f'hw{homework_id}.zip',
+        'lesson_name': lesson,
+        'status': status,
+        'reviewer_comment': '',
+        'date_updated': date_updated,
+    }
+
+
+class TestHistoryStore:
+
+    def test_writes_are_batched_and_deduplicated(self, tmp_path):
+        from history import HistoryStore
+
+        store = HistoryStore(str(tmp_path / 'history.db'))
+        store.record('sub', 1, make_homework(1, 'reviewing',
+                                             '2022-01-01T00:00:00Z'))
+        assert store.homework('sub', 1) == [], (
+            'До flush переходы не записываются'
+        )
+        assert store.flush() == 1
+        store.record('sub', 1, make_homework(1, 'reviewing',
+                                             '2022-01-01T00:00:00Z'))
+        store.record('sub', 1, make_homework(1, 'approved',
+                                             '2022-01-01T02:00:00Z'))
+        assert store.flush() == 1, 'Повтор того же перехода не пишется'
+        assert [row[0] for row in store.homework('sub', 1)] == [
+            'reviewing', 'approved'
+        ]
+
+    def test_review_time_and_latency(self, tmp_path):
+        from history import HistoryStore
+
+        store = HistoryStore(str(tmp_path / 'history.db'))
+        for homework in (
+            make_homework(1, 'reviewing', '2022-01-01T00:00:00Z'),
+            make_homework(1, 'rejected', '2022-01-01T01:00:00Z'),
+            make_homework(1, 'reviewing', '2022-01-02T00:00:00Z'),
+            make_homework(1, 'approved', '2022-01-02T00:30:00Z'),
+            make_homework(2, 'reviewing', '2022-01-01T00:00:00Z', 'Спринт 2'),
+            make_homework(2, 'approved', '2022-01-01T03:00:00Z', 'Спринт 2'),
+            make_homework(3, 'reviewing', '2022-01-01T00:00:00Z'),
+        ):
+            store.record('sub', 1, homework)
+        store.flush()
+
+        durations = {
+            row[1]: row[4] for row in store.review_durations()
+        }
+        assert durations == {1: 1800, 2: 3 * 3600}, (
+            'Время считается от последнего взятия на проверку, '
+            'непринятые работы не учитываются'
+        )
+        assert store.review_latency() == {
+            'Спринт 1': (1, 1800.0, 1800),
+            'Спринт 2': (1, 3 * 3600.0, 3 * 3600),
+        }
+
+    def test_history_command_survives_restart(self, tmp_path):
+        from commands import StatusCache, answer_history
+        from history import HistoryStore
+
+        path = str(tmp_path / 'history.db')
+        store = HistoryStore(path)
+        store.record('sub', 1, make_homework(1, 'approved',
+                                             '2022-01-01T00:00:00Z'))
+        store.close()
+
+        cache = StatusCache(store=HistoryStore(path))
+        assert 'hw1' in answer_history(cache, 1)
+
+
+class TestEngineHistory:
+
+    def test_engine_records_transitions_per_cycle(self, tmp_path):
+        from engine import PollingEngine
+        from history import HistoryStore
+        from subscriptions import Subscription
+        from tests.utils import MockBot, RecordingSession
+
+        store = HistoryStore(str(tmp_path / 'history.db'))
+        subscription = Subscription('token', '1')
+        engine = PollingEngine(
+            [subscription], MockBot(), max_workers=2,
+            session=RecordingSession(),
+            history=store
+        )
+        engine.poll(subscription)
+        assert len(store) == 1
+        engine.end_cycle(0.1)
+        engine.outbox.stop(5)
+
+        assert len(store) == 0
+        assert store.homework(subscription.key, 7) == [
+            ('approved', '', '2022-01-01T00:00:00Z')
+        ]
@@ -0,0 +1,29 @@
+import subprocess
+import sys
+from os.path import abspath, dirname
+
+ROOT = dirname(dirname(abspath(__file__)))
+
+
+class TestImports:
+
+    def test_homework_import_is_lazy(self):
+        code = (
+            'import sys, homework, logging; '
+            'print(" ".join(name for name in ('
+            '"telegram", "requests", "asyncio", "http.server"'
+            ') if name in sys.modules)); '
+            'print(len(logging.getLogger("bot_logger").handlers))'
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', code], cwd=ROOT, capture_output=True,
+            text=True, check=True
+        )
+        loaded, handlers = result.stdout.splitlines()
+
+        assert loaded == '', (
+            f'Тяжёлые модули загружаются при импорте homework: {loaded}'
+        )
+        assert handlers == '0', (
+            'Логирование настраивается в main(), а не при импорте'
+        )
@@ -0,0 +1,213 @@
+import threading
+import time
+
+from tests.utils import MockBot, MockResponse, MockSession
+
+STATUSES = ('reviewing', 'approved', 'rejected')
+
+
+def wait_until(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class Api:
+    """API практикума, общий для реплик: одна работа, версия задаётся."""
+
+    def __init__(self):
+        self.version = 0
+        self.calls = []
+
+    def session(self, replica):
+        api = self
+
+        class Session:
+            def get(self, url, headers=None, params=None, **kwargs):
+                api.calls.append((replica, time.monotonic()))
+                return MockResponse({
+                    'homeworks': [{
+                        'id': 7,
+                        'homework_name': 'hw.zip',
+                        'status': STATUSES[api.version],
+                        'reviewer_comment': '',
+                        'date_updated': f'2022-01-0{api.version + 1}',
+                    }],
+                    'current_date': 1000 + api.version,
+                })
+
+        return Session()
+
+    def first_call(self, replica):
+        return min(at for name, at in self.calls if name == replica)
+
+
+class TestLease:
+
+    def test_single_holder_and_takeover(self, tmp_path):
+        from leader import Lease
+
+        path = str(tmp_path / 'lease.db')
+        first = Lease(path, owner='a', ttl=0.6).start()
+        second = Lease(path, owner='b', ttl=0.6).start()
+        assert first.held and not second.held
+
+        first.stop(release=False)
+        assert wait_until(lambda: second.held, timeout=2)
+        assert second.generation == first.generation + 1
+        second.stop()
+
+        third = Lease(path, owner='c', ttl=0.6)
+        assert third.acquire(), 'Освобождённая аренда забирается сразу'
+
+    def test_delivered_copy_is_not_requeued(self, tmp_path):
+        from changes import ChangeTracker
+        from leader import DeliveryLog
+
+        log = DeliveryLog(str(tmp_path / 'lease.db'))
+        homework = {'id': 1, 'status': 'approved', 'date_updated': '1'}
+        first = ChangeTracker(key='sub', deliveries=log)
+        first.sent_callback(homework, '1', lambda delivered: None)(True)
+
+        second = ChangeTracker(key='sub', deliveries=log)
+        assert second.pending_targets(homework, ['1', '2']) == ['2']
+
+    def test_queued_copy_is_not_sent_after_handover(self, tmp_path):
+        from changes import ChangeTracker
+        from leader import DeliveryLog
+        from outbox import Outbox
+
+        class Lease:
+            held = False
+            renew_interval = 0.05
+
+        sent, results = [], []
+        lease = Lease()
+        log = DeliveryLog(str(tmp_path / 'lease.db'))
+        homework = {'id': 1, 'status': 'approved', 'date_updated': '1'}
+        tracker = ChangeTracker(key='sub', deliveries=log)
+        outbox = Outbox(
+            lambda chat_id, text: sent.append(text), chat_interval=0,
+            global_rate=1000, workers=1, lease=lease, deliveries=log
+        ).start()
+        outbox.put(
+            '1', 'first', results.append,
+            key=tracker.message_key(homework, '1')
+        )
+        outbox.put('1', 'second', key=tracker.message_key(homework, '2'))
+        time.sleep(0.1)
+
+        other = ChangeTracker(key='sub', deliveries=log)
+        other.sent_callback(homework, '1', lambda delivered: None)(True)
+        lease.held = True
+        assert outbox.stop(timeout=2)
+
+        assert sent == ['second']
+        assert results == [True]
+
+
+class TestFailover:
+
+    def test_takeover_is_not_delayed_by_spread(self, monkeypatch):
+        import engine as engine_module
+        from engine import PollingEngine
+        from subscriptions import Subscription
+
+        class Lease:
+            held = False
+            renew_interval = 0.05
+
+        # Настройка по умолчанию, conftest её выключает.
+        monkeypatch.setattr(engine_module, 'POLL_SPREAD', True)
+        subscriptions = [
+            Subscription(f'token{number}', str(number))
+            for number in range(20)
+        ]
+        lease = Lease()
+        engine = PollingEngine(
+            subscriptions[:10], MockBot(), max_workers=1,
+            session=MockSession(lambda *args, **kwargs: None), lease=lease
+        )
+        engine.outbox.stop()
+        assert len(engine.due()) < 10, 'Первые опросы при запуске сдвинуты'
+
+        assert not engine.lead()
+        lease.held = True
+        assert engine.lead()
+        assert len(engine.due()) == 10, (
+            'Получив аренду, реплика опрашивает подписки сразу'
+        )
+
+        engine.assign(subscriptions)
+        assert len(engine.due()) == 20, (
+            'Подписки, переданные воркеру, опрашиваются сразу'
+        )
+
+    def test_standby_takes_over_without_duplicates(self, tmp_path,
+                                                   monkeypatch):
+        import engine as engine_module
+        from checkpoint import Checkpoint
+        from engine import PollingEngine
+        from leader import DeliveryLog, Lease
+        from scheduler import PollScheduler
+        from subscriptions import Subscription
+
+        monkeypatch.setattr(engine_module, 'POLL_TICK', 0.02)
+        monkeypatch.setattr(PollScheduler, 'next_delay', lambda self: 0.02)
+        ttl = 0.6
+        lease_path = str(tmp_path / 'lease.db')
+        state_path = str(tmp_path / 'state.db')
+        api = Api()
+        subscription = Subscription('token', '1')
+        replicas = {}
+        for name in ('a', 'b'):
+            lease = Lease(lease_path, owner=name, ttl=ttl).start()
+            engine = PollingEngine(
+                [subscription], MockBot(), max_workers=1,
+                session=api.session(name),
+                checkpoint=Checkpoint(state_path, flush_interval=3600),
+                lease=lease, deliveries=DeliveryLog(lease_path)
+            )
+            engine.outbox.chat_interval = 0
+            thread = threading.Thread(target=engine.run)
+            thread.start()
+            replicas[name] = (engine, lease, thread)
+        engine_a, lease_a, _ = replicas['a']
+        engine_b, lease_b, _ = replicas['b']
+        sent = lambda: engine_a.bot.sent + engine_b.bot.sent  # noqa: E731
+
+        try:
+            assert wait_until(lambda: len(sent()) == 1)
+            api.version = 1
+            assert wait_until(lambda: len(sent()) == 2)
+
+            crashed = time.monotonic()
+            lease_a.stop(release=False)
+            assert wait_until(
+                lambda: any(name == 'b' for name, _ in api.calls)
+            )
+            failover = api.first_call('b') - crashed
+            api.version = 2
+            assert wait_until(lambda: len(sent()) == 3)
+            time.sleep(0.2)
+        finally:
+            for engine, _, thread in replicas.values():
+                engine.lifecycle.stop()
+                thread.join(10)
+            lease_b.stop()
+
+        assert failover <= ttl + 2 * lease_b.renew_interval + 0.3, (
+            f'Резервная реплика начала опрос через {failover:.2f} c'
+        )
+        assert not [
+            at for name, at in api.calls
+            if name == 'a' and at > api.first_call('b')
+        ], 'После передачи аренды прежняя реплика не опрашивает API'
+        texts = [text for _, text in sent()]
+        assert len(texts) == len(set(texts)) == 3, (
+            f'Повторные уведомления: {texts}'
+        )
+        assert [text for _, text in engine_b.bot.sent] == texts[2:]
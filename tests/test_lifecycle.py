@@ -0,0 +1,167 @@
+import json
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+from tests.utils import MockBot, RecordingSession
+
+
+@pytest.fixture
+def restore_signals():
+    handlers = {
+        signum: signal.getsignal(signum)
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP)
+    }
+    yield
+    for signum, handler in handlers.items():
+        signal.signal(signum, handler)
+
+
+class TestLifecycle:
+
+    def test_sigterm_interrupts_sleep(self, restore_signals):
+        from lifecycle import Lifecycle
+
+        lifecycle = Lifecycle().install()
+        threading.Timer(0.1, os.kill, (os.getpid(), signal.SIGTERM)).start()
+        started = time.monotonic()
+        lifecycle.sleep(5)
+
+        assert time.monotonic() - started < 2
+        assert lifecycle.stopping
+
+    def test_sighup_requests_reload(self, restore_signals):
+        from lifecycle import Lifecycle
+
+        lifecycle = Lifecycle().install()
+        threading.Timer(0.1, os.kill, (os.getpid(), signal.SIGHUP)).start()
+        lifecycle.sleep(5)
+
+        assert not lifecycle.stopping
+        assert lifecycle.take_reload()
+        assert not lifecycle.take_reload(), 'Просьба сбрасывается'
+
+    def test_changed_file_requests_reload(self, tmp_path):
+        from lifecycle import Lifecycle
+
+        path = tmp_path / 'subscriptions.json'
+        path.write_text('[]')
+        lifecycle = Lifecycle(check_interval=0.02).watch(str(path))
+
+        def touch():
+            path.write_text('[{"token": "a", "chat_id": 1}]')
+            os.utime(path, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+
+        threading.Timer(0.1, touch).start()
+        started = time.monotonic()
+        lifecycle.sleep(5)
+
+        assert time.monotonic() - started < 2
+        assert lifecycle.take_reload()
+
+
+class TestGracefulShutdown:
+
+    def test_engine_drains_and_checkpoints_on_stop(self, tmp_path):
+        from checkpoint import Checkpoint
+        from engine import PollingEngine
+        from subscriptions import Subscription
+
+        path = str(tmp_path / 'state.db')
+        subscription = Subscription('token', '1')
+        engine = PollingEngine(
+            [subscription], MockBot(), max_workers=2,
+            session=RecordingSession(),
+            checkpoint=Checkpoint(path, flush_interval=3600)
+        )
+        thread = threading.Thread(target=engine.run)
+        thread.start()
+        time.sleep(0.3)
+        engine.lifecycle.stop()
+        thread.join(5)
+
+        assert not thread.is_alive(), 'Цикл опроса должен завершиться'
+        assert len(engine.bot.sent) == 1, (
+            'Поставленное в очередь сообщение отправляется до остановки'
+        )
+        current_date, seen = Checkpoint(path).load()[subscription.key]
+        assert current_date == 1000, (
+            'При остановке состояние сохраняется, не дожидаясь flush_interval'
+        )
+        assert seen
+
+    def test_engine_reloads_subscriptions(self, tmp_path, monkeypatch):
+        import engine as engine_module
+        import homework
+        from engine import PollingEngine
+        from subscriptions import Subscription
+
+        path = tmp_path / 'subscriptions.json'
+        path.write_text(json.dumps([
+            {'token': 'a', 'chat_id': 1}, {'token': 'c', 'chat_id': 3}
+        ]))
+        monkeypatch.setattr(engine_module, 'SUBSCRIPTIONS_FILE', str(path))
+        monkeypatch.setattr(homework, 'reload_config', lambda: set())
+        kept = Subscription('a', '1')
+        engine = PollingEngine(
+            [kept, Subscription('b', '2')], MockBot(), max_workers=2,
+            session=RecordingSession()
+        )
+        state = engine.states[kept]
+        engine.lifecycle.request_reload()
+        engine.wake()
+
+        assert [item.token for item in engine.subscriptions] == ['a', 'c']
+        assert engine.states[kept] is state
+        engine.outbox.stop(5)
+
+    def test_engine_applies_reloaded_retry_time(self, monkeypatch):
+        import homework
+        from engine import PollingEngine
+        from subscriptions import Subscription
+
+        def reload_config():
+            homework.RETRY_TIME = 300
+            return {'RETRY_TIME'}
+
+        monkeypatch.setattr(homework, 'RETRY_TIME', 120)
+        monkeypatch.setattr(homework, 'reload_config', reload_config)
+        engine = PollingEngine(
+            [Subscription('a', '1')], MockBot(), max_workers=1,
+            session=RecordingSession()
+        )
+        assert [
+            state.scheduler.base_interval for state in engine.states.values()
+        ] == [120]
+
+        engine.reload_settings()
+        engine.outbox.stop(5)
+
+        assert [
+            state.scheduler.base_interval for state in engine.states.values()
+        ] == [300]
+
+    def test_reload_config_reads_env_file(self, tmp_path, monkeypatch):
+        import homework
+
+        env = tmp_path / '.env'
+        env.write_text('PRACTICUM_TOKEN=new\nRETRY_TIME=120\n')
+        for name in homework.RELOADABLE:
+            monkeypatch.setattr(homework, name, getattr(homework, name))
+        monkeypatch.setattr(homework, 'HEADERS', homework.HEADERS)
+        monkeypatch.setattr(homework, 'ENV_FILE', str(env))
+        monkeypatch.setenv('PRACTICUM_TOKEN', 'old')
+        monkeypatch.setenv('RETRY_TIME', '60')
+        monkeypatch.setenv('TELEGRAM_TOKEN', str(homework.TELEGRAM_TOKEN))
+        monkeypatch.setenv('TELEGRAM_CHAT_ID', str(homework.TELEGRAM_CHAT_ID))
+        homework.PRACTICUM_TOKEN = 'old'
+        homework.RETRY_TIME = 60
+        homework.TELEGRAM_TOKEN = str(homework.TELEGRAM_TOKEN)
+        homework.TELEGRAM_CHAT_ID = str(homework.TELEGRAM_CHAT_ID)
+
+        assert homework.reload_config() == {'PRACTICUM_TOKEN', 'RETRY_TIME'}
+        assert homework.HEADERS == {'Authorization': 'OAuth new'}
+        assert homework.RETRY_TIME == 120
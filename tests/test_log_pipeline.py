@@ -0,0 +1,125 @@
+import json
+import logging
+import threading
+
+
+class ThreadRecordingHandler(logging.Handler):
+
+    def __init__(self):
+        super().__init__()
+        self.threads = []
+        self.records = []
+        self.done = threading.Event()
+
+    def emit(self, record):
+        self.threads.append(threading.current_thread().name)
+        self.records.append(record)
+        self.done.set()
+
+
+class TestLogPipeline:
+
+    def test_repeated_errors_are_sampled(self):
+        from exceptions import HomeWorkIsEmpty
+        from log_pipeline import SamplingFilter
+
+        logger = logging.getLogger('test_sampling')
+        logger.propagate = False
+        handler = ThreadRecordingHandler()
+        logger.handlers = [handler]
+        logger.addFilter(SamplingFilter(window=60, every=10))
+
+        for _ in range(25):
+            logger.error(HomeWorkIsEmpty('Получен пустой список'))
+        logger.error('Другая ошибка')
+
+        assert len(handler.records) == 4, (
+            'Из 25 одинаковых ошибок в лог попадают первая, 10-я и 20-я'
+        )
+        assert not hasattr(handler.records[0], 'suppressed')
+        assert handler.records[1].suppressed == 8
+        assert handler.records[2].suppressed == 9
+
+    def test_suppressed_count_survives_window_end(self):
+        from log_pipeline import SamplingFilter
+
+        logger = logging.getLogger('test_sampling_window')
+        logger.propagate = False
+        handler = ThreadRecordingHandler()
+        logger.handlers = [handler]
+        sampling = SamplingFilter(window=60, every=10)
+        logger.addFilter(sampling)
+
+        for number in range(6):
+            if number == 5:
+                sampling.window = 0
+            logger.error('Сбой в работе программы')
+
+        assert len(handler.records) == 2
+        assert handler.records[1].suppressed == 4, (
+            'Пропущенные в конце окна записи учитываются в следующей'
+        )
+
+    def test_sampling_forgets_expired_and_extra_keys(self):
+        from log_pipeline import SamplingFilter
+
+        logger = logging.getLogger('test_sampling_keys')
+        logger.propagate = False
+        logger.handlers = [ThreadRecordingHandler()]
+        sampling = SamplingFilter(window=60, every=10, max_keys=50)
+        logger.addFilter(sampling)
+
+        for chat_id in range(500):
+            logger.error(f'[{chat_id}] Сбой в работе программы')
+        assert len(sampling._seen) == 50, (
+            'Разные тексты с id чатов не копятся без предела'
+        )
+
+        sampling.window = 0
+        logger.error('Новая ошибка')
+        assert len(sampling._seen) == 1, 'Записи с истёкшим окном забываются'
+
+    def test_json_line_has_context_fields(self):
+        from log_pipeline import SUBSCRIPTION, ContextFilter, JSONFormatter
+
+        logger = logging.getLogger('test_json')
+        logger.setLevel(logging.DEBUG)
+        logger.propagate = False
+        handler = ThreadRecordingHandler()
+        logger.handlers = [handler]
+        logger.addFilter(ContextFilter())
+
+        context = SUBSCRIPTION.set('1:oken')
+        try:
+            logger.debug('Работа %s', 'hw.zip', extra={'homework_id': 7})
+        finally:
+            SUBSCRIPTION.reset(context)
+
+        line = json.loads(JSONFormatter().format(handler.records[0]))
+        assert line['message'] == 'Работа hw.zip'
+        assert line['subscription'] == '1:oken'
+        assert line['homework_id'] == 7
+
+    def test_queue_mode_writes_in_listener_thread(self, monkeypatch):
+        import logging.config
+
+        import log_pipeline
+
+        logger = logging.getLogger('test_queue')
+        logger.setLevel(logging.DEBUG)
+        logger.propagate = False
+        handler = ThreadRecordingHandler()
+        logger.handlers = [handler]
+        monkeypatch.setattr(log_pipeline, 'LOGGER_NAME', 'test_queue')
+        monkeypatch.setattr(logging.config, 'dictConfig', lambda config: None)
+
+        listener = log_pipeline.setup_logging({}, queued=True)
+        try:
+            logger.info('Запрос выполнен')
+            assert handler.done.wait(5)
+        finally:
+            listener.stop()
+
+        assert handler.threads[0] != threading.current_thread().name, (
+            'Обработчики логов должны работать в потоке QueueListener'
+        )
@@ -0,0 +1,68 @@
+from concurrent.futures import ThreadPoolExecutor
+from urllib.request import urlopen
+
+from tests.utils import MockBot, MockResponse, MockSession
+
+
+class TestMetrics:
+
+    def test_histogram_buckets_are_cumulative(self):
+        from metrics import Registry
+
+        histogram = Registry().histogram('latency', 'test', (0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 5):
+            histogram.observe(value)
+
+        assert histogram.samples() == [
+            'latency_bucket{le="0.1"} 2',
+            'latency_bucket{le="1.0"} 3',
+            'latency_bucket{le="+Inf"} 4',
+            'latency_sum 5.65',
+            'latency_count 4',
+        ]
+
+    def test_counter_per_exception_class(self):
+        from exceptions import HomeWorkIsEmpty
+        from metrics import Registry
+
+        counter = Registry().counter('errors', 'test', ('exception',))
+        for error in (HomeWorkIsEmpty(), HomeWorkIsEmpty(), KeyError()):
+            counter.inc(type(error).__name__)
+
+        assert counter.samples() == [
+            'errors{exception="HomeWorkIsEmpty"} 2',
+            'errors{exception="KeyError"} 1',
+        ]
+
+    def test_engine_cycle_is_exposed_on_metrics_endpoint(self):
+        import metrics
+        from engine import PollingEngine
+        from subscriptions import Subscription
+
+        requests_before = metrics.API_LATENCY.count
+        empty_before = metrics.ERRORS.value('HomeWorkIsEmpty')
+        engine = PollingEngine(
+            [Subscription('token', '1')], MockBot(), session=MockSession(
+                lambda *args, **kwargs: MockResponse(
+                    {'homeworks': [], 'current_date': 1000}
+                )
+            )
+        )
+        with ThreadPoolExecutor(1) as executor:
+            engine.run_cycle(executor)
+
+        assert metrics.API_LATENCY.count == requests_before + 1
+        assert metrics.ERRORS.value('HomeWorkIsEmpty') == empty_before + 1
+        assert metrics.LAST_SUCCESS_AGE.get() < 5
+
+        server = metrics.start_metrics_server(port=0)
+        try:
+            url = f'http://127.0.0.1:{server.server_port}/metrics'
+            with urlopen(url) as response:
+                body = response.read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert 'homework_api_request_seconds_count' in body
+        assert 'homework_outbox_queue_depth 0' in body
+        assert 'homework_errors_total{exception="HomeWorkIsEmpty"}' in body
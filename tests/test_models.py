@@ -0,0 +1,120 @@
+import json
+
+import pytest
+
+
+HOMEWORK = {
+    'id': 1,
+    'homework_name': 'hw.zip',
+    'status': 'approved',
+    'reviewer_comment': 'ok',
+    'date_updated': '2022-01-01T00:00:00Z',
+    'lesson_name': 'Итоговый проект',
+}
+
+
+class TestCheckResponse:
+
+    def test_missing_current_date_is_reported(self):
+        import homework
+        from exceptions import ResponseValidationError
+
+        with pytest.raises(ResponseValidationError) as error:
+            homework.check_response({'homeworks': [HOMEWORK]})
+        assert error.value.errors == ['нет ключа "current_date"']
+
+    def test_all_errors_reported_at_once(self):
+        import homework
+        from exceptions import ResponseValidationError
+
+        with pytest.raises(ResponseValidationError) as error:
+            homework.check_response({'current_date': 'вчера'})
+        assert error.value.errors == [
+            'нет ключа "homeworks"', 'тип значения "current_date" не int'
+        ]
+
+
+class TestParseHomeworks:
+
+    def test_builds_records(self):
+        from models import Homework, parse_homeworks
+
+        homeworks, errors = parse_homeworks([HOMEWORK])
+        assert errors == []
+        record, = homeworks
+        assert isinstance(record, Homework)
+        assert record['status'] == 'approved'
+        assert record.get('id') == 1
+        assert 'reviewer_comment' in record
+        assert record.get('missing', 'нет') == 'нет'
+
+    def test_every_homework_is_validated(self):
+        from models import Homework, parse_homeworks
+
+        broken = [
+            HOMEWORK,
+            {'homework_name': 'hw2.zip', 'reviewer_comment': ''},
+            dict(HOMEWORK, status='unknown'),
+            'hw3',
+        ]
+        homeworks, errors = parse_homeworks(
+            broken, statuses={'approved', 'reviewing', 'rejected'}
+        )
+        assert errors == [
+            'homeworks[1]: нет ключа "status"',
+            'homeworks[2]: неизвестный статус unknown',
+            'homeworks[3] не dict',
+        ]
+        assert isinstance(homeworks[0], Homework)
+        assert homeworks[1:] == broken[1:3], (
+            'Работы с ошибкой остаются словарями для parse_status'
+        )
+
+    def test_errors_do_not_stop_the_response(self, caplog):
+        import logging
+
+        import homework
+        from changes import ChangeTracker
+
+        class Outbox:
+            def __init__(self):
+                self.queued = []
+
+            def put(self, chat_id, text, on_done=None, key=None):
+                self.queued.append(text)
+
+        items = [
+            {'id': 1, 'homework_name': 'hw1.zip', 'reviewer_comment': ''},
+            7,
+            dict(HOMEWORK, id=3),
+        ]
+        outbox = Outbox()
+        with caplog.at_level(logging.ERROR, logger='bot_logger'):
+            status = homework.handle_response(
+                {'homeworks': items, 'current_date': 100}, outbox,
+                ChangeTracker(), chat_id=1
+            )
+        assert status == 'approved'
+        assert len(outbox.queued) == 1
+        assert any(
+            'homeworks[0]' in record.getMessage()
+            and 'homeworks[1]' in record.getMessage()
+            for record in caplog.records
+        ), 'Ошибки всех работ сообщаются одной записью'
+
+
+class TestDecodeResponse:
+
+    def test_decoder_without_orjson(self, monkeypatch):
+        import models
+
+        class Response:
+            content = json.dumps({'homeworks': [], 'current_date': 1}).encode()
+
+            def json(self):
+                return json.loads(self.content)
+
+        monkeypatch.setattr(models, 'orjson', None)
+        assert models.decode_response(Response()) == {
+            'homeworks': [], 'current_date': 1
+        }
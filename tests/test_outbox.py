@@ -0,0 +1,102 @@
+import threading
+import time
+
+
+class RecordingSend:
+
+    def __init__(self, fail_times=0, retry_after=None):
+        self.sent = []
+        self.fail_times = fail_times
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+
+    def __call__(self, chat_id, text):
+        from exceptions import SendMessageError
+
+        with self.lock:
+            if self.fail_times:
+                self.fail_times -= 1
+                raise SendMessageError('429', retry_after=self.retry_after)
+            self.sent.append((time.monotonic(), chat_id, text))
+
+
+class TestOutbox:
+
+    def test_messages_for_one_chat_are_coalesced(self):
+        from outbox import Outbox
+
+        send = RecordingSend()
+        outbox = Outbox(send, chat_interval=0.2, global_rate=1000, workers=1)
+        outbox.put(1, 'first')
+        outbox.start()
+        time.sleep(0.05)
+        for number in range(5):
+            outbox.put(1, f'message {number}')
+        assert outbox.stop(5)
+
+        texts = [text for _, _, text in send.sent]
+        assert texts == [
+            'first', '\n\n'.join(f'message {n}' for n in range(5))
+        ], 'Накопившиеся для чата сообщения отправляются одним'
+
+    def test_per_chat_interval_is_respected(self):
+        from outbox import Outbox
+
+        send = RecordingSend()
+        outbox = Outbox(
+            send, chat_interval=0.1, global_rate=1000, workers=4
+        ).start()
+        for number in range(3):
+            outbox.put(1, f'message {number}')
+            time.sleep(0.02)
+            assert outbox.join(5)
+        outbox.stop(5)
+
+        times = [sent_at for sent_at, _, _ in send.sent]
+        assert all(
+            later - earlier >= 0.09 for earlier, later in zip(times, times[1:])
+        ), 'В один чат нельзя отправлять чаще chat_interval'
+
+    def test_global_rate_is_respected(self):
+        from outbox import Outbox
+
+        send = RecordingSend()
+        outbox = Outbox(send, chat_interval=0, global_rate=50, workers=4)
+        outbox.bucket._tokens = 0
+        outbox.start()
+        started = time.monotonic()
+        for chat_id in range(25):
+            outbox.put(chat_id, 'text')
+        assert outbox.stop(5)
+        assert time.monotonic() - started >= 0.45, (
+            'Всего нельзя отправлять больше global_rate сообщений в секунду'
+        )
+
+    def test_failed_send_is_retried_after_retry_after(self):
+        from outbox import Outbox
+
+        send = RecordingSend(fail_times=1, retry_after=0.2)
+        delivered = []
+        outbox = Outbox(send, chat_interval=0, global_rate=1000).start()
+        started = time.monotonic()
+        outbox.put(1, 'text', delivered.append)
+        assert outbox.stop(5)
+
+        assert delivered == [True]
+        assert send.sent[0][0] - started >= 0.2, (
+            'Повтор отправки должен ждать RetryAfter от телеграм'
+        )
+
+    def test_message_is_dropped_after_max_attempts(self):
+        from outbox import Outbox
+
+        send = RecordingSend(fail_times=10)
+        delivered = []
+        outbox = Outbox(
+            send, chat_interval=0, global_rate=1000, max_attempts=2,
+            backoff=0.01
+        ).start()
+        outbox.put(1, 'text', delivered.append)
+        assert outbox.stop(5)
+        assert delivered == [False]
+        assert send.sent == []
@@ -0,0 +1,22 @@
+import pytest
+
+
+class TestRenderer:
+
+    def test_render_and_cache(self):
+        from rendering import Renderer
+
+        renderer = Renderer({'ru': {'approved': 'Принято {без формата}'}})
+        message = renderer.render('hw1.zip', 'approved')
+        assert message == (
+            'Изменился статус проверки работы "hw1". Принято {без формата}'
+        )
+        renderer.render('hw1.zip', 'approved')
+        assert renderer.render.cache_info().hits == 1
+
+    def test_unknown_status(self):
+        from rendering import Renderer
+
+        renderer = Renderer({'ru': {'approved': 'Принято'}})
+        with pytest.raises(KeyError):
+            renderer.render('hw1.zip', 'unknown')
@@ -0,0 +1,128 @@
+from tests.utils import BodyResponse, MockBot, QueueSession
+
+
+HEADERS = {'Authorization': 'OAuth token'}
+HOMEWORKS = [{'id': 1, 'homework_name': 'hw.zip', 'status': 'reviewing',
+              'reviewer_comment': ''}]
+
+
+class TestResponseCache:
+
+    def test_unchanged_body_is_not_parsed(self):
+        import homework
+        from response_cache import ResponseCache, UnchangedResponse
+
+        first = BodyResponse({'homeworks': HOMEWORKS, 'current_date': 100})
+        second = BodyResponse({'homeworks': HOMEWORKS, 'current_date': 200})
+        changed = BodyResponse({'homeworks': [], 'current_date': 300})
+        session = QueueSession(first, second, changed)
+        cache = ResponseCache()
+
+        assert homework.request_api_answer(0, HEADERS, session, cache)[
+            'homeworks'] == HOMEWORKS
+        response = homework.request_api_answer(100, HEADERS, session, cache)
+        assert isinstance(response, UnchangedResponse)
+        assert response['current_date'] == 200, (
+            'current_date берётся из нового ответа без разбора JSON'
+        )
+        assert second.json_calls == 0
+        assert homework.request_api_answer(200, HEADERS, session, cache)[
+            'homeworks'] == []
+
+        stats = cache.take_stats()
+        assert (stats['unchanged'], stats['miss']) == (1, 2)
+        assert stats['bytes_saved'] == len(second.content)
+        assert cache.take_stats()['miss'] == 0, 'Статистика сбрасывается'
+
+    def test_etag_makes_conditional_request(self):
+        import homework
+        from response_cache import ResponseCache, UnchangedResponse
+
+        session = QueueSession(
+            BodyResponse(
+                {'homeworks': HOMEWORKS, 'current_date': 100},
+                headers={'ETag': '"v1"'}
+            ),
+            BodyResponse(status_code=304),
+        )
+        cache = ResponseCache()
+
+        homework.request_api_answer(50, HEADERS, session, cache)
+        response = homework.request_api_answer(100, HEADERS, session, cache)
+
+        assert session.requests[0] == HEADERS
+        assert session.requests[1]['If-None-Match'] == '"v1"'
+        assert isinstance(response, UnchangedResponse)
+        assert response['current_date'] == 100
+        assert cache.take_stats()['not_modified'] == 1
+
+    def test_lru_and_ttl_eviction(self):
+        from response_cache import ResponseCache
+
+        cache = ResponseCache(max_size=2)
+        for number in range(3):
+            cache.parse(
+                {'Authorization': f'OAuth {number}'},
+                BodyResponse({'homeworks': [], 'current_date': 1}), 1
+            )
+        assert len(cache) == 2
+        assert cache.request_headers({'Authorization': 'OAuth 0'}) == {
+            'Authorization': 'OAuth 0'
+        }
+
+        cache = ResponseCache(ttl=0)
+        cache.parse(HEADERS, BodyResponse(
+            {'homeworks': [], 'current_date': 1}
+        ), 1)
+        cache.parse(HEADERS, BodyResponse(
+            {'homeworks': [], 'current_date': 2}
+        ), 2)
+        assert cache.take_stats()['miss'] == 2, (
+            'Просроченная запись не используется'
+        )
+
+    def test_engine_skips_unchanged_response(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        from engine import PollingEngine
+        from subscriptions import Subscription
+
+        subscription = Subscription('token', '1')
+        payload = {'homeworks': HOMEWORKS, 'current_date': 100}
+        responses = [BodyResponse(payload), BodyResponse(payload)]
+        engine = PollingEngine(
+            [subscription], MockBot(), session=QueueSession(*responses)
+        )
+        with ThreadPoolExecutor(1) as executor:
+            engine.run_cycle(executor)
+            engine.states[subscription].next_poll = 0
+            engine.run_cycle(executor)
+        assert engine.outbox.join(5)
+
+        assert responses[1].json_calls == 0
+        assert len(engine.bot.sent) == 1
+        assert engine.states[subscription].current_timestamp == 100
+
+    def test_chats_of_one_token_have_own_entries(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        from engine import PollingEngine
+        from subscriptions import Subscription
+
+        subscriptions = [
+            Subscription('token', '1'), Subscription('token', '2')
+        ]
+        payload = {'homeworks': HOMEWORKS, 'current_date': 100}
+        engine = PollingEngine(
+            subscriptions, MockBot(), max_workers=1,
+            session=QueueSession(BodyResponse(payload), BodyResponse(payload))
+        )
+        with ThreadPoolExecutor(1) as executor:
+            engine.run_cycle(executor)
+        assert engine.outbox.join(5)
+
+        assert sorted(chat for chat, _ in engine.bot.sent) == ['1', '2'], (
+            'Ответ, разобранный для одного чата, для другого не считается '
+            'неизменившимся'
+        )
+        assert len(engine.response_cache) == 2
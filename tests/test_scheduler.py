@@ -0,0 +1,92 @@
+import time
+from email.utils import formatdate
+from http import HTTPStatus
+
+import pytest
+
+
+class TestPollScheduler:
+
+    def make_scheduler(self):
+        from scheduler import PollScheduler
+
+        return PollScheduler(
+            min_interval=30, base_interval=60, max_interval=900, jitter=0
+        )
+
+    def test_interval_depends_on_status(self):
+        scheduler = self.make_scheduler()
+        assert scheduler.next_delay() == 60
+
+        scheduler.success('reviewing', now=0)
+        assert scheduler.next_delay() == 30, (
+            'Работу на ревью нужно опрашивать с минимальным интервалом'
+        )
+
+        scheduler.success('approved', now=10000)
+        assert scheduler.next_delay() == 900, (
+            'Принятую работу нужно опрашивать с максимальным интервалом'
+        )
+
+    def test_idle_polls_grow_interval_within_bounds(self):
+        scheduler = self.make_scheduler()
+        delays = []
+        for _ in range(100):
+            scheduler.success()
+            delays.append(scheduler.next_delay())
+        assert delays == sorted(delays)
+        assert delays[-1] == 900
+
+    def test_history_caps_interval(self):
+        scheduler = self.make_scheduler()
+        scheduler.success('rejected', now=0)
+        scheduler.success('reviewing', now=400)
+        scheduler.success('rejected', now=800)
+        for _ in range(100):
+            scheduler.success()
+        assert scheduler.next_delay() == pytest.approx(100), (
+            'Интервал не должен превышать четверть среднего времени '
+            'между изменениями статуса'
+        )
+
+    def test_failures_back_off_and_reset(self):
+        scheduler = self.make_scheduler()
+        scheduler.failure()
+        first = scheduler.next_delay()
+        scheduler.failure()
+        assert scheduler.next_delay() == first * 2
+        scheduler.success()
+        assert scheduler.next_delay() < first * 2
+
+    def test_retry_after_is_honored(self):
+        scheduler = self.make_scheduler()
+        scheduler.failure(retry_after=3600)
+        assert scheduler.next_delay() == 3600
+
+
+class TestRetryAfter:
+
+    def test_parse_retry_after(self):
+        from scheduler import parse_retry_after
+
+        assert parse_retry_after('120') == 120
+        assert parse_retry_after(None) is None
+        assert parse_retry_after('garbage') is None
+        delay = parse_retry_after(formatdate(time.time() + 300, usegmt=True))
+        assert 290 < delay <= 300
+
+    def test_api_error_carries_retry_after(self):
+        import homework
+        from exceptions import RequestAPIYandexPracticumError
+
+        class Response:
+            status_code = HTTPStatus.TOO_MANY_REQUESTS
+            headers = {'Retry-After': '42'}
+
+        class Session:
+            def get(self, *args, **kwargs):
+                return Response()
+
+        with pytest.raises(RequestAPIYandexPracticumError) as error:
+            homework.request_api_answer(1, homework.HEADERS, Session())
+        assert error.value.retry_after == 42
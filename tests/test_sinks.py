@@ -0,0 +1,182 @@
+import json
+import smtplib
+from functools import partial
+
+from tests.utils import MockBot, RecordingSession
+
+
+class PostResponse:
+
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+        self.headers = {}
+
+
+class WebhookSession:
+
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+        self.posted = []
+
+    def post(self, url, json=None, **kwargs):
+        self.posted.append((url, json['text']))
+        return PostResponse(self.status_code)
+
+
+class MockSMTP:
+    sent = []
+
+    def __init__(self, host, port, timeout=None):
+        self.address = (host, port)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def send_message(self, email):
+        MockSMTP.sent.append((email['To'], email.get_content().strip()))
+
+
+class TestRouter:
+
+    def test_routes_by_destination(self, monkeypatch):
+        import homework
+        from sinks import Router
+
+        MockSMTP.sent = []
+        monkeypatch.setattr(smtplib, 'SMTP', MockSMTP)
+        bot = MockBot()
+        session = WebhookSession()
+        send = Router(partial(homework.send_message_to_chat, bot), session)
+
+        send('-100123', 'a')
+        send('https://hooks.example/x', 'b')
+        send('mailto:mentor@example.com', 'c')
+
+        assert bot.sent == [('-100123', 'a')]
+        assert session.posted == [('https://hooks.example/x', 'b')]
+        assert MockSMTP.sent == [('mentor@example.com', 'c')]
+
+    def test_webhook_error_is_retryable(self):
+        import pytest
+        from exceptions import SendMessageError
+        from sinks import Router
+
+        send = Router(None, WebhookSession(status_code=503))
+        with pytest.raises(SendMessageError):
+            send('https://hooks.example/x', 'text')
+
+    def test_telegram_breaker_does_not_hold_webhooks(self):
+        import pytest
+        from circuit import OPEN, CircuitBreaker
+        from exceptions import CircuitOpenError, SendMessageError
+        from sinks import Router
+
+        breaker = CircuitBreaker('телеграм', failure_threshold=1)
+        breaker.record_failure(ConnectionError())
+        webhooks = WebhookSession()
+        send = Router(None, webhooks, breaker=breaker)
+
+        send('https://hooks.example/x', 'text')
+        assert webhooks.posted == [('https://hooks.example/x', 'text')], (
+            'Разомкнутый предохранитель телеграм не держит вебхуки'
+        )
+        with pytest.raises(CircuitOpenError):
+            send(1, 'text')
+
+        send = Router(None, WebhookSession(status_code=503), breaker=breaker)
+        with pytest.raises(SendMessageError):
+            send('https://hooks.example/x', 'text')
+        assert breaker.state == OPEN and breaker.failures == 1, (
+            'Ошибки вебхука не считаются ни сбоем, ни успехом телеграм'
+        )
+
+
+class TestFanOut:
+
+    def test_message_rendered_once_and_sent_to_all(self, monkeypatch):
+        import homework
+        from engine import PollingEngine
+        from outbox import Outbox
+        from sinks import Router
+        from subscriptions import Subscription
+
+        MockSMTP.sent = []
+        monkeypatch.setattr(smtplib, 'SMTP', MockSMTP)
+        rendered = []
+        parse_status = homework.parse_status
+
+        def counting_parse_status(item):
+            rendered.append(item['id'])
+            return parse_status(item)
+
+        monkeypatch.setattr(homework, 'parse_status', counting_parse_status)
+        bot = MockBot()
+        webhooks = WebhookSession()
+        outbox = Outbox(
+            Router(partial(homework.send_message_to_chat, bot), webhooks),
+            chat_interval=0
+        ).start()
+        subscription = Subscription('token', '1', (
+            '@mentors', 'https://hooks.example/x', 'mailto:a@example.com'
+        ))
+        engine = PollingEngine(
+            [subscription], bot, max_workers=2, session=RecordingSession(),
+            outbox=outbox
+        )
+        engine.poll(subscription)
+        assert outbox.stop(5)
+
+        assert rendered == [7], 'Сообщение готовится один раз'
+        texts = {text for _, text in bot.sent}
+        texts |= {text for _, text in webhooks.posted}
+        texts |= {text for _, text in MockSMTP.sent}
+        assert [chat_id for chat_id, _ in bot.sent] == ['1', '@mentors']
+        assert len(webhooks.posted) == len(MockSMTP.sent) == 1
+        assert len(texts) == 1
+
+    def test_version_saved_after_all_copies(self):
+        from changes import ChangeTracker
+
+        class Checkpoint:
+            def __init__(self):
+                self.saved = []
+
+            def save_homework(self, key, homework_id, version):
+                self.saved.append(homework_id)
+
+            def save_cursor(self, key, current_date):
+                pass
+
+        checkpoint = Checkpoint()
+        tracker = ChangeTracker(checkpoint=checkpoint, key='sub')
+        on_done = tracker.mark({'id': 1, 'status': 'approved'}, copies=2)
+        on_done(True)
+        assert checkpoint.saved == [] and tracker.undelivered == 1
+        on_done(True)
+        assert checkpoint.saved == [1] and tracker.undelivered == 0
+
+        on_done = tracker.mark({'id': 2, 'status': 'approved'}, copies=2)
+        on_done(False)
+        on_done(True)
+        assert checkpoint.saved == [1], (
+            'Если хоть одна копия не доставлена, версия не сохраняется'
+        )
+
+
+class TestDestinations:
+
+    def test_load_destinations(self, tmp_path):
+        from subscriptions import load_subscriptions
+
+        path = tmp_path / 'subscriptions.json'
+        path.write_text(json.dumps([{
+            'token': 'a', 'chat_id': 1,
+            'destinations': ['-100', 'mailto:a@example.com'],
+        }, {'token': 'b', 'chat_id': 2}]))
+        first, second = load_subscriptions(str(path))
+
+        assert first.destinations == ('-100', 'mailto:a@example.com')
+        assert second.destinations == ()
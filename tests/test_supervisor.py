@@ -0,0 +1,232 @@
+import os
+import queue
+import time
+
+from tests.utils import MockBot, MockSession
+
+
+def fake_worker(worker_id, subscriptions, inbox, health, standby=False):
+    """Воркер без опроса: принимает назначения и шлёт отчёты."""
+    while True:
+        try:
+            subscriptions = inbox.get(timeout=0.05)
+        except queue.Empty:
+            pass
+        health.put({
+            'worker': worker_id,
+            'pid': os.getpid(),
+            'time': time.time(),
+            'progress': time.time(),
+            'subscriptions': len(subscriptions),
+            'standby': standby,
+            'cycle_seconds': 0.0,
+            'queue': 0,
+            'errors': 0,
+            'last_success': time.time(),
+        })
+
+
+def fake_standby_worker(worker_id, subscriptions, inbox, health):
+    """Резервный воркер: аренду шарда держит другая реплика."""
+    fake_worker(worker_id, subscriptions, inbox, health, standby=True)
+
+
+def wait_for(condition, supervisor, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        supervisor.check()
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+class TestSupervisor:
+
+    def test_ring_balance_and_minimal_movement(self):
+        from subscriptions import Subscription
+        from supervisor import HashRing, shard
+
+        subscriptions = [
+            Subscription(f'token{number}', number) for number in range(4000)
+        ]
+        ring = HashRing(range(4))
+        before = shard(subscriptions, ring)
+        assert sum(map(len, before.values())) == len(subscriptions)
+        for shard_subscriptions in before.values():
+            assert 600 < len(shard_subscriptions) < 1400, (
+                'Подписки должны распределяться по воркерам примерно поровну'
+            )
+
+        ring.remove(2)
+        after = shard(subscriptions, ring)
+        assert set(after) == {0, 1, 3}
+        for worker_id in (0, 1, 3):
+            assert set(before[worker_id]) <= set(after[worker_id]), (
+                'При удалении воркера переезжают только его подписки'
+            )
+
+        ring.add(2)
+        assert shard(subscriptions, ring) == before
+
+    def test_worker_engine_applies_last_assignment(self):
+        from subscriptions import Subscription
+        from supervisor import WorkerEngine
+
+        first = [Subscription('a', 1), Subscription('b', 2)]
+        inbox, health = queue.Queue(), queue.Queue()
+        engine = WorkerEngine(
+            0, inbox, health, first, MockBot(),
+            session=MockSession(lambda *args, **kwargs: None)
+        )
+        state = engine.states[first[0]]
+        inbox.put([first[1]])
+        inbox.put([first[0], Subscription('c', 3)])
+        engine.end_cycle(0.1)
+
+        assert [item.token for item in engine.subscriptions] == ['a', 'c']
+        assert engine.states[first[0]] is state, (
+            'Состояние оставшейся подписки должно сохраняться'
+        )
+        report = health.get_nowait()
+        assert report['worker'] == 0
+        assert report['subscriptions'] == 2
+        engine.outbox.stop()
+
+    def test_worker_reports_during_long_cycle(self):
+        import threading
+
+        from subscriptions import Subscription
+        from supervisor import WorkerEngine
+
+        released = threading.Event()
+
+        def slow_get(*args, **kwargs):
+            released.wait(5)
+            raise ConnectionError('API недоступно')
+
+        health = queue.Queue()
+        engine = WorkerEngine(
+            0, queue.Queue(), health, [Subscription('a', 1)], MockBot(),
+            session=MockSession(slow_get)
+        )
+        engine.heartbeat_interval = 0.05
+        runner = threading.Thread(target=engine.run)
+        runner.start()
+        try:
+            reports = [health.get(timeout=1) for _ in range(3)]
+        finally:
+            engine.lifecycle.stop()
+            released.set()
+            runner.join(10)
+        assert [report['worker'] for report in reports] == [0, 0, 0], (
+            'Воркер шлёт отчёты, пока цикл опроса ещё не закончен'
+        )
+
+    def test_hung_poll_is_stalled_despite_heartbeats(self):
+        import threading
+
+        from subscriptions import Subscription
+        from supervisor import Supervisor, WorkerEngine
+
+        released = threading.Event()
+
+        def hung_get(*args, **kwargs):
+            released.wait(5)
+            raise ConnectionError('API недоступно')
+
+        health = queue.Queue()
+        engine = WorkerEngine(
+            0, queue.Queue(), health, [Subscription('a', 1)], MockBot(),
+            session=MockSession(hung_get)
+        )
+        engine.heartbeat_interval = 0.05
+        runner = threading.Thread(target=engine.run)
+        runner.start()
+        try:
+            reports = [health.get(timeout=1) for _ in range(4)]
+            time.sleep(0.2)
+            supervisor = Supervisor([], workers=1, heartbeat_timeout=0.2)
+            supervisor.started[0] = time.monotonic() - 1
+            supervisor.reports[0] = reports[-1]
+            stalled = supervisor.stalled(0, time.monotonic())
+        finally:
+            engine.lifecycle.stop()
+            released.set()
+            runner.join(10)
+        assert reports[-1]['time'] > reports[0]['time']
+        assert reports[-1]['progress'] == reports[0]['progress']
+        assert stalled, (
+            'Отчёты по таймеру не скрывают зависший опрос от супервизора'
+        )
+
+    def test_dead_worker_subscriptions_are_reassigned(self):
+        from subscriptions import Subscription
+        from supervisor import Supervisor
+
+        subscriptions = [
+            Subscription(f'token{number}', number) for number in range(300)
+        ]
+        supervisor = Supervisor(
+            subscriptions, workers=3, target=fake_worker,
+            heartbeat_timeout=30, respawn_delay=0.5
+        ).start()
+        try:
+            assert wait_for(
+                lambda: supervisor.health()['subscriptions'] == 300,
+                supervisor
+            )
+            victim = supervisor.processes[1]
+            victim.kill()
+            victim.join(5)
+
+            assert wait_for(lambda: 1 not in supervisor.ring.nodes, supervisor)
+            assert set(supervisor.assignment) == {0, 2}
+            assert wait_for(
+                lambda: sum(
+                    report['subscriptions']
+                    for report in supervisor.reports.values()
+                ) == 300,
+                supervisor
+            ), 'Подписки упавшего воркера должны перейти к остальным'
+
+            assert wait_for(
+                lambda: 1 in supervisor.processes
+                and supervisor.health()['workers_alive'] == 3
+                and supervisor.health()['subscriptions'] == 300,
+                supervisor
+            ), 'Воркер должен перезапуститься и получить подписки обратно'
+            assert supervisor.processes[1].pid != victim.pid
+        finally:
+            supervisor.stop()
+
+    def test_standby_worker_keeps_its_shard(self):
+        from subscriptions import Subscription
+        from supervisor import Supervisor
+
+        subscriptions = [
+            Subscription(f'token{number}', number) for number in range(100)
+        ]
+        supervisor = Supervisor(
+            subscriptions, workers=2, target=fake_standby_worker,
+            heartbeat_timeout=30, respawn_delay=0.5
+        ).start()
+        try:
+            before = dict(supervisor.assignment)
+            assert wait_for(lambda: len(supervisor.reports) == 2, supervisor)
+            victim = supervisor.processes[1]
+            victim.kill()
+            victim.join(5)
+
+            assert wait_for(lambda: 1 in supervisor.dead, supervisor)
+            assert supervisor.ring.nodes == {0, 1}
+            assert supervisor.assignment == before, (
+                'Подписки резервного воркера не переходят к другим шардам'
+            )
+            assert wait_for(
+                lambda: 1 in supervisor.processes
+                and supervisor.processes[1].pid != victim.pid,
+                supervisor
+            )
+        finally:
+            supervisor.stop()
@@ -1,7 +1,95 @@
+import json
+from http import HTTPStatus
 from inspect import signature
 from types import ModuleType
 
 
+def homework_payload(token, status='approved', homework_id=1):
+    """Ответ API с одной работой {token}.zip."""
+    return {
+        'homeworks': [{
+            'id': homework_id,
+            'homework_name': f'{token}.zip',
+            'status': status,
+            'reviewer_comment': '',
+            'date_updated': '2022-01-01T00:00:00Z',
+        }],
+        'current_date': 1000,
+    }
+
+
+class MockResponse:
+    """Ответ API: json() возвращает data как есть."""
+
+    def __init__(self, data, http_status=HTTPStatus.OK):
+        self.status_code = http_status
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+class BodyResponse:
+    """Ответ API с телом в байтах и заголовками, считает вызовы json()."""
+
+    def __init__(self, payload=None, status_code=200, headers=None):
+        self.status_code = status_code
+        self.content = json.dumps(payload).encode() if payload else b''
+        self.headers = headers or {}
+        self.json_calls = 0
+
+    def json(self):
+        self.json_calls += 1
+        return json.loads(self.content)
+
+
+class MockSession:
+    """Сессия, запросы которой обрабатывает функция get."""
+
+    def __init__(self, get):
+        self.get = get
+
+
+class QueueSession:
+    """Сессия, отдающая ответы по очереди и запоминающая заголовки."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        self.requests.append(headers)
+        return self.responses.pop(0)
+
+
+class RecordingSession:
+    """Сессия, отдающая работу hw.zip и запоминающая from_date запросов."""
+
+    def __init__(self):
+        self.from_dates = []
+
+    def get(self, url, headers=None, params=None, **kwargs):
+        self.from_dates.append(params['from_date'])
+        return MockResponse(homework_payload('hw', homework_id=7))
+
+
+class MockBot:
+    """Бот: запоминает отправленное и отдаёт обновления updates."""
+
+    def __init__(self, updates=()):
+        self.sent = []
+        self.updates = list(updates)
+        self.offsets = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.sent.append((chat_id, text))
+
+    def get_updates(self, offset=None, timeout=None, **kwargs):
+        self.offsets.append(offset)
+        updates, self.updates = self.updates, []
+        return updates
+
+
 def check_function(scope: ModuleType, func_name: str, params_qty: int = 0):
     """Checks if scope has a function with specific name and params with qty"""
     assert hasattr(scope, func_name), (